@@ -16,7 +16,7 @@ if config.config_file_name is not None:
 
 # add your model's MetaData object here
 from app.db.base import Base
-from app.models import station, weather_observation  # force model import
+from app.models import station, weather_observation, backfill_checkpoint, observation_rollup  # force model import
 target_metadata = Base.metadata
 
 # other values from the config, defined by the needs of env.py,
@@ -0,0 +1,52 @@
+"""add observation rollups
+
+Revision ID: d7a4e2b9c1f3
+Revises: b3f1c7d2e9a4
+Create Date: 2026-10-18 14:02:17.540913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7a4e2b9c1f3'
+down_revision: Union[str, None] = 'b3f1c7d2e9a4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+FIELDS = ["temperature", "wind_speed", "wind_direction", "humidity", "pressure", "dewpoint", "visibility"]
+TABLES = ["observation_rollups_hourly", "observation_rollups_daily"]
+
+
+def field_columns():
+    columns = []
+    for field in FIELDS:
+        columns += [
+            sa.Column(f'{field}_count', sa.Integer(), nullable=False),
+            sa.Column(f'{field}_sum', sa.Float(), nullable=True),
+            sa.Column(f'{field}_min', sa.Float(), nullable=True),
+            sa.Column(f'{field}_max', sa.Float(), nullable=True),
+        ]
+    return columns
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        op.create_table(table,
+        sa.Column('bucket_start', sa.DateTime(), nullable=False),
+        sa.Column('observation_count', sa.Integer(), nullable=False),
+        *field_columns(),
+        sa.Column('station_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['station_id'], ['stations.id'], ),
+        sa.PrimaryKeyConstraint('station_id', 'bucket_start')
+        )
+
+    # Existing observations are not aggregated here, run `python -m app.rollups --rebuild` after upgrading
+
+
+def downgrade() -> None:
+    for table in reversed(TABLES):
+        op.drop_table(table)
@@ -0,0 +1,123 @@
+"""partition weather observations by month
+
+Revision ID: f2c8a5d1b6e7
+Revises: d7a4e2b9c1f3
+Create Date: 2026-10-18 15:11:42.307115
+
+"""
+from datetime import date, datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2c8a5d1b6e7'
+down_revision: Union[str, None] = 'd7a4e2b9c1f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLE = 'weather_observations'
+OLD_TABLE = 'weather_observations_unpartitioned'
+COLUMNS = "id, temperature, wind_speed, humidity, timestamp, station_id, wind_direction, pressure, dewpoint, visibility"
+# Months created past the current one, the pipeline creates later ones as needed
+MONTHS_AHEAD = 2
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def months_between(first: date, last: date):
+    month = first
+    while month <= last:
+        yield month
+        month = add_months(month, 1)
+
+
+def columns():
+    return [
+        sa.Column('id', sa.Integer(), server_default=sa.text(f"nextval('{TABLE}_id_seq')"), nullable=False),
+        sa.Column('temperature', sa.Float(), nullable=True),
+        sa.Column('wind_speed', sa.Float(), nullable=True),
+        sa.Column('humidity', sa.Float(), nullable=True),
+        sa.Column('timestamp', sa.DateTime(), nullable=False),
+        sa.Column('station_id', sa.Integer(), nullable=False),
+        sa.Column('wind_direction', sa.Float(), nullable=True),
+        sa.Column('pressure', sa.Float(), nullable=True),
+        sa.Column('dewpoint', sa.Float(), nullable=True),
+        sa.Column('visibility', sa.Float(), nullable=True),
+        sa.ForeignKeyConstraint(['station_id'], ['stations.id'], ),
+        sa.CheckConstraint('temperature IS NULL OR temperature >= -273.15', name='temperature_above_absolute_zero'),
+        sa.CheckConstraint('wind_direction IS NULL OR wind_direction BETWEEN 0 AND 360', name='valid_wind_direction'),
+        sa.CheckConstraint('humidity IS NULL OR humidity BETWEEN 0 AND 100', name='valid_humidity'),
+        sa.CheckConstraint('visibility IS NULL OR visibility >= 0', name='positive_visibility'),
+    ]
+
+
+def rename_old_table(table: str) -> None:
+    # Index names are schema-wide, free them for the new table
+    op.rename_table(table, OLD_TABLE)
+    op.execute(f"ALTER INDEX {table}_pkey RENAME TO {OLD_TABLE}_pkey")
+    op.execute(f"ALTER INDEX unique_station_timestamp RENAME TO {OLD_TABLE}_station_timestamp")
+    op.execute(f"ALTER INDEX IF EXISTS ix_{table}_id RENAME TO ix_{OLD_TABLE}_id")
+    # Keep the id sequence alive when the old table is dropped
+    op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY NONE")
+
+
+def upgrade() -> None:
+    rename_old_table(TABLE)
+
+    # Partition key must be part of every unique constraint, hence the (id, timestamp) primary key.
+    # The (station_id, timestamp) constraint doubles as a covering index for the route range scans.
+    op.create_table(TABLE,
+    *columns(),
+    sa.PrimaryKeyConstraint('id', 'timestamp'),
+    sa.UniqueConstraint('station_id', 'timestamp', name='unique_station_timestamp',
+                        postgresql_include=['temperature', 'wind_speed']),
+    postgresql_partition_by='RANGE (timestamp)'
+    )
+    op.execute(f"ALTER SEQUENCE {TABLE}_id_seq OWNED BY {TABLE}.id")
+    op.execute(f"CREATE TABLE {TABLE}_default PARTITION OF {TABLE} DEFAULT")
+
+    # One partition per month of existing data up to a few months ahead
+    conn = op.get_bind()
+    oldest = conn.execute(sa.text(f"SELECT min(timestamp) FROM {OLD_TABLE}")).scalar() or datetime.utcnow()
+    now = datetime.utcnow()
+    for month in months_between(date(oldest.year, oldest.month, 1), add_months(date(now.year, now.month, 1), MONTHS_AHEAD)):
+        op.execute(
+            f"CREATE TABLE {TABLE}_y{month.year}m{month.month:02d} PARTITION OF {TABLE} "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+        )
+
+    # Data migration, month by month so each statement stays bounded
+    for month in months_between(date(oldest.year, oldest.month, 1), date(now.year, now.month, 1)):
+        op.execute(
+            f"INSERT INTO {TABLE} ({COLUMNS}) SELECT {COLUMNS} FROM {OLD_TABLE} "
+            f"WHERE timestamp >= '{month.isoformat()}' AND timestamp < '{add_months(month, 1).isoformat()}'"
+        )
+    # Anything outside those months (eg. timestamps in the future) lands in the default partition
+    op.execute(
+        f"INSERT INTO {TABLE} ({COLUMNS}) SELECT {COLUMNS} FROM {OLD_TABLE} "
+        f"WHERE timestamp >= '{add_months(date(now.year, now.month, 1), 1).isoformat()}'"
+    )
+
+    op.drop_table(OLD_TABLE)
+    op.execute(f"ANALYZE {TABLE}")
+
+
+def downgrade() -> None:
+    rename_old_table(TABLE)
+
+    op.create_table(TABLE,
+    *columns(),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('station_id', 'timestamp', name='unique_station_timestamp')
+    )
+    op.create_index(op.f('ix_weather_observations_id'), TABLE, ['id'], unique=False)
+    op.execute(f"ALTER SEQUENCE {TABLE}_id_seq OWNED BY {TABLE}.id")
+
+    op.execute(f"INSERT INTO {TABLE} ({COLUMNS}) SELECT {COLUMNS} FROM {OLD_TABLE}")
+    op.drop_table(OLD_TABLE)  # drops every partition
@@ -0,0 +1,34 @@
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+import os
+
+from app.db.session import DATABASE_URL
+from app.utils.metrics import register_pool
+
+# Pool of the API's async engine, sized for concurrent requests rather than ingestion workers
+ASYNC_DB_POOL_SIZE = int(os.getenv("ASYNC_DB_POOL_SIZE", "20"))
+ASYNC_DB_MAX_OVERFLOW = int(os.getenv("ASYNC_DB_MAX_OVERFLOW", "10"))
+# Test connections on checkout, so a restarted database does not fail the first requests
+ASYNC_DB_POOL_PRE_PING = os.getenv("ASYNC_DB_POOL_PRE_PING", "1") == "1"
+
+
+def async_database_url(url: str) -> str:
+    """Same database as DATABASE_URL, through the asyncpg driver."""
+    return make_url(url).set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+
+
+async_engine = create_async_engine(
+    async_database_url(DATABASE_URL),
+    pool_size=ASYNC_DB_POOL_SIZE,
+    max_overflow=ASYNC_DB_MAX_OVERFLOW,
+    pool_pre_ping=ASYNC_DB_POOL_PRE_PING,
+)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+register_pool(async_engine.pool, "async")
+
+async def get_async_db():
+    """
+    Establish an async db session, for `async def` routes.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -2,10 +2,25 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 import os
 
+from app.utils.metrics import register_pool
+
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-engine = create_engine(DATABASE_URL)
+# Pool sizing, raise these when ingesting many stations concurrently
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+
+engine = create_engine(DATABASE_URL, pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+register_pool(engine.pool, "sync")
+
+
+def init_worker_process() -> None:
+    """
+    Initializer for worker processes using the database: drops the pooled connections
+    inherited from the parent without closing them, so parent and child never share one.
+    """
+    engine.dispose(close=False)
 
 def get_db():
     """
@@ -1,5 +1,7 @@
 # main.py
+from contextlib import asynccontextmanager
 from .utils.logging import get_logger
+from app.db.async_session import async_engine
 from app.routes import router
 from fastapi import FastAPI
 import logging
@@ -7,8 +9,14 @@ import logging
 # Replace default uvicorn logger
 logging.getLogger("uvicorn.access").handlers.clear()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Close pooled async connections on shutdown
+    await async_engine.dispose()
+
 # Create app
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Set logger
 logger = get_logger()
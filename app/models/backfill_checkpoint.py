@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, UniqueConstraint
+from sqlalchemy.orm import relationship
+from app.db.base import Base
+
+class BackfillCheckpoint(Base):
+    """Progress of a chunked historical backfill, so it can resume after a crash"""
+
+    __tablename__ = "backfill_checkpoints"
+
+    # Attributes
+    id = Column(Integer, primary_key=True, index=True)
+
+    # Values
+    range_start = Column(DateTime, nullable=False) # requested backfill range (UTC)
+    range_end = Column(DateTime, nullable=False)
+    completed_until = Column(DateTime, nullable=False) # everything before this is stored
+    updated_at = Column(DateTime, nullable=False)
+
+    # Relationships
+    station_id = Column(Integer, ForeignKey("stations.id"), nullable=False)
+    station = relationship("Station")
+
+    # Constraints
+    __table_args__ = (
+        UniqueConstraint('station_id', 'range_start', name='unique_station_backfill_start'),
+    )
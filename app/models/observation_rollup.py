@@ -0,0 +1,46 @@
+from sqlalchemy import Column, Integer, Float, ForeignKey, DateTime, PrimaryKeyConstraint
+from sqlalchemy.orm import declared_attr
+from app.db.base import Base
+
+# Measured WeatherObservation fields that get count / sum / min / max rollups
+ROLLUP_FIELDS = ["temperature", "wind_speed", "wind_direction", "humidity", "pressure", "dewpoint", "visibility"]
+
+
+class RollupColumns:
+    """Columns shared by the hourly and daily rollup tables"""
+
+    # Attributes
+    bucket_start = Column(DateTime, nullable=False) # start of the hour / day (UTC)
+
+    # Values
+    observation_count = Column(Integer, nullable=False, default=0)
+
+    # Relationships
+    @declared_attr
+    def station_id(cls):
+        return Column(Integer, ForeignKey("stations.id"), nullable=False)
+
+    # Constraints, the primary key doubles as the (station_id, bucket_start) range index
+    __table_args__ = (
+        PrimaryKeyConstraint("station_id", "bucket_start"),
+    )
+
+
+# <field>_count counts non-null values, so <field>_sum / <field>_count is the average
+for _field in ROLLUP_FIELDS:
+    setattr(RollupColumns, f"{_field}_count", Column(Integer, nullable=False, default=0))
+    setattr(RollupColumns, f"{_field}_sum", Column(Float, nullable=True))
+    setattr(RollupColumns, f"{_field}_min", Column(Float, nullable=True))
+    setattr(RollupColumns, f"{_field}_max", Column(Float, nullable=True))
+
+
+class HourlyRollup(RollupColumns, Base):
+    """Per station and hour aggregates of weather observations"""
+
+    __tablename__ = "observation_rollups_hourly"
+
+
+class DailyRollup(RollupColumns, Base):
+    """Per station and day aggregates of weather observations"""
+
+    __tablename__ = "observation_rollups_daily"
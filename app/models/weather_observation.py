@@ -4,13 +4,13 @@ from app.db.base import Base
 from app.models.station import Station
 
 class WeatherObservation(Base):
-    """Stores weather readings from an NWS station"""
+    """Stores weather readings from an NWS station, range partitioned by month on timestamp"""
 
     __tablename__ = "weather_observations"
     
     # Attributes
-    id = Column(Integer, primary_key=True, index=True)
-    timestamp = Column(DateTime, nullable=False)
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    timestamp = Column(DateTime, primary_key=True) # partition key, part of every unique constraint
     
     # Values
     temperature = Column(Float, nullable=True) # Celsius
@@ -25,12 +25,14 @@ class WeatherObservation(Base):
     station_id = Column(Integer, ForeignKey("stations.id"), nullable=False)
     station = relationship("Station", back_populates="observations")
 
-    # Constraints
+    # Constraints, the unique index covers the route range scans (index-only for these fields)
     __table_args__ = (
-        UniqueConstraint('station_id', 'timestamp', name='unique_station_timestamp'),
+        UniqueConstraint('station_id', 'timestamp', name='unique_station_timestamp',
+                         postgresql_include=['temperature', 'wind_speed']),
         CheckConstraint("temperature IS NULL OR temperature >= -273.15", name="temperature_above_absolute_zero"),
         CheckConstraint("wind_direction IS NULL OR wind_direction BETWEEN 0 AND 360", name="valid_wind_direction"),
         CheckConstraint("humidity IS NULL OR humidity BETWEEN 0 AND 120", name="valid_humidity"),
         CheckConstraint("visibility IS NULL OR visibility >= 0", name="positive_visibility"),
+        {"postgresql_partition_by": "RANGE (timestamp)"},  # partitions are managed by app.pipeline.partitions
     )
 
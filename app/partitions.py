@@ -0,0 +1,37 @@
+import argparse
+from datetime import datetime
+from sqlalchemy.orm import Session
+from app.db.session import SessionLocal
+from app.pipeline.partitions import apply_retention, ensure_partitions, list_partitions, partition_name, RETENTION_MONTHS
+from app.utils.logging import get_logger
+
+logger = get_logger()
+
+
+def main():
+    # Parse maintenance arguments
+    parser = argparse.ArgumentParser(description="Maintain the monthly weather_observations partitions.")
+    parser.add_argument("--list", action="store_true", help="List existing partitions.")
+    parser.add_argument("--ensure", action="store_true", help="Create partitions up to PARTITION_MONTHS_AHEAD months ahead.")
+    parser.add_argument("--retention-months", type=int, default=RETENTION_MONTHS,
+                        help="Drop partitions older than this many whole months (0 keeps everything).")
+    args = parser.parse_args()
+
+    db: Session = SessionLocal()
+    if args.ensure:
+        now = datetime.utcnow()
+        created = ensure_partitions(db, now, now)
+        logger.info(f"Created {created} partitions")
+
+    if args.retention_months:
+        dropped = apply_retention(db, args.retention_months)
+        if not dropped:
+            logger.info(f"No partitions older than {args.retention_months} months")
+
+    if args.list:
+        for month in list_partitions(db):
+            print(partition_name(month))
+    db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Sequence
+from sqlalchemy import text
+from sqlalchemy.sql.elements import TextClause
+
+from app.pipeline.metrics import check_field
+
+# Default rolling window, in observations
+DEFAULT_WINDOW_ROWS = 12
+
+
+@dataclass(frozen=True)
+class Stat:
+    """
+    A statistic over one field, expressed against the per-observation columns of the
+    window pass: `value`, `delta` (change from the previous observation), `hours` (time
+    since it) and `rolling` (aggregate over the rolling frame).
+
+    Scalar stats aggregate those columns into one value per station, series stats return
+    one value per observation.
+    """
+    expression: str
+    series: bool = False
+    needs: tuple = ()  # window columns used besides `value`
+    rolling: Optional[str] = None  # aggregate computed over the rolling frame
+    params: tuple = ()  # extra bound parameters
+    unit: str = "{unit}"  # unit of the result, from the field unit
+
+
+STATS: Dict[str, Stat] = {
+    # One value per station
+    "mean": Stat("avg(value)"),
+    "min": Stat("min(value)"),
+    "max": Stat("max(value)"),
+    "percentile": Stat("percentile_cont(:q) WITHIN GROUP (ORDER BY value)", params=("q",)),
+    "max_delta": Stat("max(abs(delta))", needs=("delta",)),
+    "mean_delta": Stat("avg(abs(delta))", needs=("delta",)),
+    "max_rate_per_hour": Stat("max(abs(delta / nullif(hours, 0)))", needs=("delta", "hours"), unit="{unit}/h"),
+    # One value per observation
+    "delta": Stat("delta", series=True, needs=("delta",)),
+    "rate_per_hour": Stat("delta / nullif(hours, 0)", series=True, needs=("delta", "hours"), unit="{unit}/h"),
+    "rolling_mean": Stat("rolling", series=True, needs=("rolling",), rolling="avg"),
+    "rolling_min": Stat("rolling", series=True, needs=("rolling",), rolling="min"),
+    "rolling_max": Stat("rolling", series=True, needs=("rolling",), rolling="max"),
+}
+
+
+def get_stat(name: str) -> Stat:
+    """Return the stat registered under `name`, raises ValueError for unknown names."""
+    try:
+        return STATS[name]
+    except KeyError:
+        raise ValueError(f"Unknown stat '{name}', expected one of: {', '.join(STATS)}")
+
+
+def window_columns(field: str, stat: Stat, interval: Optional[timedelta]) -> str:
+    """Window expressions of the single pass over the observations, only those `stat` needs."""
+    columns = [f"{field} AS value"]
+    if "delta" in stat.needs:
+        columns.append(f"{field} - LAG({field}) OVER w AS delta")
+    if "hours" in stat.needs:
+        columns.append("EXTRACT(EPOCH FROM timestamp - LAG(timestamp) OVER w) / 3600.0 AS hours")
+    if "rolling" in stat.needs:
+        # Frame over the last N observations, or over a time interval
+        frame = "RANGE BETWEEN CAST(:interval AS interval) PRECEDING AND CURRENT ROW" if interval \
+            else "ROWS BETWEEN :preceding PRECEDING AND CURRENT ROW"
+        columns.append(f"{stat.rolling}({field}) OVER (w {frame}) AS rolling")
+    return ", ".join(columns)
+
+
+def analytics_query(
+    field: str,
+    stat_name: str,
+    start: datetime,
+    end: datetime,
+    nws_ids: Optional[Sequence[str]] = None,
+    window: int = DEFAULT_WINDOW_ROWS,
+    interval: Optional[timedelta] = None,
+    q: float = 0.5
+) -> TextClause:
+    """
+    Compose one SQL query computing `stat_name` of `field` per station over [start, end],
+    for the given stations or all of them. Every window function of a station runs in the
+    same pass over its observations (a shared `WINDOW w`), the aggregation happens in
+    Postgres.
+
+    Rows are (nws_id, value, count) for scalar stats and (nws_id, timestamp, value) for
+    series stats, ordered by station then time.
+
+    Raises:
+        ValueError: Unknown field or stat, or invalid window parameters.
+    """
+    check_field(field)
+    stat = get_stat(stat_name)
+    if window < 1:
+        raise ValueError("window must be at least 1 observation")
+    if not 0 <= q <= 1:
+        raise ValueError("q must be between 0 and 1")
+
+    # One window pass per station, laterally joined: each station's rows come off the
+    # (station_id, timestamp) index already in time order, so no sort is needed
+    observations = f"""
+        SELECT timestamp, {window_columns(field, stat, interval)}
+        FROM weather_observations
+        WHERE station_id = s.id AND timestamp >= :start AND timestamp <= :end
+        WINDOW w AS (ORDER BY timestamp)
+    """
+    requested = "" if nws_ids is None else "WHERE s.nws_id = ANY(:nws_ids)"
+
+    if stat.series:
+        sql = f"""
+            SELECT s.nws_id, o.timestamp, o.value
+            FROM stations s
+            CROSS JOIN LATERAL (
+                SELECT timestamp, {stat.expression} AS value
+                FROM ({observations}) AS o
+            ) AS o
+            {requested}
+            ORDER BY s.nws_id, o.timestamp
+        """
+    else:
+        # Stations without data in the range still get a row
+        sql = f"""
+            SELECT s.nws_id, a.value, a.count
+            FROM stations s
+            CROSS JOIN LATERAL (
+                SELECT {stat.expression} AS value, count(value) AS count
+                FROM ({observations}) AS o
+            ) AS a
+            {requested}
+            ORDER BY s.nws_id
+        """
+
+    params = {"start": start, "end": end}
+    if nws_ids is not None:
+        params["nws_ids"] = list(nws_ids)
+    if "rolling" in stat.needs:
+        params.update({"interval": interval} if interval else {"preceding": window - 1})
+    if "q" in stat.params:
+        params["q"] = q
+    return text(sql).bindparams(**params)
@@ -0,0 +1,266 @@
+from collections import OrderedDict
+from datetime import date, datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+import fcntl
+import gzip
+import hashlib
+import io
+import json
+import os
+import threading
+
+from app.utils.logging import get_logger
+
+try:
+    import orjson
+except ImportError:  # optional fast path, stdlib json is always available
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:  # optional, the archive falls back to gzip
+    zstandard = None
+
+logger = get_logger()
+
+# Root of the raw response archive, archiving is off when unset
+ARCHIVE_DIR = os.getenv("NWS_ARCHIVE_DIR")
+# 'zstd' (needs the zstandard package), 'gzip', or 'auto' for zstd when installed
+ARCHIVE_COMPRESSION = os.getenv("NWS_ARCHIVE_COMPRESSION", "auto")
+ARCHIVE_LEVEL = int(os.getenv("NWS_ARCHIVE_LEVEL", "3"))
+# Partitions whose feature digests are kept in memory, so overlapping fetches skip re-reading the index
+INDEX_CACHE_SIZE = int(os.getenv("NWS_ARCHIVE_INDEX_CACHE", "4096"))
+
+EXTENSIONS = {"zstd": ".jsonl.zst", "gzip": ".jsonl.gz"}
+DIGEST_SIZE = 16
+STATION_FILE = "station.json"
+READ_BUFFER = 1024 * 1024
+
+
+def canonical_json(obj) -> bytes:
+    """Canonical JSON (sorted keys, no whitespace), so equal features have equal bytes and digests."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS)
+    return json.dumps(obj, sort_keys=True, separators=(",", ":")).encode()
+
+
+def _loads(line: bytes):
+    return orjson.loads(line) if orjson is not None else json.loads(line)
+
+
+def feature_day(feature: Dict) -> Optional[date]:
+    """UTC day of an observation feature's timestamp, None when it has none."""
+    timestamp = (feature.get("properties") or {}).get("timestamp")
+    if not timestamp:
+        return None
+    if timestamp.endswith("+00:00") or timestamp.endswith("Z"):
+        return date.fromisoformat(timestamp[:10])
+    return datetime.fromisoformat(timestamp).astimezone(timezone.utc).date()
+
+
+class ResponseArchive:
+    """
+    Content-addressed archive of raw observation features, one directory per station and
+    one file per UTC day:
+
+        <root>/<station>/<year>/<YYYY-MM-DD>.jsonl.zst   features, one canonical JSON per line
+        <root>/<station>/<year>/<YYYY-MM-DD>.idx         16-byte BLAKE2b digest of every line
+        <root>/<station>/station.json                    station metadata, for replays without the API
+
+    Each write appends one compressed frame (zstd) or member (gzip) holding the features not
+    archived yet, so the overlap re-fetched by incremental runs is stored once. Appends hold
+    an exclusive lock on the index, several processes can archive the same station.
+    """
+
+    def __init__(self, root: str, compression: str = ARCHIVE_COMPRESSION, level: int = ARCHIVE_LEVEL):
+        if compression == "auto":
+            compression = "zstd" if zstandard is not None else "gzip"
+        if compression not in EXTENSIONS:
+            raise ValueError(f"Unknown archive compression '{compression}', expected one of {sorted(EXTENSIONS)}")
+        if compression == "zstd" and zstandard is None:
+            raise ValueError("zstd archive compression needs the zstandard package")
+        self.root = root
+        self.compression = compression
+        self.level = level
+        self._digests: "OrderedDict[str, Tuple[int, Set[bytes]]]" = OrderedDict()  # index path -> (bytes read, digests)
+        self._lock = threading.Lock()
+
+    def _partition(self, station_id: str, day: date) -> str:
+        return os.path.join(self.root, station_id, str(day.year), day.isoformat())
+
+    def _compress(self, data: bytes) -> bytes:
+        if self.compression == "zstd":
+            return zstandard.ZstdCompressor(level=self.level).compress(data)
+        return gzip.compress(data, compresslevel=min(self.level * 2, 9))
+
+    def _known_digests(self, index_path: str, index) -> Set[bytes]:
+        """Digests in the index file, reading only what other writers appended since the last call."""
+        with self._lock:
+            read, digests = self._digests.pop(index_path, (0, set()))
+        index.seek(0, io.SEEK_END)
+        size = index.tell()
+        if size > read:
+            index.seek(read)
+            tail = index.read(size - read)
+            digests.update(tail[i:i + DIGEST_SIZE] for i in range(0, len(tail) - DIGEST_SIZE + 1, DIGEST_SIZE))
+        with self._lock:
+            self._digests[index_path] = (size, digests)
+            while len(self._digests) > INDEX_CACHE_SIZE:
+                self._digests.popitem(last=False)
+        return digests
+
+    def store(self, station_id: str, features: Iterable[Dict]) -> int:
+        """
+        Archive raw observation features of a station, skipping those already archived.
+
+        Returns:
+            int: Number of new features written.
+        """
+        by_day: Dict[date, List[bytes]] = {}
+        for feature in features:
+            day = feature_day(feature)
+            if day is not None:
+                by_day.setdefault(day, []).append(canonical_json(feature))
+
+        written = 0
+        for day, lines in by_day.items():
+            path = self._partition(station_id, day)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path + ".idx", "a+b") as index:
+                fcntl.flock(index, fcntl.LOCK_EX)
+                known = self._known_digests(path + ".idx", index)
+                new, digests = [], {}
+                for line in lines:
+                    digest = hashlib.blake2b(line, digest_size=DIGEST_SIZE).digest()
+                    if digest not in known and digest not in digests:
+                        digests[digest] = None
+                        new.append(line)
+                if not new:
+                    continue
+                # Data before index: a crash in between re-archives these lines, never loses them
+                try:
+                    with open(path + EXTENSIONS[self.compression], "ab") as data:
+                        data.write(self._compress(b"\n".join(new) + b"\n"))
+                    index.write(b"".join(digests))
+                    index.flush()
+                except BaseException:
+                    # The cached set may not claim lines that are not on disk, re-read the index next time
+                    with self._lock:
+                        self._digests.pop(path + ".idx", None)
+                    raise
+                known.update(digests)
+                with self._lock:
+                    if path + ".idx" in self._digests:
+                        self._digests[path + ".idx"] = (index.tell(), known)
+                written += len(new)
+        return written
+
+    def store_station(self, station_id: str, metadata: Dict) -> None:
+        """Keep the station metadata next to its observations, replaced atomically."""
+        directory = os.path.join(self.root, station_id)
+        os.makedirs(directory, exist_ok=True)
+        temporary = os.path.join(directory, f".{STATION_FILE}.{os.getpid()}.{threading.get_ident()}")
+        with open(temporary, "wb") as f:
+            f.write(canonical_json(metadata))
+        os.replace(temporary, os.path.join(directory, STATION_FILE))
+
+    def station(self, station_id: str) -> Optional[Dict]:
+        try:
+            with open(os.path.join(self.root, station_id, STATION_FILE), "rb") as f:
+                return _loads(f.read())
+        except FileNotFoundError:
+            return None
+
+    def stations(self) -> List[str]:
+        """IDs of the archived stations."""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(entry.name for entry in os.scandir(self.root) if entry.is_dir())
+
+    def days(self, station_id: str, start: Optional[date] = None, end: Optional[date] = None) -> List[date]:
+        """Archived days of a station within [start, end], oldest first."""
+        days = set()
+        for year_dir, _, files in os.walk(os.path.join(self.root, station_id)):
+            for name in files:
+                for extension in EXTENSIONS.values():
+                    if name.endswith(extension):
+                        days.add(date.fromisoformat(name[:-len(extension)]))
+        return sorted(d for d in days if (start is None or d >= start) and (end is None or d <= end))
+
+    def _read_lines(self, path: str) -> Iterator[bytes]:
+        """Stream the lines of one archive file, decompressing frame by frame."""
+        with open(path, "rb", buffering=READ_BUFFER) as raw:
+            if path.endswith(EXTENSIONS["gzip"]):
+                yield from gzip.GzipFile(fileobj=raw)
+                return
+            if zstandard is None:
+                raise RuntimeError(f"{path} is zstd compressed, install the zstandard package to read it")
+            stream = zstandard.ZstdDecompressor().stream_reader(raw, read_size=READ_BUFFER, read_across_frames=True)
+            yield from io.BufferedReader(stream, buffer_size=READ_BUFFER)
+
+    def iter_features(self, station_id: str, start: Optional[datetime] = None, end: Optional[datetime] = None) -> Iterator[Dict]:
+        """
+        Archived observation features of a station within [start, end] (naive UTC or aware),
+        oldest day first. Only the first and last day are filtered by timestamp.
+        """
+        start = start.replace(tzinfo=timezone.utc) if start is not None and start.tzinfo is None else start
+        end = end.replace(tzinfo=timezone.utc) if end is not None and end.tzinfo is None else end
+        days = self.days(station_id, start.date() if start else None, end.date() if end else None)
+        for day in days:
+            boundary = (start is not None and day == start.date()) or (end is not None and day == end.date())
+            path = self._partition(station_id, day)
+            for extension in EXTENSIONS.values():
+                if not os.path.exists(path + extension):
+                    continue
+                for line in self._read_lines(path + extension):
+                    feature = _loads(line)
+                    if boundary:
+                        ts = datetime.fromisoformat(feature["properties"]["timestamp"])
+                        if (start is not None and ts < start) or (end is not None and ts > end):
+                            continue
+                    yield feature
+
+
+_archive: Optional[ResponseArchive] = None
+_archive_lock = threading.Lock()
+
+
+def get_archive(root: Optional[str] = None) -> Optional[ResponseArchive]:
+    """The process-wide archive at `root` (NWS_ARCHIVE_DIR by default), None when archiving is off."""
+    global _archive
+    root = root or ARCHIVE_DIR
+    if not root:
+        return None
+    with _archive_lock:
+        if _archive is None or _archive.root != root:
+            _archive = ResponseArchive(root)
+        return _archive
+
+
+def set_archive_dir(root: Optional[str]) -> None:
+    """Turn archiving on at `root` for this process, or off with None."""
+    global ARCHIVE_DIR, _archive
+    with _archive_lock:
+        ARCHIVE_DIR = root
+        _archive = None
+
+
+def archive_features(station_id: str, features: List[Dict]) -> None:
+    """Archive a fetched page when archiving is on, logging instead of failing the fetch."""
+    archive = get_archive()
+    if archive is None:
+        return
+    try:
+        archive.store(station_id, features)
+    except OSError as e:
+        logger.warning(f"Could not archive observations of {station_id}: {e}")
+
+
+def archive_station(station_id: str, metadata: Dict) -> None:
+    archive = get_archive()
+    if archive is None:
+        return
+    try:
+        archive.store_station(station_id, metadata)
+    except OSError as e:
+        logger.warning(f"Could not archive metadata of {station_id}: {e}")
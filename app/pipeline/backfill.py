@@ -0,0 +1,140 @@
+from datetime import datetime, timedelta
+from sqlalchemy.orm import Session
+
+from app.models.backfill_checkpoint import BackfillCheckpoint
+from app.pipeline.ingest_observations import ensure_station, store_observations, DEFAULT_LOADER, DEFAULT_PARSER
+from app.pipeline.nws_api_functions import iter_observation_bodies, iter_observation_pages, NWSRequestError
+from app.pipeline.partitions import ensure_partitions
+from app.pipeline.station_cache import StationRef
+from app.utils.cache import response_cache
+from app.utils.logging import get_logger
+from app.utils.metrics import STAGE_SECONDS
+
+logger = get_logger()
+
+DEFAULT_CHUNK = timedelta(days=1)
+MIN_CHUNK = timedelta(minutes=30)
+MAX_CHUNK = timedelta(days=7)
+PAGE_LIMIT = 500
+
+
+def get_checkpoint(db: Session, station: StationRef, start: datetime, end: datetime) -> BackfillCheckpoint:
+    """
+    Return the checkpoint of the backfill starting at `start` for this station, creating one
+    if it's a new backfill. A re-run with a later end extends the existing checkpoint.
+    """
+    checkpoint = db.query(BackfillCheckpoint).filter_by(station_id=station.id, range_start=start).first()
+    if checkpoint and end > checkpoint.range_end:
+        checkpoint.range_end = end
+        checkpoint.updated_at = datetime.utcnow()
+        db.commit()
+    if not checkpoint:
+        checkpoint = BackfillCheckpoint(
+            station_id=station.id,
+            range_start=start,
+            range_end=end,
+            completed_until=start,
+            updated_at=datetime.utcnow(),
+        )
+        db.add(checkpoint)
+        db.commit()
+    return checkpoint
+
+
+def run_backfill(
+    db: Session,
+    station_id: str,
+    start: datetime,
+    end: datetime = None,
+    chunk: timedelta = DEFAULT_CHUNK,
+    limit: int = PAGE_LIMIT,
+    loader: str = DEFAULT_LOADER,
+    parser: str = DEFAULT_PARSER,
+    process_loader=None
+) -> int:
+    """
+    Backfill a long historical range for a station in adaptive time chunks.
+
+    Chunks are fetched oldest to newest, following `pagination.next` links, and each page is
+    written to the database as it arrives. A chunk ending on a full page with no next link is
+    assumed to be truncated and is retried at half the size; sparse chunks let the size grow again. Progress
+    is checkpointed after every completed chunk, so re-running the same command after a crash
+    resumes from the last completed chunk.
+
+    Args:
+        db (Session): Active SQLAlchemy DB session.
+        station_id (str): NWS station identifier.
+        start (datetime): Start of the backfill range (UTC).
+        end (datetime): Optional end of the backfill range (UTC), defaults to now.
+        chunk (timedelta): Initial chunk size.
+        limit (int): Page size requested from the API.
+        loader (str): Load path, 'insert' or 'copy'.
+        parser (str): Feature parser, 'row' or 'columnar'.
+        process_loader (ProcessLoader): Optional worker pool that decodes, parses and loads each
+            page in another process, this thread only fetches.
+
+    Returns:
+        int: Number of inserted records.
+    """
+    end = end or datetime.utcnow()
+    station = ensure_station(db, station_id)
+    if not station:
+        return 0
+
+    checkpoint = get_checkpoint(db, station, start, end)
+    cursor = checkpoint.completed_until
+    if cursor >= end:
+        logger.info(f"Backfill for {station_id} from {start} to {end} already completed")
+        return 0
+    if cursor > start:
+        logger.info(f"Resuming backfill for {station_id} from {cursor}")
+    ensure_partitions(db, cursor, end)
+
+    size = chunk
+    inserted_total = 0
+    while cursor < end:
+        chunk_end = min(cursor + size, end)
+
+        fetched = 0
+        truncated = False
+        try:
+            if process_loader is not None:
+                pages = iter_observation_bodies(station_id, cursor, chunk_end, limit)
+            else:
+                pages = iter_observation_pages(station_id, cursor, chunk_end, limit)
+            for page, next_url in pages:
+                if process_loader is not None:
+                    received, inserted = process_loader.load(station, [page], loader, parser)
+                else:
+                    received = len(page)
+                    inserted = store_observations(db, station, page, loader=loader, parser=parser)
+                    with STAGE_SECONDS.time(stage="commit"):
+                        db.commit()
+                if inserted:
+                    response_cache.invalidate_station(station_id)
+                inserted_total += inserted
+                fetched += received
+                truncated = received >= limit and not next_url
+        except NWSRequestError as e:
+            logger.error(f"Backfill for {station_id} stopped at {cursor}, re-run to resume: {e}")
+            return inserted_total
+
+        # A full page without a next link means the API cut the chunk short, retry it in a smaller window
+        if truncated and size > MIN_CHUNK:
+            size = max(size / 2, MIN_CHUNK)
+            logger.info(f"Chunk {cursor} - {chunk_end} hit the {limit} row limit, shrinking chunk to {size}")
+            continue
+        if truncated:
+            logger.warning(f"Chunk {cursor} - {chunk_end} hit the row limit at minimum chunk size, some observations may be missing")
+
+        # Chunk completed, move the checkpoint forward
+        cursor = chunk_end
+        checkpoint.completed_until = cursor
+        checkpoint.updated_at = datetime.utcnow()
+        db.commit()
+
+        if fetched < limit // 4:
+            size = min(size * 2, MAX_CHUNK)
+
+    logger.info(f"Backfill for {station_id} from {start} to {end} completed, {inserted_total} observations inserted")
+    return inserted_total
@@ -0,0 +1,97 @@
+from itertools import chain
+from typing import Dict, Iterator, List
+import numpy as np
+
+# Database column -> NWS observation property, same mapping as parse_observation
+FIELDS = {
+    "temperature": "temperature",
+    "humidity": "relativeHumidity",
+    "wind_speed": "windSpeed",
+    "wind_direction": "windDirection",
+    "pressure": "barometricPressure",
+    "dewpoint": "dewpoint",
+    "visibility": "visibility",
+}
+
+_PROPERTIES = list(FIELDS.values())
+_EMPTY: Dict = {}
+
+# Value types numpy converts exactly like parse_observation does, anything else takes the scalar path
+_NUMERIC_TYPES = {float, int, bool, type(None)}
+
+# Values whose scaled fractional part is this close to .5 are re-rounded with Python's round
+_TIE_TOLERANCE = 1e-6
+
+
+def _numeric(value) -> float:
+    """Scalar fallback matching parse_observation: numbers pass through, anything else is null."""
+    if isinstance(value, (int, float)):
+        return value
+    return np.nan
+
+
+def _round_2(values: np.ndarray) -> np.ndarray:
+    """
+    Round to 2 decimals exactly like Python's `round(x, 2)`.
+
+    np.round works on the binary value scaled by 100, so it can disagree with Python's
+    correctly-rounded decimal result only for values sitting on a .5 boundary. Those
+    few candidates are recomputed with the builtin.
+    """
+    rounded = np.round(values, 2)
+    scaled = values * 100
+    ties = np.abs(scaled - np.floor(scaled) - 0.5) < _TIE_TOLERANCE
+    for i in np.flatnonzero(ties):
+        rounded[i] = round(float(values[i]), 2)
+    return rounded
+
+
+def parse_observations_columnar(features: List[Dict]) -> Dict[str, np.ndarray]:
+    """
+    Parse a batch of raw NWS observation features into columns in a single pass.
+
+    Produces the same values as `parse_observation` row by row, with nulls as NaN in the
+    float columns. Features without a timestamp are dropped.
+
+    Args:
+        features (list): GeoJSON Feature objects from the /observations endpoint.
+
+    Returns:
+        Dict[str, np.ndarray]: 'timestamp' (object array of ISO strings) and one float64 array
+        per measured field, keyed by database column name.
+    """
+    properties = [f.get("properties", {}) for f in features]
+    timestamps = np.array([p.get("timestamp") for p in properties], dtype=object)
+    keep = np.array([bool(ts) for ts in timestamps], dtype=bool)
+
+    # One pass over the nested dicts, null handling and rounding happen on whole columns
+    raw = [[p.get(prop, _EMPTY).get("value") for prop in _PROPERTIES] for p in properties]
+    if set(map(type, chain.from_iterable(raw))) <= _NUMERIC_TYPES:
+        matrix = np.array(raw, dtype=np.float64).reshape(len(raw), len(FIELDS))
+    else:
+        matrix = np.array([[_numeric(v) for v in row] for row in raw], dtype=np.float64).reshape(len(raw), len(FIELDS))
+
+    matrix = matrix[keep]
+    columns = {"timestamp": timestamps[keep]}
+    for i, column in enumerate(FIELDS):
+        columns[column] = _round_2(np.ascontiguousarray(matrix[:, i]))
+    return columns
+
+
+def column_count(columns: Dict[str, np.ndarray]) -> int:
+    """Number of rows in a columnar batch."""
+    return len(columns["timestamp"])
+
+
+def iter_column_rows(columns: Dict[str, np.ndarray], station_id: int) -> Iterator[Dict]:
+    """
+    Yield row dicts equivalent to `parse_observation` output, with the station id set.
+    """
+    lists = {name: values.tolist() for name, values in columns.items()}
+    for i in range(column_count(columns)):
+        row = {"timestamp": lists["timestamp"][i]}
+        for column in FIELDS:
+            value = lists[column][i]
+            row[column] = None if value != value else value  # NaN -> None
+        row["station_id"] = station_id
+        yield row
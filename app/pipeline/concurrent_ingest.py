@@ -0,0 +1,132 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+import asyncio
+import time
+
+from app.db.session import SessionLocal
+from app.pipeline import http_client
+from app.pipeline.ingest_observations import run_pipeline
+from app.pipeline.station_cache import station_cache
+from app.utils.logging import get_logger
+from app.utils.metrics import STATION_RUN_SECONDS, STATION_RUNS
+
+logger = get_logger()
+
+
+@dataclass
+class StationResult:
+    """Outcome of running the pipeline for a single station."""
+    station_id: str
+    inserted: int
+    seconds: float
+    error: Optional[str] = None
+    cadence: Optional[float] = None  # observed reporting interval in seconds, set by the scheduler
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.inserted / self.seconds if self.seconds > 0 else 0.0
+
+
+def run_station(station_id: str, pipeline: Callable[..., int], pipeline_options: Dict) -> StationResult:
+    """
+    Run the pipeline for one station with its own DB session (executed in a worker thread).
+    """
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        inserted = pipeline(db, station_id=station_id, **pipeline_options)
+        STATION_RUNS.inc(outcome="ok")
+        return StationResult(station_id, inserted or 0, time.perf_counter() - started)
+    except Exception as e:
+        db.rollback()
+        STATION_RUNS.inc(outcome="error")
+        logger.error(f"Pipeline failed for station {station_id}: {e}")
+        return StationResult(station_id, 0, time.perf_counter() - started, error=str(e))
+    finally:
+        STATION_RUN_SECONDS.observe(time.perf_counter() - started)
+        db.close()
+
+
+def prepare_stations(db, station_ids: List[str], concurrency: int) -> None:
+    """
+    Load every known station into the station cache with one query, then validate and
+    bulk-insert the new ones, so workers never look stations up one by one.
+    """
+    loaded = station_cache.warm(db)
+    resolved = station_cache.resolve(db, station_ids, concurrency=concurrency)
+    invalid = sum(1 for station in resolved.values() if station is None)
+    logger.info(f"Station cache warmed with {loaded} stations, {invalid} of {len(station_ids)} requested IDs are invalid")
+
+
+async def run_stations(
+    station_ids: List[str],
+    concurrency: int = 8,
+    rate_per_host: Optional[float] = None,
+    pipeline_options: Optional[Dict] = None,
+    pipeline: Callable[..., int] = run_pipeline
+) -> List[StationResult]:
+    """
+    Ingest many stations concurrently. HTTP fetches share one pooled keep-alive session
+    and per-host rate limiter, DB writes run in parallel on separate sessions.
+
+    Args:
+        station_ids (list): NWS station identifiers.
+        concurrency (int): Max number of stations processed at the same time.
+        rate_per_host (float): Optional requests per second allowed per API host.
+        pipeline_options (dict): Extra keyword arguments passed to the pipeline.
+        pipeline (callable): Per-station pipeline, `run_pipeline` or `run_backfill`.
+
+    Returns:
+        List[StationResult]: One result per station, in input order.
+    """
+    if rate_per_host is not None:
+        http_client.set_rate_limit(rate_per_host)
+
+    pipeline_options = pipeline_options or {}
+    loop = asyncio.get_running_loop()
+
+    # Warm the station cache and register new stations in bulk before fanning out
+    db = SessionLocal()
+    try:
+        await loop.run_in_executor(None, prepare_stations, db, station_ids, concurrency)
+    finally:
+        db.close()
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="ingest") as executor:
+
+        async def worker(station_id: str) -> StationResult:
+            async with semaphore:
+                result = await loop.run_in_executor(executor, run_station, station_id, pipeline, pipeline_options)
+            logger.info(
+                f"Station {result.station_id}: {result.inserted} rows in {result.seconds:.2f}s "
+                f"({result.rows_per_second:.1f} rows/s)"
+            )
+            return result
+
+        return await asyncio.gather(*(worker(s) for s in station_ids))
+
+
+def ingest_stations(
+    station_ids: List[str],
+    concurrency: int = 8,
+    rate_per_host: Optional[float] = None,
+    pipeline_options: Optional[Dict] = None,
+    pipeline: Callable[..., int] = run_pipeline
+) -> List[StationResult]:
+    """
+    Blocking entry point for `run_stations`, logs a throughput summary when done.
+    """
+    started = time.perf_counter()
+    results = asyncio.run(run_stations(station_ids, concurrency, rate_per_host, pipeline_options, pipeline))
+    elapsed = max(time.perf_counter() - started, 1e-9)
+
+    failed = sum(1 for r in results if r.error)
+    inserted = sum(r.inserted for r in results)
+    logger.info(
+        f"Processed {len(results)} stations ({failed} failed) in {elapsed:.2f}s with concurrency {concurrency}: "
+        f"{len(results) / elapsed:.2f} stations/s, {inserted / elapsed:.1f} rows/s, {inserted} rows inserted"
+    )
+    return results
@@ -0,0 +1,157 @@
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Sequence
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.elements import TextClause
+import csv
+import io
+import os
+
+from app.models.observation_rollup import ROLLUP_FIELDS
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional, CSV export works without it
+    pa = pq = None
+
+# Rows fetched from the server-side cursor and written per chunk (one Parquet row group / Arrow batch)
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "50000"))
+
+# Exportable columns, in output order
+EXPORT_COLUMNS = ["station_id", "timestamp"] + ROLLUP_FIELDS
+
+FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+
+def check_columns(columns: Optional[Sequence[str]]) -> List[str]:
+    """Projected columns in output order, all by default. Raises ValueError for unknown columns."""
+    if not columns:
+        return list(EXPORT_COLUMNS)
+    unknown = [c for c in columns if c not in EXPORT_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown columns {', '.join(unknown)}, expected any of: {', '.join(EXPORT_COLUMNS)}")
+    return [c for c in EXPORT_COLUMNS if c in columns]
+
+
+def check_format(name: str) -> str:
+    """Raises ValueError for unknown formats, or Arrow formats without pyarrow installed."""
+    if name not in FORMATS:
+        raise ValueError(f"Unknown format '{name}', expected one of: {', '.join(FORMATS)}")
+    if name != "csv" and pa is None:
+        raise ValueError(f"Format '{name}' needs pyarrow, which is not installed")
+    return name
+
+
+def export_query(columns: List[str], start: datetime, end: datetime, nws_ids: Optional[Sequence[str]] = None) -> TextClause:
+    """
+    Observations of the given stations (all by default) over [start, end), in
+    unique_station_timestamp order (station_id, timestamp).
+
+    Each station is read laterally off that index, so rows stream out as soon as the
+    cursor opens instead of after a sort of the whole range. The outer ORDER BY names both
+    columns, since the inner order is not guaranteed to survive the join, and is satisfied
+    by an incremental sort over the already ordered input.
+    """
+    observed = ", ".join(f"o.{c}" for c in columns if c not in ("station_id", "timestamp"))
+    selected = ", ".join("s.nws_id AS station_id" if c == "station_id" else f"o.{c}" for c in columns)
+    requested = "" if nws_ids is None else "WHERE s.nws_id = ANY(:nws_ids)"
+    stmt = text(f"""
+        SELECT {selected}
+        FROM stations s
+        CROSS JOIN LATERAL (
+            SELECT o.timestamp{", " + observed if observed else ""}
+            FROM weather_observations o
+            WHERE o.station_id = s.id AND o.timestamp >= :start AND o.timestamp < :end
+            ORDER BY o.timestamp
+        ) AS o
+        {requested}
+        ORDER BY s.id, o.timestamp
+    """)
+    params = {"start": start, "end": end}
+    if nws_ids is not None:
+        params["nws_ids"] = list(nws_ids)
+    return stmt.bindparams(**params)
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file collecting bytes until drained, lets pyarrow writers emit chunks."""
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data, self._parts = b"".join(self._parts), []
+        return data
+
+
+def arrow_schema(columns: List[str]):
+    types = {"station_id": pa.string(), "timestamp": pa.timestamp("us")}
+    return pa.schema([(c, types.get(c, pa.float64())) for c in columns])
+
+
+def record_batch(schema, rows: List[tuple]):
+    columns = list(zip(*rows))
+    return pa.record_batch([pa.array(values, type=f.type) for values, f in zip(columns, schema)], schema=schema)
+
+
+async def stream_export(
+    db: AsyncSession,
+    stmt: TextClause,
+    columns: List[str],
+    output: str,
+    chunk_rows: int = EXPORT_CHUNK_ROWS
+) -> AsyncIterator[bytes]:
+    """
+    Run `stmt` on a server-side cursor and yield the result encoded as CSV, Arrow IPC
+    stream or Parquet, one chunk of `chunk_rows` rows at a time. Memory stays bounded by
+    one chunk whatever the size of the range.
+    """
+    result = await db.stream(stmt)
+
+    if output == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        async for rows in result.partitions(chunk_rows):
+            writer.writerows(rows)
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode()  # header only, nothing matched
+        return
+
+    sink = _ChunkSink()
+    schema = arrow_schema(columns)
+    writer = pa.ipc.new_stream(sink, schema) if output == "arrow" else pq.ParquetWriter(sink, schema)
+    async for rows in result.partitions(chunk_rows):
+        batch = record_batch(schema, rows)
+        if output == "arrow":
+            writer.write_batch(batch)
+        else:
+            writer.write_table(pa.Table.from_batches([batch]))  # one row group per chunk
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+def export_filename(nws_ids: Optional[Sequence[str]], start: datetime, end: datetime, output: str) -> str:
+    stations = "all" if nws_ids is None else "_".join(nws_ids[:3]) + ("_more" if len(nws_ids) > 3 else "")
+    return f"observations_{stations}_{start:%Y%m%dT%H%M}_{end:%Y%m%dT%H%M}.{FORMATS[output][1]}"
@@ -0,0 +1,298 @@
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlparse
+import os
+import random
+import threading
+import time
+
+import requests
+
+from app.utils.logging import get_logger
+from app.utils.metrics import NWS_CIRCUIT_OPENS, NWS_RETRIES, NWS_THROTTLED, registry
+
+logger = get_logger()
+
+# Token bucket per API host: sustained requests per second and burst size
+DEFAULT_RATE_PER_HOST = float(os.getenv("NWS_RATE_PER_HOST", "5"))
+DEFAULT_BURST = int(os.getenv("NWS_RATE_BURST", "5"))
+# Retries of 429 / 5xx / connection errors, with exponential backoff and full jitter
+MAX_RETRIES = int(os.getenv("NWS_MAX_RETRIES", "4"))
+BACKOFF_BASE = float(os.getenv("NWS_BACKOFF_BASE_SECONDS", "0.5"))
+BACKOFF_CAP = float(os.getenv("NWS_BACKOFF_CAP_SECONDS", "30"))
+# Consecutive failures opening an endpoint's circuit, and how long it stays open before a probe
+BREAKER_THRESHOLD = int(os.getenv("NWS_BREAKER_THRESHOLD", "5"))
+BREAKER_COOLDOWN = float(os.getenv("NWS_BREAKER_COOLDOWN_SECONDS", "30"))
+# In-flight requests per host, adjusted between 1 and this bound by AIMD
+MAX_CONCURRENCY = int(os.getenv("NWS_MAX_CONCURRENCY", os.getenv("NWS_POOL_MAXSIZE", "32")))
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Only server-side failures count against the circuit, a 429 means we are too fast, not that it is down
+FAILURE_STATUSES = {500, 502, 503, 504}
+
+
+class CircuitOpenError(requests.RequestException):
+    """Raised instead of sending a request to an endpoint whose circuit is open."""
+
+
+def endpoint_of(url: str) -> str:
+    """
+    Group URLs by endpoint for the circuit breakers, eg. every
+    `/stations/{id}/observations` URL of a host shares one circuit.
+    """
+    parsed = urlparse(url)
+    parts = [p for p in parsed.path.split("/") if p]
+    for i in range(1, len(parts)):
+        if parts[i - 1] == "stations":
+            parts[i] = "{id}"
+    return f"{parsed.netloc}/{'/'.join(parts)}"
+
+
+def retry_after_seconds(response: requests.Response) -> Optional[float]:
+    """The Retry-After header in seconds, given as a delay or an HTTP date, None when absent."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    if value.strip().isdigit():
+        return float(value)
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """
+    Seconds to wait before retry number `attempt` (0-based): full jitter over an exponentially
+    growing window, never less than what the server asked for with Retry-After.
+    """
+    delay = random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+    return max(delay, retry_after or 0.0)
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: `rate` requests per second sustained, up to `burst` at once.
+    A rate of 0 disables limiting. `pause` stops handing out tokens for a while, used when
+    the server sends Retry-After so every thread backs off, not just the throttled one.
+    """
+
+    def __init__(self, rate: float = DEFAULT_RATE_PER_HOST, burst: int = DEFAULT_BURST):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def acquire(self) -> None:
+        """Block until a token is available and take it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                elif self.rate <= 0:
+                    return
+                else:
+                    self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                    self._updated = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class AdaptiveConcurrency:
+    """
+    Bound on in-flight requests adjusted by AIMD: the limit grows by 1/limit per successful
+    response (about +1 per round of requests) and halves on a 429, at most once per
+    `decrease_interval` so a burst of 429s from one window only counts once.
+    """
+
+    def __init__(self, maximum: int = MAX_CONCURRENCY, minimum: int = 1, decrease_interval: float = 1.0):
+        self.maximum = max(maximum, minimum)
+        self.minimum = minimum
+        self.limit = float(self.maximum)
+        self.decrease_interval = decrease_interval
+        self.in_flight = 0
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+
+    def acquire(self) -> None:
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+
+    def release(self, throttled: bool) -> None:
+        with self._condition:
+            self.in_flight -= 1
+            if throttled:
+                now = time.monotonic()
+                if now - self._last_decrease >= self.decrease_interval:
+                    self._last_decrease = now
+                    self.limit = max(self.minimum, self.limit / 2)
+                    logger.warning(f"NWS API throttled, in-flight request limit lowered to {int(self.limit)}")
+            else:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._condition.notify_all()
+
+
+class CircuitBreaker:
+    """
+    Per-endpoint circuit: opens after `threshold` consecutive failures and rejects requests
+    for `cooldown` seconds, then lets a single probe through (half-open). A successful probe
+    closes it again, a failed one re-opens it.
+    """
+    CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+
+    def __init__(self, endpoint: str, threshold: int = BREAKER_THRESHOLD, cooldown: float = BREAKER_COOLDOWN):
+        self.endpoint = endpoint
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> None:
+        """Raise CircuitOpenError unless a request may be sent now."""
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.cooldown:
+                self.state = self.HALF_OPEN
+            if self.state == self.CLOSED:
+                return
+            if self.state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return
+        raise CircuitOpenError(f"Circuit open for {self.endpoint}, not sending the request")
+
+    def record(self, failed: bool) -> None:
+        with self._lock:
+            self._probing = False
+            if not failed:
+                self.failures = 0
+                if self.state != self.CLOSED:
+                    logger.info(f"Circuit for {self.endpoint} closed")
+                self.state = self.CLOSED
+                return
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.threshold:
+                if self.state != self.OPEN:
+                    NWS_CIRCUIT_OPENS.inc(endpoint=self.endpoint)
+                    logger.warning(f"Circuit for {self.endpoint} opened after {self.failures} consecutive failures")
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+@dataclass
+class HostLimits:
+    bucket: TokenBucket
+    concurrency: AdaptiveConcurrency
+
+
+class RequestGovernor:
+    """
+    Decides when each NWS request may be sent and whether a failed one is retried: a token
+    bucket and an AIMD in-flight limit per host, a circuit breaker per endpoint, and
+    exponential backoff with jitter honouring Retry-After.
+    """
+
+    def __init__(self, rate: float = DEFAULT_RATE_PER_HOST, burst: int = DEFAULT_BURST, max_retries: int = MAX_RETRIES):
+        self.rate = rate
+        self.burst = burst
+        self.max_retries = max_retries
+        self._hosts: Dict[str, HostLimits] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def set_rate(self, rate: float) -> None:
+        with self._lock:
+            self.rate = rate
+            for limits in self._hosts.values():
+                limits.bucket.rate = rate
+
+    def host(self, netloc: str) -> HostLimits:
+        with self._lock:
+            limits = self._hosts.get(netloc)
+            if limits is None:
+                limits = self._hosts[netloc] = HostLimits(TokenBucket(self.rate, self.burst), AdaptiveConcurrency())
+            return limits
+
+    def breaker(self, endpoint: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(endpoint)
+            if breaker is None:
+                breaker = self._breakers[endpoint] = CircuitBreaker(endpoint)
+            return breaker
+
+    def send(self, url: str, send) -> requests.Response:
+        """
+        Call `send()` under the limits of `url`'s host and endpoint, retrying 429s, 5xx and
+        connection errors. Returns the last response, or raises the last connection error
+        or CircuitOpenError.
+        """
+        limits = self.host(urlparse(url).netloc)
+        breaker = self.breaker(endpoint_of(url))
+        attempt = 0
+        while True:
+            breaker.allow()
+            limits.bucket.acquire()
+            limits.concurrency.acquire()
+            response, error = None, None
+            try:
+                response = send()
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+            except BaseException:
+                # Not retried, but the breaker must still hear of it or a half-open probe never ends
+                breaker.record(failed=True)
+                raise
+            finally:
+                limits.concurrency.release(throttled=response is not None and response.status_code == 429)
+
+            status = response.status_code if response is not None else None
+            breaker.record(failed=error is not None or status in FAILURE_STATUSES)
+            if error is None and status not in RETRY_STATUSES:
+                return response
+
+            retry_after = retry_after_seconds(response) if response is not None else None
+            if status == 429:
+                NWS_THROTTLED.inc()
+                if retry_after:
+                    limits.bucket.pause(retry_after)
+            if attempt >= self.max_retries:
+                if error is not None:
+                    raise error
+                return response
+
+            reason = str(status) if error is None else "connection"
+            delay = backoff_delay(attempt, retry_after)
+            NWS_RETRIES.inc(reason=reason)
+            logger.warning(f"Retrying {url} in {delay:.2f}s after {reason} (attempt {attempt + 1} of {self.max_retries})")
+            time.sleep(delay)
+            attempt += 1
+
+    def concurrency_limits(self) -> Dict[tuple, float]:
+        with self._lock:
+            return {(host,): int(limits.concurrency.limit) for host, limits in self._hosts.items()}
+
+    def breaker_states(self) -> Dict[tuple, float]:
+        states = {CircuitBreaker.CLOSED: 0, CircuitBreaker.HALF_OPEN: 1, CircuitBreaker.OPEN: 2}
+        with self._lock:
+            return {(endpoint,): states[b.state] for endpoint, b in self._breakers.items()}
+
+
+# Shared by every request to the NWS API
+governor = RequestGovernor()
+
+registry.gauge("nws_concurrency_limit", "AIMD limit of in-flight NWS API requests per host.", ["host"], fn=governor.concurrency_limits)
+registry.gauge("nws_circuit_state", "Circuit breaker state per NWS endpoint (0 closed, 1 half-open, 2 open).", ["endpoint"], fn=governor.breaker_states)
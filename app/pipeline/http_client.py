@@ -0,0 +1,212 @@
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Dict, Optional
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+import threading
+import os
+import requests
+
+from app.pipeline.governor import governor
+from app.utils.logging import get_logger
+from app.utils.metrics import HTTP_BYTES, HTTP_RESPONSES, STAGE_SECONDS
+
+logger = get_logger()
+
+# Connection pool sizing, shared by every thread that talks to the NWS API
+POOL_MAXSIZE = int(os.getenv("NWS_POOL_MAXSIZE", "32"))
+
+# Number of URLs whose validators (ETag / Last-Modified) and bodies are remembered, and their total body size
+CONDITIONAL_CACHE_SIZE = int(os.getenv("NWS_CONDITIONAL_CACHE_SIZE", "4096"))
+CONDITIONAL_CACHE_BYTES = int(os.getenv("NWS_CONDITIONAL_CACHE_BYTES", str(64 * 1024 * 1024)))
+
+
+@dataclass
+class ClientStats:
+    """Counters describing the traffic sent through the shared client."""
+    requests: int = 0
+    not_modified: int = 0
+    bytes_received: int = 0  # bytes on the wire (compressed when gzip is used)
+    bytes_decoded: int = 0  # bytes after decompression
+    handshakes: int = 0  # new TCP (+TLS) connections opened
+    retries: int = 0  # requests sent again after a 429, 5xx or connection error
+    throttled: int = 0  # 429 responses
+
+    @property
+    def not_modified_ratio(self) -> float:
+        return self.not_modified / self.requests if self.requests else 0.0
+
+
+_stats = ClientStats()
+_stats_lock = threading.Lock()
+
+
+def _count(**increments: int) -> None:
+    with _stats_lock:
+        for name, value in increments.items():
+            setattr(_stats, name, getattr(_stats, name) + value)
+
+
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    def _new_conn(self):
+        _count(handshakes=1)
+        return super()._new_conn()
+
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    def _new_conn(self):
+        _count(handshakes=1)
+        return super()._new_conn()
+
+
+class CountingHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose connection pools count every new connection they open."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _CountingHTTPConnectionPool,
+            "https": _CountingHTTPSConnectionPool,
+        }
+
+
+class ConditionalCache:
+    """
+    Bounded LRU of the last successful response per URL, used to send
+    `If-None-Match` / `If-Modified-Since` and to replay the body on a 304.
+    """
+
+    def __init__(self, max_entries: int = CONDITIONAL_CACHE_SIZE, max_bytes: int = CONDITIONAL_CACHE_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, requests.Response]" = OrderedDict()
+        self._size = 0
+
+    def validators(self, key: str) -> Dict[str, str]:
+        """Conditional request headers for `key`, empty if nothing is cached."""
+        with self._lock:
+            cached = self._entries.get(key)
+        if cached is None:
+            return {}
+        headers = {}
+        if cached.headers.get("ETag"):
+            headers["If-None-Match"] = cached.headers["ETag"]
+        if cached.headers.get("Last-Modified"):
+            headers["If-Modified-Since"] = cached.headers["Last-Modified"]
+        return headers
+
+    def get(self, key: str) -> Optional[requests.Response]:
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+            return cached
+
+    def store(self, key: str, response: requests.Response) -> None:
+        """Remember `response` if it carries a validator."""
+        if not (response.headers.get("ETag") or response.headers.get("Last-Modified")):
+            return
+        if len(response.content) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous.content)
+            self._entries[key] = response
+            self._size += len(response.content)
+            while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted.content)
+
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+conditional_cache = ConditionalCache()
+
+
+def get_session() -> requests.Session:
+    """
+    Return the process-wide keep-alive session, creating it on first use.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = CountingHTTPAdapter(pool_connections=4, pool_maxsize=POOL_MAXSIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers["Accept-Encoding"] = "gzip, deflate"
+            _session = session
+    return _session
+
+
+def set_rate_limit(rate: float) -> None:
+    """Change the per-host request rate (requests per second, 0 disables limiting)."""
+    governor.set_rate(rate)
+
+
+def _wire_size(response: requests.Response) -> int:
+    """Bytes received for the body, falling back to the decoded size when unknown."""
+    length = response.headers.get("Content-Length")
+    return int(length) if length and length.isdigit() else len(response.content)
+
+
+def get(url: str, headers: Dict[str, str], params: Optional[Dict] = None) -> requests.Response:
+    """
+    Perform a conditional GET request through the shared connection pool, under the
+    request governor: rate limited, retried with backoff on 429 / 5xx / connection errors
+    and rejected with CircuitOpenError while the endpoint's circuit is open.
+
+    When the server answers 304 Not Modified, the previously stored response for the
+    same URL is returned so callers can always treat the result as a full response.
+    """
+    request = requests.Request("GET", url, params=params).prepare()
+    key = request.url
+    request_headers = {**headers, **conditional_cache.validators(key)}
+    attempts = 0
+
+    def send() -> requests.Response:
+        nonlocal attempts
+        if attempts:
+            _count(retries=1)
+        attempts += 1
+        with STAGE_SECONDS.time(stage="fetch"):
+            response = get_session().get(url, headers=request_headers, params=params)
+        HTTP_RESPONSES.inc(status=str(response.status_code))
+        if response.status_code == 429:
+            _count(throttled=1)
+        return response
+
+    response = governor.send(key, send)
+
+    if response.status_code == 304:
+        cached = conditional_cache.get(key)
+        _count(requests=1, not_modified=1)
+        if cached is not None:
+            return cached
+        return response
+
+    _count(requests=1, bytes_received=_wire_size(response), bytes_decoded=len(response.content))
+    HTTP_BYTES.inc(_wire_size(response))
+    if response.status_code == 200:
+        conditional_cache.store(key, response)
+    return response
+
+
+def get_stats() -> Dict[str, float]:
+    """Snapshot of the client counters, including the 304 hit ratio."""
+    with _stats_lock:
+        snapshot = asdict(_stats)
+        snapshot["not_modified_ratio"] = round(_stats.not_modified_ratio, 4)
+    return snapshot
+
+
+def log_stats() -> None:
+    """Log a one-line summary of the client counters."""
+    stats = get_stats()
+    logger.info(
+        f"HTTP client: {stats['requests']} requests, {stats['handshakes']} handshakes, "
+        f"{stats['bytes_received']} bytes received ({stats['bytes_decoded']} decoded), "
+        f"304 ratio {stats['not_modified_ratio']:.1%}, {stats['retries']} retries, {stats['throttled']} throttled"
+    )
@@ -1,79 +1,310 @@
 from datetime import datetime, timedelta
+from itertools import islice
+from typing import Dict, Iterable, List, Optional, Tuple
 from sqlalchemy.orm import Session
-from ..models.station import Station
+from sqlalchemy import func
 from ..models.weather_observation import WeatherObservation
-from ..pipeline.nws_api_functions import validate_station, fetch_observations, parse_observation
-from sqlalchemy.dialects.postgresql import insert
+from ..pipeline.nws_api_functions import iter_observation_bodies, iter_observation_pages, parse_observation, NWSRequestError
+from ..pipeline.station_cache import StationRef, station_cache
+from ..pipeline.loaders import get_loader, load_columns
+from ..pipeline.columnar import column_count, parse_observations_columnar
+from ..pipeline.rollups import update_rollups
+from ..pipeline.partitions import ensure_partitions
+from ..pipeline.prefilter import StoredRowFilter, prefilter_enabled, timestamp_key
+from app.utils.cache import response_cache
 from app.utils.logging import get_logger
+from app.utils.metrics import ROWS_INSERTED, ROWS_LOADED, ROWS_RECEIVED, STAGE_SECONDS
+import time
+import os
 
 logger = get_logger()
 
-def run_pipeline(db: Session, station_id: str, start: datetime = None, end: datetime = None) -> int:
+DEFAULT_WINDOW = timedelta(days=7)
+# Re-fetch this much before the latest stored observation, to pick up late-arriving records
+DEFAULT_OVERLAP = timedelta(minutes=int(os.getenv("PIPELINE_OVERLAP_MINUTES", "60")))
+# Rows per INSERT (8 bind parameters each, keep well under the 65535 Postgres limit) and max batch age
+BATCH_SIZE = int(os.getenv("PIPELINE_BATCH_SIZE", "1000"))
+FLUSH_INTERVAL = float(os.getenv("PIPELINE_FLUSH_SECONDS", "5"))
+# Load path for parsed rows, 'insert' (multi-row INSERT) or 'copy' (COPY into a staging table, then merge)
+DEFAULT_LOADER = os.getenv("PIPELINE_LOADER", "insert")
+# Parser for raw features, 'row' (parse_observation per feature) or 'columnar' (NumPy arrays per batch)
+DEFAULT_PARSER = os.getenv("PIPELINE_PARSER", "row")
+
+
+def get_watermark(db: Session, station: StationRef) -> Optional[datetime]:
+    """
+    Return the timestamp of the latest stored observation for a station, or None if it has none.
+    """
+    return db.query(func.max(WeatherObservation.timestamp))\
+        .filter(WeatherObservation.station_id == station.id)\
+        .scalar()
+
+
+def resolve_start(
+    db: Session,
+    station: StationRef,
+    end: datetime,
+    overlap: timedelta = DEFAULT_OVERLAP,
+    incremental: bool = True
+) -> datetime:
+    """
+    Decide where to start fetching when no explicit start is given. Incremental runs start
+    at the station watermark minus `overlap`, bounded by the default 7-day window, new
+    stations (or non-incremental runs) get the full window.
+    """
+    window_start = end - DEFAULT_WINDOW
+    if not incremental:
+        return window_start
+
+    watermark = get_watermark(db, station)
+    if watermark is None:
+        return window_start
+    return min(max(watermark - overlap, window_start), end)
+
+
+def ensure_station(db: Session, station_id: str) -> Optional[StationRef]:
+    """
+    Return the station with the given NWS id from the station cache, creating it from the
+    API metadata if needed.
+
+    Returns:
+        Optional[StationRef]: The stored station, or None if the NWS API does not know it.
+    """
+    return station_cache.get_or_create(db, station_id)
+
+
+def time_span(timestamps: Iterable) -> Tuple[datetime, datetime]:
+    """Earliest and latest of the API timestamps of a batch, as stored."""
+    keys = [key for key in map(timestamp_key, timestamps) if key is not None]
+    return (min(keys), max(keys)) if keys else (datetime.min, datetime.max)
+
+
+class BatchWriter:
+    """
+    Collects parsed rows of one station and loads them in fixed-size batches, flushing when the batch
+    is full or its oldest row has waited longer than `flush_interval` seconds. Keeps memory
+    and statement size constant regardless of how many rows flow through it. Inserted rows
+    are added to the hourly and daily rollups in the same transaction. With a `row_filter`
+    rows that are already stored are dropped before each load.
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        batch_size: int = BATCH_SIZE,
+        flush_interval: float = FLUSH_INTERVAL,
+        loader: str = DEFAULT_LOADER,
+        row_filter: Optional[StoredRowFilter] = None
+    ):
+        self.db = db
+        self.row_filter = row_filter
+        self.load = get_loader(loader)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.inserted = 0
+        self.written = 0
+        self._rows: List[Dict] = []
+        self._first_row_at = 0.0
+
+    def add(self, row: Dict) -> None:
+        if not self._rows:
+            self._first_row_at = time.monotonic()
+        self._rows.append(row)
+        if len(self._rows) >= self.batch_size or time.monotonic() - self._first_row_at >= self.flush_interval:
+            self.flush()
+
+    def flush(self) -> int:
+        """Insert the pending rows, returning how many were new."""
+        if not self._rows:
+            return 0
+        rows = self.row_filter.rows(self._rows) if self.row_filter else self._rows
+        inserted = 0
+        if rows:
+            with STAGE_SECONDS.time(stage="insert"):
+                inserted_ids = self.load(self.db, rows)
+                if inserted_ids:
+                    update_rollups(self.db, inserted_ids, rows[0]["station_id"], *time_span(row["timestamp"] for row in rows))
+            ROWS_LOADED.inc(len(rows))
+            inserted = len(inserted_ids)
+        self.inserted += inserted
+        self.written += len(rows)
+        self._rows = []
+        return inserted
+
+
+def store_observations(
+    db: Session,
+    station: StationRef,
+    raw_obs: Iterable[Dict],
+    batch_size: int = BATCH_SIZE,
+    flush_interval: float = FLUSH_INTERVAL,
+    loader: str = DEFAULT_LOADER,
+    parser: str = DEFAULT_PARSER,
+    prefilter: Optional[bool] = None
+) -> int:
+    """
+    Parse raw observation features as they are produced and insert the new ones in
+    batches, skipping duplicates. The caller is responsible for committing.
+
+    Args:
+        db (Session): Active SQLAlchemy DB session.
+        station (StationRef): Station the observations belong to.
+        raw_obs (iterable): GeoJSON Feature objects from the /observations endpoint, may be a generator.
+        batch_size (int): Max rows per INSERT statement.
+        flush_interval (float): Max seconds a parsed row waits before its batch is flushed.
+        loader (str): Load path, 'insert' or 'copy'.
+        parser (str): 'row' parses feature by feature, 'columnar' parses whole batches into arrays.
+        prefilter (bool): Drop already stored rows with one query per batch before loading them,
+            instead of leaving them to ON CONFLICT. Defaults to PIPELINE_PREFILTER / --no-prefilter.
+
+    Returns:
+        int: Number of inserted records.
+    """
+    if prefilter is None:
+        prefilter = prefilter_enabled()
+    row_filter = StoredRowFilter(db, station.id) if prefilter else None
+    if parser == "columnar":
+        received, inserted = _store_columnar(db, station, raw_obs, batch_size, loader, row_filter)
+    else:
+        writer = BatchWriter(db, batch_size=batch_size, flush_interval=flush_interval, loader=loader, row_filter=row_filter)
+        received = 0
+        parse_seconds = 0.0  # summed per feature, observed once per batch like the columnar parser
+        for obs in raw_obs:
+            received += 1
+            started = time.perf_counter()
+            parsed = parse_observation(obs)
+            parse_seconds += time.perf_counter() - started
+            if received % batch_size == 0:
+                STAGE_SECONDS.observe(parse_seconds, stage="parse")
+                parse_seconds = 0.0
+            if not parsed.get("timestamp"):
+                continue # ignore records without timestamp
+            parsed["station_id"] = station.id
+            writer.add(parsed)
+        if received % batch_size:
+            STAGE_SECONDS.observe(parse_seconds, stage="parse")
+        writer.flush()
+        inserted = writer.inserted
+
+    ROWS_RECEIVED.inc(received)
+    ROWS_INSERTED.inc(inserted)
+    if not received:
+        logger.warning(f"No observations received for {station.nws_id}")
+        return 0
+
+    skipped_count = received - inserted
+    logger.info(f"Inserted {inserted} new observations, skipped {skipped_count} duplicates or invalid records")
+    if row_filter and row_filter.checked:
+        logger.info(f"Pre-filter for {station.nws_id}: {row_filter.summary()}")
+    return inserted
+
+
+def _store_columnar(
+    db: Session,
+    station: StationRef,
+    raw_obs: Iterable[Dict],
+    batch_size: int,
+    loader: str,
+    row_filter: Optional[StoredRowFilter] = None
+) -> Tuple[int, int]:
+    """
+    Columnar variant of `store_observations`: features are parsed a batch at a time into
+    arrays and handed to the loader as columns.
+
+    Returns:
+        Tuple[int, int]: Features received and records inserted.
+    """
+    received = inserted = 0
+    features = iter(raw_obs)
+    while True:
+        batch = list(islice(features, batch_size))
+        if not batch:
+            break
+        received += len(batch)
+        with STAGE_SECONDS.time(stage="parse"):
+            columns = parse_observations_columnar(batch)
+        if row_filter:
+            columns = row_filter.columns(columns)
+        if not column_count(columns):
+            continue
+        with STAGE_SECONDS.time(stage="insert"):
+            inserted_ids = load_columns(db, station.id, columns, loader)
+            if inserted_ids:
+                update_rollups(db, inserted_ids, station.id, *time_span(columns["timestamp"]))
+        ROWS_LOADED.inc(column_count(columns))
+        inserted += len(inserted_ids)
+    return received, inserted
+
+
+def run_pipeline(
+    db: Session,
+    station_id: str,
+    start: datetime = None,
+    end: datetime = None,
+    overlap: timedelta = DEFAULT_OVERLAP,
+    incremental: bool = True,
+    loader: str = DEFAULT_LOADER,
+    parser: str = DEFAULT_PARSER,
+    process_loader=None
+) -> int:
     """
     Run the ingestion pipeline for a station. Will fetch and store weather observations
-    for the past 7 days by default, or a custom time range.
+    newer than the latest stored one (past 7 days at most) by default, or a custom time range.
 
     Args:
         db (Session): Active SQLAlchemy DB session.
         station_id (str): NWS station identifier.
-        start (datetime): Optional start datetime (UTC).
+        start (datetime): Optional start datetime (UTC), disables the watermark lookup.
         end (datetime): Optional end datetime (UTC).
+        overlap (timedelta): How far before the watermark to start fetching.
+        incremental (bool): Use the station watermark, if False always fetch the full 7 days.
+        loader (str): Load path, 'insert' or 'copy'.
+        parser (str): Feature parser, 'row' or 'columnar'.
+        process_loader (ProcessLoader): Optional worker pool that decodes, parses and loads the
+            fetched pages in another process, this thread only fetches.
 
     Returns:
         int: Number of inserted records.
     """
-    # Use default 7-day range if not specified
     end = end or datetime.utcnow()
-    start = start or (end - timedelta(days=7))
 
     # Ensure station exists in DB
-    station = db.query(Station).filter_by(nws_id=station_id).first()
+    station = ensure_station(db, station_id)
     if not station:
-        metadata = validate_station(station_id)
-        if not metadata:
-            logger.error(f"Station {station_id} not valid, please check that the station ID is correct.")
-            return 0
-        station = Station(
-            nws_id=station_id,
-            name=metadata.get("name"),
-            timezone=metadata.get("timeZone"),
-            latitude=metadata.get("latitude"),
-            longitude=metadata.get("latitude"),
-        )
-        db.add(station)
-        db.commit()
-        db.refresh(station)
-
-    # Fetch observations
-    raw_obs = fetch_observations(station_id, start, end)
-    if not raw_obs:
-        logger.warning(f"No observations found for {station_id} between {start} and {end}")
         return 0
 
-    # Parse observations
-    to_insert = []
-    for obs in raw_obs:
-        parsed = parse_observation(obs)
-        if not parsed.get("timestamp"):
-            continue # ignore records without timestamp
-        parsed["station_id"] = station.id
-        to_insert.append(parsed)
-
-    if to_insert:
-        stmt = (
-            insert(WeatherObservation)
-            .values(to_insert)
-            .on_conflict_do_nothing(index_elements=["station_id", "timestamp"])
-            .returning(WeatherObservation.id)  # count insertions
-        )
-
-        result = db.execute(stmt)
-        inserted_ids = result.scalars().all()
-        inserted_count = len(inserted_ids)
-        skipped_count = len(to_insert) - inserted_count
-
-        logger.info(f"Inserted {inserted_count} new observations, skipped {skipped_count} duplicates or invalid records")
-        db.commit()
-        return inserted_count
-    
+    # Use the station watermark, or the default 7-day range, if not specified
+    if start is None:
+        start = resolve_start(db, station, end, overlap=overlap, incremental=incremental)
+
+    # Monthly partitions for the range, created ahead of the first insert
+    ensure_partitions(db, start, end)
+
+    if process_loader is not None:
+        # Every page is fetched before loading, so the worker commits the station all at once
+        try:
+            bodies = [body for body, _ in iter_observation_bodies(station_id, start, end)]
+        except NWSRequestError as e:
+            logger.error(f"Fetching observations for {station_id} between {start} and {end} failed: {e}")
+            return 0
+        db.commit()  # end the watermark read, the worker writes on its own connection
+        _, inserted_count = process_loader.load(station, bodies, loader, parser)
+    else:
+        # Stream observations page by page into batched inserts
+        pages = iter_observation_pages(station_id, start, end)
+        raw_obs = (obs for page, _ in pages for obs in page)
+        try:
+            inserted_count = store_observations(db, station, raw_obs, loader=loader, parser=parser)
+        except NWSRequestError as e:
+            # Pages arrive newest first, a partial commit would move the watermark past missing data
+            db.rollback()
+            logger.error(f"Fetching observations for {station_id} between {start} and {end} failed: {e}")
+            return 0
+
+        with STAGE_SECONDS.time(stage="commit"):
+            db.commit()
 
+    # Cached metrics of this station are stale now
+    if inserted_count:
+        response_cache.invalidate_station(station_id)
+    return inserted_count
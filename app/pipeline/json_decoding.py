@@ -0,0 +1,86 @@
+from typing import Any, Callable, Dict
+import json
+import os
+import threading
+import time
+
+from app.utils.logging import get_logger
+from app.utils.metrics import STAGE_SECONDS
+
+try:
+    import orjson
+except ImportError:  # optional fast path, stdlib json is always available
+    orjson = None
+
+logger = get_logger()
+
+DECODERS: Dict[str, Callable[[bytes], Any]] = {"json": json.loads}
+if orjson is not None:
+    DECODERS["orjson"] = orjson.loads
+
+# 'auto' picks the fastest installed decoder
+_decoder_name = "json"
+
+# Totals across all decoded bodies, for the end-of-run summary
+_decoded_bytes = 0
+_decode_seconds = 0.0
+_stats_lock = threading.Lock()
+
+
+def set_json_decoder(name: str) -> str:
+    """
+    Select the JSON decoder used for API responses ('auto', 'orjson' or 'json').
+    Falls back to stdlib json if the requested decoder is not installed.
+
+    Returns:
+        str: Name of the decoder actually in use.
+    """
+    global _decoder_name
+    if name == "auto":
+        name = "orjson" if "orjson" in DECODERS else "json"
+    if name not in DECODERS:
+        logger.warning(f"JSON decoder '{name}' is not available, falling back to stdlib json")
+        name = "json"
+    _decoder_name = name
+    return name
+
+
+def get_json_decoder() -> str:
+    """Name of the JSON decoder in use."""
+    return _decoder_name
+
+
+def decode_json(body: bytes) -> Any:
+    """
+    Decode a JSON response body with the selected decoder, logging decode time per MB.
+    """
+    global _decoded_bytes, _decode_seconds
+    started = time.perf_counter()
+    data = DECODERS[_decoder_name](body)
+    elapsed = time.perf_counter() - started
+    STAGE_SECONDS.observe(elapsed, stage="decode")
+    with _stats_lock:
+        _decoded_bytes += len(body)
+        _decode_seconds += elapsed
+
+    size_mb = len(body) / 1_000_000
+    if size_mb:
+        logger.debug(
+            f"Decoded {size_mb:.2f} MB with {_decoder_name} in {elapsed * 1000:.1f} ms "
+            f"({elapsed * 1000 / size_mb:.1f} ms/MB)"
+        )
+    return data
+
+
+def log_decode_stats() -> None:
+    """Log the total decode time and ms per MB for all responses decoded so far."""
+    with _stats_lock:
+        size_mb, elapsed = _decoded_bytes / 1_000_000, _decode_seconds
+    if size_mb:
+        logger.info(
+            f"JSON decode ({_decoder_name}): {size_mb:.2f} MB in {elapsed * 1000:.1f} ms "
+            f"({elapsed * 1000 / size_mb:.1f} ms/MB)"
+        )
+
+
+set_json_decoder(os.getenv("NWS_JSON_DECODER", "auto"))
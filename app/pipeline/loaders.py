@@ -0,0 +1,145 @@
+from typing import Callable, Dict, List
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert
+import numpy as np
+import io
+
+from app.models.weather_observation import WeatherObservation
+from app.pipeline.columnar import column_count, iter_column_rows
+
+# Columns written by the loaders, in COPY order
+COLUMNS = [
+    "station_id",
+    "timestamp",
+    "temperature",
+    "humidity",
+    "wind_speed",
+    "wind_direction",
+    "pressure",
+    "dewpoint",
+    "visibility",
+]
+
+STAGING_TABLE = "weather_observations_staging"
+
+
+def insert_rows(db: Session, rows: List[Dict]) -> List[int]:
+    """
+    Load parsed rows with a multi-row INSERT ... ON CONFLICT DO NOTHING.
+
+    Returns:
+        List[int]: Ids of the inserted records.
+    """
+    stmt = (
+        insert(WeatherObservation)
+        .values(rows)
+        .on_conflict_do_nothing(index_elements=["station_id", "timestamp"])
+        .returning(WeatherObservation.id)  # count insertions
+    )
+    result = db.execute(stmt)
+    return result.scalars().all()
+
+
+def _copy_value(value) -> str:
+    """Format a value for COPY text format."""
+    if value is None:
+        return "\\N"
+    return str(value)
+
+
+def _copy_and_merge(db: Session, buffer: io.StringIO) -> List[int]:
+    """
+    COPY a text-format buffer into a session-local staging table, then merge it into
+    weather_observations with a single INSERT ... SELECT ... ON CONFLICT DO NOTHING.
+
+    The staging table is TEMPORARY, so it is not WAL-logged and each connection gets its own.
+    """
+    buffer.seek(0)
+    columns = ", ".join(COLUMNS)
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.execute(f"""
+            CREATE TEMPORARY TABLE IF NOT EXISTS {STAGING_TABLE} (
+                station_id integer,
+                timestamp timestamp,
+                temperature double precision,
+                humidity double precision,
+                wind_speed double precision,
+                wind_direction double precision,
+                pressure double precision,
+                dewpoint double precision,
+                visibility double precision
+            ) ON COMMIT DELETE ROWS
+        """)
+        cursor.execute(f"TRUNCATE {STAGING_TABLE}")
+        cursor.copy_expert(f"COPY {STAGING_TABLE} ({columns}) FROM STDIN", buffer)
+        cursor.execute(f"""
+            INSERT INTO weather_observations ({columns})
+            SELECT {columns} FROM {STAGING_TABLE}
+            ON CONFLICT (station_id, timestamp) DO NOTHING
+            RETURNING id
+        """)
+        return [row[0] for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+
+def copy_rows(db: Session, rows: List[Dict]) -> List[int]:
+    """
+    Load parsed rows with COPY through a staging table.
+
+    Returns:
+        List[int]: Ids of the inserted records.
+    """
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write("\t".join(_copy_value(row.get(column)) for column in COLUMNS))
+        buffer.write("\n")
+    return _copy_and_merge(db, buffer)
+
+
+def copy_columns(db: Session, station_id: int, columns: Dict[str, np.ndarray]) -> List[int]:
+    """
+    Load a columnar batch (see `parse_observations_columnar`) with COPY through a staging
+    table, without building per-row dicts.
+
+    Returns:
+        List[int]: Ids of the inserted records.
+    """
+    prefix = f"{station_id}\t"
+    values = [columns[column].tolist() for column in COLUMNS[1:]]
+    buffer = io.StringIO()
+    for row in zip(*values):
+        buffer.write(prefix)
+        buffer.write("\t".join("\\N" if v is None or v != v else str(v) for v in row))  # NaN -> null
+        buffer.write("\n")
+    return _copy_and_merge(db, buffer)
+
+
+def load_columns(db: Session, station_id: int, columns: Dict[str, np.ndarray], loader: str) -> List[int]:
+    """
+    Load a columnar batch with the named loader. COPY reads the columns directly, INSERT
+    goes through row dicts.
+
+    Returns:
+        List[int]: Ids of the inserted records.
+    """
+    if not column_count(columns):
+        return []
+    if loader == "copy":
+        return copy_columns(db, station_id, columns)
+    return get_loader(loader)(db, list(iter_column_rows(columns, station_id)))
+
+
+LOADERS: Dict[str, Callable[[Session, List[Dict]], List[int]]] = {
+    "insert": insert_rows,
+    "copy": copy_rows,
+}
+
+
+def get_loader(name: str) -> Callable[[Session, List[Dict]], List[int]]:
+    """Return the loader function registered under `name` ('insert' or 'copy')."""
+    try:
+        return LOADERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown loader '{name}', expected one of: {', '.join(LOADERS)}")
@@ -0,0 +1,110 @@
+from datetime import datetime
+from typing import Dict, Optional, Sequence
+from sqlalchemy import Select, func, select, true
+from sqlalchemy.sql import ColumnElement
+
+from app.models.observation_rollup import ROLLUP_FIELDS
+from app.models.station import Station
+from app.models.weather_observation import WeatherObservation
+from app.pipeline.rollups import rollup_for_range
+
+# Unit of each measured field, as stored
+FIELD_UNITS: Dict[str, str] = {
+    "temperature": "°C",
+    "wind_speed": "km/h",
+    "wind_direction": "°",
+    "humidity": "%",
+    "pressure": "Pa",
+    "dewpoint": "°C",
+    "visibility": "m",
+}
+
+
+def check_field(field: str) -> str:
+    """Raise ValueError unless `field` is a measured observation field."""
+    if field not in ROLLUP_FIELDS:
+        raise ValueError(f"Unknown field '{field}', expected one of: {', '.join(ROLLUP_FIELDS)}")
+    return field
+
+
+def station_filter(column, nws_ids: Optional[Sequence[str]]) -> ColumnElement:
+    """`column` restricted to the stations with these NWS IDs, all stations when None."""
+    if nws_ids is None:
+        return true()
+    return column.in_(select(Station.id).where(Station.nws_id.in_(list(nws_ids))).scalar_subquery())
+
+
+def with_stations(aggregate, nws_ids: Optional[Sequence[str]]) -> Select:
+    """
+    Join per-station aggregates back to the requested stations, so stations without data in
+    the range still get a row (with nulls), ordered by NWS ID.
+    """
+    aggregate = aggregate.subquery()
+    stations = select(Station.nws_id, *[c for c in aggregate.c if c.name != "station_id"])\
+        .select_from(Station)\
+        .outerjoin(aggregate, aggregate.c.station_id == Station.id)
+    if nws_ids is not None:
+        stations = stations.where(Station.nws_id.in_(list(nws_ids)))
+    return stations.order_by(Station.nws_id)
+
+
+def grouped_average_query(field: str, start: datetime, end: datetime, nws_ids: Optional[Sequence[str]] = None) -> Select:
+    """
+    Average and count of `field` per station over [start, end) in one grouped query, for
+    the given stations or all of them. Hour/day aligned ranges read the rollups.
+
+    Rows are (nws_id, average, count).
+    """
+    check_field(field)
+    model = rollup_for_range(start, end)
+    if model is not None:
+        total = func.sum(getattr(model, f"{field}_sum"))
+        count = func.sum(getattr(model, f"{field}_count"))
+        aggregate = select(
+            model.station_id,
+            (total / func.nullif(count, 0)).label("average"),
+            count.label("count"),
+        ).where(
+            station_filter(model.station_id, nws_ids),
+            model.bucket_start >= start,
+            model.bucket_start < end,
+        ).group_by(model.station_id)
+    else:
+        column = getattr(WeatherObservation, field)
+        aggregate = select(
+            WeatherObservation.station_id,
+            func.avg(column).label("average"),
+            func.count(column).label("count"),
+        ).where(
+            station_filter(WeatherObservation.station_id, nws_ids),
+            WeatherObservation.timestamp >= start,
+            WeatherObservation.timestamp < end,
+        ).group_by(WeatherObservation.station_id)
+    return with_stations(aggregate, nws_ids)
+
+
+def grouped_max_delta_query(field: str, start: datetime, end: datetime, nws_ids: Optional[Sequence[str]] = None) -> Select:
+    """
+    Maximum change of `field` between consecutive observations per station over
+    [start, end], with LAG partitioned by station so every station is handled by the
+    same scan.
+
+    Rows are (nws_id, max_delta, count).
+    """
+    check_field(field)
+    column = getattr(WeatherObservation, field)
+    deltas = select(
+        WeatherObservation.station_id,
+        column.label("value"),
+        func.lag(column).over(partition_by=WeatherObservation.station_id, order_by=WeatherObservation.timestamp).label("previous"),
+    ).where(
+        station_filter(WeatherObservation.station_id, nws_ids),
+        WeatherObservation.timestamp >= start,
+        WeatherObservation.timestamp <= end,
+    ).subquery()
+    aggregate = select(
+        deltas.c.station_id,
+        func.max(func.abs(deltas.c.value - deltas.c.previous)).label("max_delta"),
+        func.count(deltas.c.value).label("count"),
+    ).group_by(deltas.c.station_id)
+    return with_stations(aggregate, nws_ids)
@@ -1,12 +1,16 @@
-from typing import Union, List, Optional, Dict
+from typing import Union, List, Optional, Dict, Iterator, Tuple
 from app.utils.logging import get_logger
-from typing import List, Dict, Optional
 from datetime import datetime
+from app.pipeline import http_client
+from app.pipeline.archive import archive_features, archive_station
+from app.pipeline.json_decoding import decode_json
 import requests
+import os
+import re
 
 logger = get_logger()
 
-BASE_URL = "https://api.weather.gov"
+BASE_URL = os.getenv("NWS_BASE_URL", "https://api.weather.gov")
 USER_AGENT = "NWS-data-pipeline (https://github.com/jpsiegel/NWS-data-pipeline, jpsiegel@gmail.com)"
 HEADERS = {
     "User-Agent": USER_AGENT,
@@ -14,6 +18,15 @@ HEADERS = {
 }
 
 
+# The API writes an empty page and the pagination object in these exact shapes
+_EMPTY_FEATURES = re.compile(rb'"features"\s*:\s*\[\s*\]')
+_NEXT_LINK = re.compile(rb'"pagination"\s*:\s*\{\s*"next"\s*:\s*"([^"\\]+)"')
+
+
+class NWSRequestError(Exception):
+    """Raised when an NWS API request fails and partial results must not be trusted."""
+
+
 def format_datetime_utc(dt: datetime) -> str:
     """Format a datetime object as an ISO 8601 UTC string for the API."""
     return dt.strftime("%Y-%m-%dT%H:%M:%SZ")
@@ -21,7 +34,8 @@ def format_datetime_utc(dt: datetime) -> str:
 
 def handle_json_response(
     response: requests.Response,
-    expected_keys: Union[str, List[str]]
+    expected_keys: Union[str, List[str]],
+    optional_keys: Union[str, List[str]] = ()
 ) -> Optional[Dict]:
     """
     Handle a JSON API response with structured error reporting.
@@ -29,13 +43,14 @@ def handle_json_response(
     Args:
         response (requests.Response): The HTTP response object.
         expected_keys (str or list): One or more top-level keys to extract.
+        optional_keys (str or list): Top-level keys extracted only if present, without warnings.
 
     Returns:
         Optional[dict]: A dict with the extracted keys and values, or None if error.
     """
     if response.status_code == 200:
         try:
-            data = response.json()
+            data = decode_json(response.content)
             if isinstance(expected_keys, str):
                 expected_keys = [expected_keys]
             result = {}
@@ -46,6 +61,11 @@ def handle_json_response(
                 result[key] = data[key]
             if not result:
                 return None
+            if isinstance(optional_keys, str):
+                optional_keys = [optional_keys]
+            for key in optional_keys:
+                if key in data:
+                    result[key] = data[key]
             return result
         except Exception as e:
             logger.error(f"Failed to parse successful JSON response: {e}")
@@ -70,12 +90,21 @@ def validate_station(station_id: str) -> Optional[dict]:
 
     Returns:
         Optional[dict]: The 'properties' metadata of the station if valid, else None.
+
+    Raises:
+        NWSRequestError: If the API could not answer (throttled, server error or unreachable
+            after retries), so the station must not be remembered as invalid.
     """
     url = f"{BASE_URL}/stations/{station_id}"
     logger.info(f"Validating station ID: {station_id} by requesting its metadata")
 
     # Call endpoint
-    response = requests.get(url, headers=HEADERS)
+    try:
+        response = http_client.get(url, headers=HEADERS)
+    except requests.RequestException as e:
+        raise NWSRequestError(f"Metadata request failed for station {station_id}: {e}") from e
+    if response.status_code == 429 or response.status_code >= 500:
+        raise NWSRequestError(f"Metadata request failed for station {station_id} with status {response.status_code}")
     station_data = handle_json_response(response, expected_keys=["properties", "geometry"])
 
     if not station_data:
@@ -91,9 +120,21 @@ def validate_station(station_id: str) -> Optional[dict]:
     props["latitude"] = lat
 
     logger.info(f"Station '{station_id}' found: {props.get('name', 'Unknown')}")
+    archive_station(station_id, props)
     return props
 
 
+def try_validate_station(station_id: str) -> Union[dict, None, NWSRequestError]:
+    """
+    `validate_station` for thread pool workers: the NWSRequestError is returned instead of
+    raised, so one unavailable station does not abort the others.
+    """
+    try:
+        return validate_station(station_id)
+    except NWSRequestError as e:
+        return e
+
+
 def fetch_observations(
     station_id: str,
     start: datetime,
@@ -122,11 +163,124 @@ def fetch_observations(
     logger.info(f"Requesting observations from {params.get('start')} to {params.get('end')} at {url}")
 
     # Call endpoint
-    response = requests.get(url, headers=HEADERS, params=params)
+    try:
+        response = http_client.get(url, headers=HEADERS, params=params)
+    except requests.RequestException as e:
+        logger.error(f"Observation request for station {station_id} failed: {e}")
+        return None
     result = handle_json_response(response, expected_keys="features")
-    features = result.get("features")
+    if result is None:
+        return None
+
+    return result.get("features")
+
+
+def iter_observation_pages(
+    station_id: str,
+    start: datetime,
+    end: datetime,
+    limit: int = 500
+) -> Iterator[Tuple[List[Dict], Optional[str]]]:
+    """
+    Fetch weather observations for a station page by page, following `pagination.next`
+    links when the API provides them.
+
+    Args:
+        station_id (str): The ID of the station (e.g., '0112W').
+        start (datetime): Start of the observation range (UTC).
+        end (datetime): End of the observation range (UTC).
+        limit (int): Max number of results per page (default 500).
+
+    Yields:
+        Tuple[List[dict], Optional[str]]: GeoJSON Feature objects of one page, and the link to
+        the next page (None on the last one).
+
+    Raises:
+        NWSRequestError: If a page request fails.
+    """
+    url = f"{BASE_URL}/stations/{station_id}/observations"
+    params = {
+        "start": format_datetime_utc(start),
+        "end": format_datetime_utc(end),
+        "limit": limit
+    }
+
+    while url:
+        logger.info(f"Requesting observation page from {params.get('start') if params else 'cursor'} at {url}")
+        try:
+            response = http_client.get(url, headers=HEADERS, params=params)
+        except requests.RequestException as e:
+            raise NWSRequestError(f"Observation request failed for station {station_id} at {url}: {e}") from e
+        result = handle_json_response(response, expected_keys="features", optional_keys="pagination")
+        if result is None:
+            raise NWSRequestError(f"Observation request failed for station {station_id} at {url}")
+
+        features = result.get("features") or []
+        if not features:
+            return
+        archive_features(station_id, features)
+
+        # The next link already carries the cursor and query parameters
+        url = (result.get("pagination") or {}).get("next")
+        params = None
+        yield features, url
+
+
+def next_page_link(body: bytes) -> Optional[str]:
+    """
+    The `pagination.next` link of a raw observations page, without decoding the whole
+    document. Falls back to a full decode if the link is not where the API puts it.
+    """
+    if b'"pagination"' not in body:
+        return None
+    match = _NEXT_LINK.search(body)
+    if match:
+        return match.group(1).decode()
+    return (decode_json(body).get("pagination") or {}).get("next")
+
+
+def iter_observation_bodies(
+    station_id: str,
+    start: datetime,
+    end: datetime,
+    limit: int = 500
+) -> Iterator[Tuple[bytes, Optional[str]]]:
+    """
+    Like `iter_observation_pages`, but yields each page as the raw response body, so it can
+    be handed to another process as compact bytes and decoded there. Only the pagination
+    link is extracted here.
+
+    Yields:
+        Tuple[bytes, Optional[str]]: JSON body of one page, and the link to the next page
+        (None on the last one).
+
+    Raises:
+        NWSRequestError: If a page request fails.
+    """
+    url = f"{BASE_URL}/stations/{station_id}/observations"
+    params = {
+        "start": format_datetime_utc(start),
+        "end": format_datetime_utc(end),
+        "limit": limit
+    }
+
+    while url:
+        logger.info(f"Requesting observation page from {params.get('start') if params else 'cursor'} at {url}")
+        try:
+            response = http_client.get(url, headers=HEADERS, params=params)
+        except requests.RequestException as e:
+            raise NWSRequestError(f"Observation request failed for station {station_id} at {url}: {e}") from e
+        if response.status_code != 200:
+            handle_json_response(response, expected_keys="features")  # logs the API error
+            raise NWSRequestError(f"Observation request failed for station {station_id} at {url}")
+
+        body = response.content
+        if _EMPTY_FEATURES.search(body):
+            return
 
-    return features
+        url = next_page_link(body)
+        params = None
+        yield body, url
 
 
 def parse_observation(obs: dict) -> dict:
@@ -0,0 +1,154 @@
+from datetime import date, datetime
+from typing import List, Optional, Set
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+import threading
+import os
+
+from app.utils.logging import get_logger
+
+logger = get_logger()
+
+TABLE = "weather_observations"
+# Months created ahead of the newest loaded data, so inserts never wait on DDL
+PARTITION_MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", "2"))
+# Whole months of raw observations to keep, 0 keeps everything
+RETENTION_MONTHS = int(os.getenv("OBSERVATION_RETENTION_MONTHS", "0"))
+
+# Months known to have a partition, per table, so the pipeline only touches the catalog once
+_known: dict = {}
+_known_lock = threading.Lock()
+
+
+def month_start(dt: datetime) -> date:
+    return date(dt.year, dt.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date, table: str = TABLE) -> str:
+    return f"{table}_y{month.year}m{month.month:02d}"
+
+
+def list_partitions(db: Session, table: str = TABLE) -> List[date]:
+    """
+    Months that have a partition of `table`, oldest first (the default partition excluded).
+    """
+    rows = db.execute(text("""
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = :table
+    """), {"table": table}).scalars().all()
+
+    months = []
+    prefix = f"{table}_y"
+    for name in rows:
+        if name.startswith(prefix):
+            year, month = name[len(prefix):].split("m")
+            months.append(date(int(year), int(month), 1))
+    return sorted(months)
+
+
+def create_partition(db: Session, month: date, table: str = TABLE) -> bool:
+    """
+    Create the partition of `table` holding `month`. Rows of that month already sitting in
+    the default partition are moved into it first, since ATTACH refuses overlapping rows.
+    Serialized across processes with an advisory lock, caller commits.
+
+    Returns:
+        bool: True if the partition was created, False if it already existed.
+    """
+    name = partition_name(month, table)
+    db.execute(text("SELECT pg_advisory_xact_lock(hashtext(:name))"), {"name": name})
+    if db.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar():
+        return False
+
+    lower, upper = month.isoformat(), add_months(month, 1).isoformat()
+    db.execute(text(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    db.execute(text(f"""
+        WITH moved AS (
+            DELETE FROM {table}_default
+            WHERE timestamp >= '{lower}' AND timestamp < '{upper}'
+            RETURNING *
+        )
+        INSERT INTO {name} SELECT * FROM moved
+    """))
+    db.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES FROM ('{lower}') TO ('{upper}')"))
+    logger.info(f"Created partition {name}")
+    return True
+
+
+def ensure_partitions(db: Session, start: datetime, end: datetime, table: str = TABLE) -> int:
+    """
+    Make sure monthly partitions exist from `start` to `end`, plus PARTITION_MONTHS_AHEAD
+    months when `end` is the current month (historical backfills do not create months
+    ahead). Cheap when they already do, the known months are cached in-process. Commits
+    when partitions had to be checked, so call it before loading.
+
+    Returns:
+        int: Number of partitions created.
+    """
+    first, last = month_start(start), month_start(end)
+    if last >= month_start(datetime.utcnow()):
+        last = add_months(last, PARTITION_MONTHS_AHEAD)
+    with _known_lock:
+        known: Set[date] = _known.get(table)
+    if known is None:
+        known = set(list_partitions(db, table))
+
+    missing = []
+    month = first
+    while month <= last:
+        if month not in known:
+            missing.append(month)
+        month = add_months(month, 1)
+
+    created = 0
+    if missing:
+        for month in missing:
+            created += create_partition(db, month, table)
+            known.add(month)
+        db.commit()  # release the advisory locks
+
+    with _known_lock:
+        _known[table] = known
+    return created
+
+
+def drop_partitions_before(db: Session, cutoff: datetime, table: str = TABLE) -> List[str]:
+    """
+    Retention: drop every partition whose whole month ends before `cutoff`. Dropping a
+    partition is a catalog change, unlike DELETE it leaves no dead rows to vacuum. Rollups
+    are kept, so averages over dropped months are still served.
+
+    Returns:
+        List[str]: Names of the dropped partitions.
+    """
+    dropped = []
+    for month in list_partitions(db, table):
+        if add_months(month, 1) > month_start(cutoff):
+            break
+        name = partition_name(month, table)
+        db.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+        db.execute(text(f"DROP TABLE {name}"))
+        dropped.append(name)
+    db.commit()
+
+    with _known_lock:
+        _known.pop(table, None)
+    if dropped:
+        logger.info(f"Dropped {len(dropped)} partitions before {cutoff.date()}: {', '.join(dropped)}")
+    return dropped
+
+
+def apply_retention(db: Session, months: int = RETENTION_MONTHS, now: Optional[datetime] = None) -> List[str]:
+    """Drop partitions older than `months` whole months, no-op when `months` is 0."""
+    if months <= 0:
+        return []
+    cutoff = add_months(month_start(now or datetime.utcnow()), -months)
+    return drop_partitions_before(db, datetime(cutoff.year, cutoff.month, 1))
@@ -0,0 +1,110 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+import multiprocessing
+import os
+
+from sqlalchemy.orm import Session
+
+from app.db.session import SessionLocal, init_worker_process
+from app.pipeline.archive import archive_features
+from app.pipeline.ingest_observations import store_observations
+from app.pipeline.json_decoding import decode_json
+from app.pipeline.station_cache import StationRef
+from app.utils.logging import get_logger
+from app.utils.metrics import ROWS_INSERTED, ROWS_LOADED, ROWS_PREFILTERED, ROWS_RECEIVED, STAGE_SECONDS
+
+logger = get_logger()
+
+# Worker processes parsing and loading pages when the seeder runs with --processes
+DEFAULT_PROCESSES = int(os.getenv("PIPELINE_PROCESSES", "0"))
+
+_STAGES = ("decode", "parse", "prefilter", "insert", "commit")
+# Row counters of the worker that the parent adds to its own
+_COUNTERS = (ROWS_PREFILTERED, ROWS_LOADED)
+
+# Per worker process, created by _init_worker
+_db: Optional[Session] = None
+
+
+def _init_worker() -> None:
+    global _db
+    init_worker_process()
+    _db = SessionLocal()
+
+
+def _stage_totals() -> Dict[str, float]:
+    return {stage: STAGE_SECONDS.total(stage=stage)[0] for stage in _STAGES}
+
+
+def _counter_totals() -> List[float]:
+    return [counter.value() for counter in _COUNTERS]
+
+
+def _load(station: StationRef, bodies: List[bytes], loader: str, parser: str) -> Tuple[int, int, Dict[str, float], List[float]]:
+    """
+    Decode, parse and load raw observation pages of one station in a worker process, in one
+    transaction. Returns features received, rows inserted, seconds spent per stage and the
+    `_COUNTERS` increments, which the parent records since the worker's own metrics are
+    never scraped.
+    """
+    before, counters_before = _stage_totals(), _counter_totals()
+    try:
+        features = []
+        for body in bodies:
+            page = decode_json(body).get("features") or []
+            archive_features(station.nws_id, page)
+            features.extend(page)
+        inserted = store_observations(_db, station, features, loader=loader, parser=parser)
+        with STAGE_SECONDS.time(stage="commit"):
+            _db.commit()
+    except Exception:
+        _db.rollback()
+        raise
+    after = _stage_totals()
+    counts = [value - previous for value, previous in zip(_counter_totals(), counters_before)]
+    return len(features), inserted, {stage: after[stage] - before[stage] for stage in _STAGES}, counts
+
+
+class ProcessLoader:
+    """
+    Pool of worker processes, each with its own DB connection, that decode, parse and load
+    raw observation pages. Pages travel as the JSON bytes received from the API rather than
+    pickled dicts. Thread-safe: the fetching threads of `run_stations` submit to it directly
+    and block until their station is loaded, so fetching and loading overlap across stations.
+    """
+
+    def __init__(self, processes: int):
+        # fork keeps the already imported app modules, spawn would re-import them per worker
+        context = multiprocessing.get_context("fork") if "fork" in multiprocessing.get_all_start_methods() else None
+        self.processes = processes
+        self._executor = ProcessPoolExecutor(max_workers=processes, mp_context=context, initializer=_init_worker)
+        # With fork every worker starts on the first submit, do it now, before fetch threads
+        # exist whose held locks a forked child would inherit
+        self._executor.submit(int).result()
+
+    def load(self, station: StationRef, bodies: List[bytes], loader: str, parser: str) -> Tuple[int, int]:
+        """
+        Load the pages of a station and commit them, or roll them all back on error.
+
+        Returns:
+            Tuple[int, int]: Features received and records inserted.
+        """
+        if not bodies:
+            return 0, 0
+        received, inserted, stages, counts = self._executor.submit(_load, station, bodies, loader, parser).result()
+        for stage, seconds in stages.items():
+            STAGE_SECONDS.observe(seconds, stage=stage)
+        for counter, count in zip(_COUNTERS, counts):
+            counter.inc(count)
+        ROWS_RECEIVED.inc(received)
+        ROWS_INSERTED.inc(inserted)
+        return received, inserted
+
+    def close(self) -> None:
+        self._executor.shutdown()
+
+    def __enter__(self) -> "ProcessLoader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
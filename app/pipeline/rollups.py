@@ -0,0 +1,133 @@
+from datetime import datetime
+from typing import List, Optional, Type
+from sqlalchemy import Select, func, select, text
+from sqlalchemy.orm import Session
+
+from app.models.observation_rollup import DailyRollup, HourlyRollup, ROLLUP_FIELDS, RollupColumns
+from app.utils.logging import get_logger
+
+logger = get_logger()
+
+# Rollup model per bucket, with the matching date_trunc unit
+ROLLUPS = {"hour": HourlyRollup, "day": DailyRollup}
+
+
+def _aggregate_sql(bucket: str, where: str) -> str:
+    """
+    INSERT ... SELECT that aggregates observations matching `where` into the `bucket` rollup
+    table, adding to existing buckets on conflict.
+    """
+    table = ROLLUPS[bucket].__tablename__
+    columns = ["observation_count"]
+    selects = ["count(*)"]
+    updates = ["observation_count = r.observation_count + excluded.observation_count"]
+    for field in ROLLUP_FIELDS:
+        columns += [f"{field}_count", f"{field}_sum", f"{field}_min", f"{field}_max"]
+        selects += [f"count({field})", f"sum({field})", f"min({field})", f"max({field})"]
+        updates += [
+            f"{field}_count = r.{field}_count + excluded.{field}_count",
+            f"{field}_sum = COALESCE(r.{field}_sum, 0) + COALESCE(excluded.{field}_sum, 0)",
+            f"{field}_min = LEAST(r.{field}_min, excluded.{field}_min)",  # LEAST / GREATEST skip NULLs
+            f"{field}_max = GREATEST(r.{field}_max, excluded.{field}_max)",
+        ]
+    return f"""
+        INSERT INTO {table} AS r (station_id, bucket_start, {", ".join(columns)})
+        SELECT station_id, date_trunc('{bucket}', timestamp), {", ".join(selects)}
+        FROM weather_observations
+        WHERE {where}
+        GROUP BY 1, 2
+        ON CONFLICT (station_id, bucket_start) DO UPDATE SET {", ".join(updates)}
+    """
+
+
+# Station and time span first: id alone cannot prune the timestamp partitions
+UPDATE_BY_IDS = {
+    bucket: text(_aggregate_sql(bucket, "station_id = :station_id AND timestamp BETWEEN :start AND :end AND id = ANY(:ids)"))
+    for bucket in ROLLUPS
+}
+
+
+def update_rollups(db: Session, inserted_ids: List[int], station_id: int, start: datetime, end: datetime) -> None:
+    """
+    Add freshly inserted observations to the hourly and daily rollups. Must run in the
+    same transaction as the insert, so each row is counted exactly once. `start` and `end`
+    bound the timestamps of the loaded batch, so only its partitions are read.
+    """
+    if not inserted_ids:
+        return
+    params = {"ids": list(inserted_ids), "station_id": station_id, "start": start, "end": end}
+    for stmt in UPDATE_BY_IDS.values():
+        db.execute(stmt, params)
+
+
+def delete_rollups(db: Session, station_id: Optional[int] = None) -> None:
+    """
+    Delete the rollups of one station, or all of them. Needed before deleting a station.
+    """
+    for model in ROLLUPS.values():
+        query = db.query(model)
+        if station_id is not None:
+            query = query.filter(model.station_id == station_id)
+        query.delete(synchronize_session=False)
+
+
+def rebuild_rollups(db: Session, station_id: Optional[int] = None) -> None:
+    """
+    Recompute the rollups from scratch from weather_observations, for one station or all.
+    """
+    delete_rollups(db, station_id)
+    for bucket in ROLLUPS:
+        where = "station_id = :station_id" if station_id is not None else "TRUE"
+        db.execute(text(_aggregate_sql(bucket, where)), {"station_id": station_id})
+        logger.info(f"Rebuilt {bucket} rollups" + (f" for station {station_id}" if station_id is not None else ""))
+    db.commit()
+
+
+def rollup_for_range(start: datetime, end: datetime) -> Optional[Type[RollupColumns]]:
+    """
+    Pick the coarsest rollup whose buckets line up exactly with [start, end), or None if the
+    range is not aligned to whole hours.
+    """
+    def aligned(dt: datetime, bucket: str) -> bool:
+        if dt.minute or dt.second or dt.microsecond:
+            return False
+        return bucket == "hour" or dt.hour == 0
+
+    for bucket in ("day", "hour"):
+        if aligned(start, bucket) and aligned(end, bucket):
+            return ROLLUPS[bucket]
+    return None
+
+
+def rollup_average_query(station_id: int, field: str, start: datetime, end: datetime) -> Select:
+    """
+    SELECT of (sum, count) of `field` over [start, end) from the rollups, for sync and async
+    sessions alike. Callers must check `rollup_for_range` first, this raises ValueError for
+    unaligned ranges.
+    """
+    model = rollup_for_range(start, end)
+    if model is None:
+        raise ValueError(f"Range {start} - {end} is not aligned to rollup buckets")
+    return select(
+        func.sum(getattr(model, f"{field}_sum")),
+        func.sum(getattr(model, f"{field}_count")),
+    ).where(
+        model.station_id == station_id,
+        model.bucket_start >= start,
+        model.bucket_start < end,
+    )
+
+
+def average_from_totals(total: Optional[float], count: Optional[int]) -> Optional[float]:
+    return total / count if count else None
+
+
+def rollup_average(db: Session, station_id: int, field: str, start: datetime, end: datetime) -> Optional[float]:
+    """
+    Average of `field` over [start, end) read from the rollups.
+
+    Returns:
+        Optional[float]: The average (None if there is no data).
+    """
+    total, count = db.execute(rollup_average_query(station_id, field, start, end)).one()
+    return average_from_totals(total, count)
@@ -0,0 +1,252 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from datetime import datetime
+from statistics import median
+from typing import Callable, Dict, List, Optional
+import heapq
+import threading
+import time
+import os
+
+from sqlalchemy.orm import Session
+
+from app.db.session import SessionLocal
+from app.models.weather_observation import WeatherObservation
+from app.pipeline.concurrent_ingest import StationResult, run_station
+from app.pipeline.ingest_observations import run_pipeline
+from app.pipeline.station_cache import station_cache
+from app.utils.logging import get_logger
+
+logger = get_logger()
+
+# Polling interval bounds, in seconds, applied to the observed reporting cadence
+MIN_INTERVAL = float(os.getenv("SCHEDULER_MIN_INTERVAL_SECONDS", "300"))
+MAX_INTERVAL = float(os.getenv("SCHEDULER_MAX_INTERVAL_SECONDS", "3600"))
+DEFAULT_INTERVAL = float(os.getenv("SCHEDULER_DEFAULT_INTERVAL_SECONDS", "900"))
+# Number of recent observations used to estimate a station's cadence
+CADENCE_SAMPLE = 24
+
+
+@dataclass
+class StationSchedule:
+    """Polling state of one station."""
+    station_id: str
+    interval: float = DEFAULT_INTERVAL
+    next_run: float = 0.0
+    last_success: Optional[float] = None
+    last_inserted: int = 0
+    failures: int = 0
+    running: bool = False
+
+
+def estimate_cadence(db: Session, station_id: str, sample: int = CADENCE_SAMPLE) -> Optional[float]:
+    """
+    Estimate how often a station reports, in seconds, as the median gap between its
+    latest stored observations. Returns None when there is not enough history.
+    """
+    station = station_cache.get_or_create(db, station_id)
+    if not station:
+        return None
+    timestamps: List[datetime] = [
+        ts for (ts,) in db.query(WeatherObservation.timestamp)
+        .filter(WeatherObservation.station_id == station.id)
+        .order_by(WeatherObservation.timestamp.desc())
+        .limit(sample)
+        .all()
+    ]
+    gaps = [(a - b).total_seconds() for a, b in zip(timestamps, timestamps[1:])]
+    gaps = [g for g in gaps if g > 0]
+    return median(gaps) if gaps else None
+
+
+def _default_runner(station_id: str) -> StationResult:
+    return run_station(station_id, run_pipeline, {})
+
+
+def _default_cadence(station_id: str) -> Optional[float]:
+    db = SessionLocal()
+    try:
+        return estimate_cadence(db, station_id)
+    finally:
+        db.close()
+
+
+class Scheduler:
+    """
+    Long-running ingestion scheduler. Keeps every station in a time-ordered queue and polls
+    it once per observed reporting cadence, on a fixed worker pool that shares the process
+    DB engine and HTTP connection pool. Due stations wait in the queue while all workers
+    are busy, which is the backpressure: nothing is dispatched beyond `workers` in flight.
+
+    `clock`, `sleep`, `runner` and `cadence` are injectable so the scheduler can be driven
+    with a fake clock and a stub API.
+    """
+
+    def __init__(
+        self,
+        station_ids: List[str],
+        workers: int = 8,
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], None] = time.sleep,
+        runner: Callable[[str], StationResult] = _default_runner,
+        cadence: Callable[[str], Optional[float]] = _default_cadence,
+        min_interval: float = MIN_INTERVAL,
+        max_interval: float = MAX_INTERVAL
+    ):
+        self.workers = workers
+        self.clock = clock
+        self.sleep = sleep
+        self.runner = runner
+        self.cadence = cadence
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+
+        now = self.clock()
+        self.stations: Dict[str, StationSchedule] = {}
+        self._queue: List = []
+        self._in_flight: Dict[Future, str] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scheduler")
+        for station_id in dict.fromkeys(station_ids):
+            self.add_station(station_id, now)
+
+    def add_station(self, station_id: str, at: Optional[float] = None) -> None:
+        """Add a station to the queue, due at `at` (now by default)."""
+        with self._lock:
+            if station_id in self.stations:
+                return
+            schedule = StationSchedule(station_id, next_run=self.clock() if at is None else at)
+            self.stations[station_id] = schedule
+            heapq.heappush(self._queue, (schedule.next_run, station_id))
+
+    def _due(self, now: float) -> List[str]:
+        """Pop due stations, at most as many as there are free workers."""
+        due = []
+        with self._lock:
+            free = self.workers - len(self._in_flight)
+            while self._queue and self._queue[0][0] <= now and len(due) < free:
+                _, station_id = heapq.heappop(self._queue)
+                due.append(station_id)
+        return due
+
+    def _run(self, station_id: str) -> StationResult:
+        """
+        Run a station on a worker, followed by its cadence lookup, so the dispatch loop never
+        waits on the database. A failed lookup keeps the current interval.
+        """
+        result = self.runner(station_id)
+        if result.error:
+            return result
+        try:
+            return replace(result, cadence=self.cadence(station_id))
+        except Exception as e:
+            logger.warning(f"Cadence estimate failed for station {station_id}, keeping its interval: {e}")
+            return result
+
+    def _reschedule(self, result: StationResult, now: float) -> None:
+        schedule = self.stations[result.station_id]
+        if result.error:
+            schedule.failures += 1
+            delay = min(schedule.interval * 2 ** schedule.failures, self.max_interval)
+        else:
+            schedule.failures = 0
+            schedule.last_success = now
+            schedule.last_inserted = result.inserted
+            if result.cadence:
+                schedule.interval = min(max(result.cadence, self.min_interval), self.max_interval)
+            delay = schedule.interval
+        schedule.running = False
+        schedule.next_run = now + delay
+        with self._lock:
+            heapq.heappush(self._queue, (schedule.next_run, result.station_id))
+
+    def tick(self) -> int:
+        """
+        Reap finished runs, reschedule them and dispatch due stations to free workers.
+
+        Returns:
+            int: Number of stations dispatched.
+        """
+        now = self.clock()
+        with self._lock:
+            done = [f for f in self._in_flight if f.done()]
+            finished = [(f, self._in_flight.pop(f)) for f in done]
+        for future, station_id in finished:
+            try:
+                result = future.result()
+            except Exception as e:
+                result = StationResult(station_id, 0, 0.0, error=str(e))
+            self._reschedule(result, now)
+
+        due = self._due(now)
+        for station_id in due:
+            self.stations[station_id].running = True
+            future = self._executor.submit(self._run, station_id)
+            with self._lock:
+                self._in_flight[future] = station_id
+        return len(due)
+
+    def seconds_until_next(self) -> float:
+        """Time until the earliest queued station is due (0 if one is overdue)."""
+        with self._lock:
+            if not self._queue:
+                return self.max_interval
+            return max(self._queue[0][0] - self.clock(), 0.0)
+
+    def snapshot(self) -> Dict:
+        """
+        Current queue state: stations due but waiting for a worker (queue depth), runs in
+        flight, and per station its interval, lag behind schedule and last success time.
+        """
+        now = self.clock()
+        with self._lock:
+            queue_depth = sum(1 for next_run, _ in self._queue if next_run <= now)
+            in_flight = len(self._in_flight)
+        stations = {}
+        for station_id, schedule in self.stations.items():
+            lag = 0.0 if schedule.running else max(now - schedule.next_run, 0.0)
+            stations[station_id] = {
+                "interval_seconds": schedule.interval,
+                "lag_seconds": round(lag, 3),
+                "last_success": datetime.utcfromtimestamp(schedule.last_success).isoformat() if schedule.last_success else None,
+                "last_inserted": schedule.last_inserted,
+                "failures": schedule.failures,
+            }
+        return {"queue_depth": queue_depth, "in_flight": in_flight, "stations": stations}
+
+    def log_snapshot(self) -> None:
+        snapshot = self.snapshot()
+        lags = [s["lag_seconds"] for s in snapshot["stations"].values()]
+        logger.info(
+            f"Scheduler: {len(lags)} stations, queue depth {snapshot['queue_depth']}, "
+            f"in flight {snapshot['in_flight']}, max lag {max(lags, default=0):.1f}s"
+        )
+
+    def run_forever(
+        self,
+        stop: threading.Event,
+        status_every: float = 60.0,
+        poll: float = 1.0,
+        on_status: Optional[Callable[[], None]] = None
+    ) -> None:
+        """
+        Run until `stop` is set, logging a status line every `status_every` seconds and
+        calling `on_status` (eg. to export metrics) right after.
+        """
+        last_status = self.clock()
+        while not stop.is_set():
+            try:
+                self.tick()
+                if self.clock() - last_status >= status_every:
+                    last_status = self.clock()
+                    self.log_snapshot()
+                    if on_status is not None:
+                        on_status()
+            except Exception as e:
+                # A transient failure must not end the long-running loop, retry on the next poll
+                logger.error(f"Scheduler iteration failed: {e}")
+            self.sleep(min(poll, max(self.seconds_until_next(), 0.05)))
+
+    def shutdown(self) -> None:
+        """Wait for runs in flight and stop the worker pool."""
+        self._executor.shutdown(wait=True)
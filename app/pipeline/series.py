@@ -0,0 +1,152 @@
+from datetime import datetime, timedelta
+from typing import List, Optional, Sequence, Tuple, Type
+from sqlalchemy import Select, func, select
+import numpy as np
+
+from app.models.observation_rollup import RollupColumns
+from app.models.station import Station
+from app.models.weather_observation import WeatherObservation
+from app.pipeline.metrics import check_field, station_filter
+from app.pipeline.rollups import ROLLUPS, rollup_for_range
+
+# Default and maximum number of points per station
+DEFAULT_POINTS = 500
+MAX_POINTS = 10000
+
+# Bucket widths a series is snapped to, so buckets land on round times and hour/day
+# multiples can be read from the rollups
+BUCKET_STEPS = [timedelta(minutes=m) for m in (5, 10, 15, 30)] \
+    + [timedelta(hours=h) for h in (1, 2, 3, 6, 12)] \
+    + [timedelta(days=d) for d in (1, 2, 7)]
+
+METHODS = ("avg", "lttb")
+
+
+def bucket_step(start: datetime, end: datetime, points: int) -> timedelta:
+    """Smallest round bucket width that splits [start, end) into at most `points` buckets."""
+    if points < 1:
+        raise ValueError("points must be at least 1")
+    span = end - start
+    for step in BUCKET_STEPS:
+        if span <= step * points:
+            return step
+    days = -(-span // (timedelta(days=1) * points))  # ceil
+    return timedelta(days=days)
+
+
+def rollup_for_bucket(start: datetime, end: datetime, step: timedelta) -> Optional[Type[RollupColumns]]:
+    """
+    Coarsest rollup whose buckets each fall inside a single `step` bucket starting at
+    `start`, or None when the series has to be computed from raw observations.
+    """
+    model = rollup_for_range(start, end)
+    if model is ROLLUPS["day"] and step % timedelta(days=1):
+        model = ROLLUPS["hour"]
+    if model is None or step % timedelta(hours=1):
+        return None
+    return model
+
+
+def bucket_series_query(
+    field: str,
+    start: datetime,
+    end: datetime,
+    step: timedelta,
+    nws_ids: Optional[Sequence[str]] = None
+) -> Tuple[Select, str]:
+    """
+    Per-station `step` buckets of `field` over [start, end), binned from `start`, read from
+    the rollups when the range and step line up with them. Returns the query and its
+    source ("raw", "hourly" or "daily").
+
+    Rows are (nws_id, bucket_start, average, min, max, count), ordered by station and bucket.
+    """
+    check_field(field)
+    model = rollup_for_bucket(start, end, step)
+    if model is not None:
+        bucket = func.date_bin(step, model.bucket_start, start)
+        count = func.sum(getattr(model, f"{field}_count"))
+        columns = [
+            (func.sum(getattr(model, f"{field}_sum")) / func.nullif(count, 0)).label("average"),
+            func.min(getattr(model, f"{field}_min")).label("min"),
+            func.max(getattr(model, f"{field}_max")).label("max"),
+            count.label("count"),
+        ]
+        station_id, timestamp = model.station_id, model.bucket_start
+        source = "daily" if model is ROLLUPS["day"] else "hourly"
+    else:
+        column = getattr(WeatherObservation, field)
+        bucket = func.date_bin(step, WeatherObservation.timestamp, start)
+        columns = [
+            func.avg(column).label("average"),
+            func.min(column).label("min"),
+            func.max(column).label("max"),
+            func.count(column).label("count"),
+        ]
+        station_id, timestamp = WeatherObservation.station_id, WeatherObservation.timestamp
+        source = "raw"
+
+    stmt = select(Station.nws_id, bucket.label("bucket"), *columns)\
+        .join(Station, Station.id == station_id)\
+        .where(station_filter(station_id, nws_ids), timestamp >= start, timestamp < end)\
+        .group_by(Station.nws_id, bucket)\
+        .order_by(Station.nws_id, bucket)
+    return stmt, source
+
+
+def raw_series_query(field: str, start: datetime, end: datetime, nws_ids: Optional[Sequence[str]] = None) -> Select:
+    """
+    Non-null (nws_id, timestamp, value) observations of `field` over [start, end), ordered
+    by station and time, the input of `lttb`.
+    """
+    check_field(field)
+    column = getattr(WeatherObservation, field)
+    return select(Station.nws_id, WeatherObservation.timestamp, column)\
+        .join(Station, Station.id == WeatherObservation.station_id)\
+        .where(
+            station_filter(WeatherObservation.station_id, nws_ids),
+            WeatherObservation.timestamp >= start,
+            WeatherObservation.timestamp < end,
+            column.isnot(None),
+        )\
+        .order_by(Station.nws_id, WeatherObservation.timestamp)
+
+
+def lttb(x: np.ndarray, y: np.ndarray, points: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets decimation: indices of at most `points` samples of
+    (x, y) that preserve the visual shape of the series (peaks and dips survive, unlike
+    with bucket averages). Keeps the first and last samples.
+    """
+    n = len(x)
+    if points >= n:
+        return np.arange(n)
+    if points < 3:
+        raise ValueError("lttb needs a budget of at least 3 points")
+
+    # Inner samples split into points - 2 buckets, one sample kept per bucket
+    edges = np.linspace(1, n - 1, points - 1).astype(int)
+    selected = np.empty(points, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+
+    previous = 0
+    for i in range(points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Third vertex: average of the next bucket (the last sample for the last bucket)
+        next_lo, next_hi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x, avg_y = x[next_lo:next_hi].mean(), y[next_lo:next_hi].mean()
+        # Twice the triangle area with the previously selected sample, for each candidate
+        areas = np.abs(
+            (x[previous] - avg_x) * (y[lo:hi] - y[previous])
+            - (x[previous] - x[lo:hi]) * (avg_y - y[previous])
+        )
+        previous = lo + int(np.argmax(areas))
+        selected[i + 1] = previous
+    return selected
+
+
+def downsample(timestamps: List[datetime], values: List[float], points: int) -> List[Tuple[datetime, float]]:
+    """LTTB over one station's (timestamp, value) samples, on NumPy arrays."""
+    x = np.array([(t - timestamps[0]).total_seconds() for t in timestamps], dtype=np.float64)
+    y = np.asarray(values, dtype=np.float64)
+    return [(timestamps[i], values[i]) for i in lttb(x, y, points)]
@@ -0,0 +1,224 @@
+from typing import Callable, List, Optional, Sequence, Tuple
+from sqlalchemy import Select, select
+from sqlalchemy.orm import Session
+import heapq
+import os
+import time
+
+import numpy as np
+
+from app.models.station import Station
+from app.pipeline.station_cache import StationRef
+
+# Mean Earth radius, distances are great-circle distances on a sphere
+EARTH_RADIUS_KM = 6371.0088
+
+# How long the in-memory index is served before being rebuilt from the stations table
+STATION_INDEX_TTL = float(os.getenv("STATION_INDEX_TTL_SECONDS", "300"))
+
+# Points per KD-tree leaf, scanned with one vectorized distance computation
+LEAF_SIZE = 32
+
+# Stations with coordinates, the rows the index is built from
+STATION_INDEX_QUERY: Select = select(
+    Station.id, Station.nws_id, Station.name, Station.timezone, Station.latitude, Station.longitude
+).where(Station.latitude.isnot(None), Station.longitude.isnot(None)).order_by(Station.id)
+
+
+def check_point(latitude: float, longitude: float) -> None:
+    """Raise ValueError unless (latitude, longitude) are valid WGS84 degrees."""
+    if not -90 <= latitude <= 90:
+        raise ValueError("latitude must be between -90 and 90")
+    if not -180 <= longitude <= 180:
+        raise ValueError("longitude must be between -180 and 180")
+
+
+def unit_vectors(latitudes, longitudes) -> np.ndarray:
+    """Points on the unit sphere, where chord length grows with great-circle distance."""
+    lat, lon = np.radians(np.asarray(latitudes, dtype=np.float64)), np.radians(np.asarray(longitudes, dtype=np.float64))
+    return np.column_stack((np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)))
+
+
+def chord_to_km(chord_squared: np.ndarray) -> np.ndarray:
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(np.sqrt(chord_squared) / 2, 0, 1))
+
+
+def km_to_chord(km: float) -> float:
+    return 2 * np.sin(min(km / EARTH_RADIUS_KM, np.pi) / 2)
+
+
+class StationIndex:
+    """
+    Immutable in-memory spatial index over station coordinates: a KD-tree over unit
+    vectors for nearest-K and radius lookups, and latitude-sorted arrays for bounding
+    boxes. Rebuilt from the stations table, so it works without PostGIS.
+    """
+
+    def __init__(self, stations: Sequence[StationRef]):
+        points = unit_vectors([s.latitude for s in stations], [s.longitude for s in stations]).reshape(-1, 3)
+        self._order = np.arange(len(stations))
+        self._nodes: List[Tuple[int, int, int, float, int, int]] = []
+        self._points = points
+        if len(stations):
+            self._build(0, len(stations))
+        # Leaves become contiguous slices
+        self._points = points[self._order]
+        self.stations = [stations[i] for i in self._order]
+
+        latitudes = np.array([s.latitude for s in self.stations], dtype=np.float64)
+        self._by_latitude = np.argsort(latitudes, kind="stable")
+        self._sorted_latitudes = latitudes[self._by_latitude]
+        self._longitudes = np.array([s.longitude for s in self.stations], dtype=np.float64)
+
+    def __len__(self) -> int:
+        return len(self.stations)
+
+    def _build(self, start: int, end: int) -> int:
+        """Split [start, end) of `_order` on the widest dimension at the median, returns the node id."""
+        node = len(self._nodes)
+        self._nodes.append((start, end, -1, 0.0, -1, -1))
+        if end - start <= LEAF_SIZE:
+            return node
+        indices = self._order[start:end]
+        points = self._points[indices]
+        dim = int(np.argmax(points.max(axis=0) - points.min(axis=0)))
+        middle = (end - start) // 2
+        partition = np.argpartition(points[:, dim], middle)
+        self._order[start:end] = indices[partition]
+        split = float(points[partition[middle], dim])
+        left = self._build(start, start + middle)
+        right = self._build(start + middle, end)
+        self._nodes[node] = (start, end, dim, split, left, right)
+        return node
+
+    def nearest(self, latitude: float, longitude: float, k: int = 10, max_km: Optional[float] = None) -> List[Tuple[StationRef, float]]:
+        """
+        The `k` stations closest to a point, optionally no further than `max_km`.
+
+        Returns:
+            List[Tuple[StationRef, float]]: Stations with their distance in km, closest first.
+        """
+        check_point(latitude, longitude)
+        if k < 1:
+            raise ValueError("k must be at least 1")
+        if max_km is not None and max_km < 0:
+            raise ValueError("max_km must not be negative")
+        if not self._nodes:
+            return []
+        query = unit_vectors([latitude], [longitude])[0]
+        bound = km_to_chord(max_km) ** 2 if max_km is not None else np.inf
+        best: List[Tuple[float, int]] = []  # max-heap of (-chord², position)
+
+        def worst() -> float:
+            return -best[0][0] if len(best) == k else bound
+
+        def visit(node: int) -> None:
+            start, end, dim, split, left, right = self._nodes[node]
+            if dim < 0:
+                distances = ((self._points[start:end] - query) ** 2).sum(axis=1)
+                for i in np.argsort(distances)[:k]:
+                    distance = float(distances[i])
+                    if distance > worst():
+                        break
+                    if len(best) < k:
+                        heapq.heappush(best, (-distance, start + int(i)))
+                    else:
+                        heapq.heapreplace(best, (-distance, start + int(i)))
+                return
+            # Closer half first, the other one only if it can still hold a closer station
+            offset = query[dim] - split
+            near, far = (left, right) if offset < 0 else (right, left)
+            visit(near)
+            if offset * offset <= worst():
+                visit(far)
+
+        visit(0)
+        found = sorted((-d, i) for d, i in best)
+        kilometers = chord_to_km(np.array([d for d, _ in found]))
+        return [(self.stations[i], float(km)) for (_, i), km in zip(found, kilometers)]
+
+    def within_radius(self, latitude: float, longitude: float, radius_km: float) -> List[Tuple[StationRef, float]]:
+        """
+        Stations no further than `radius_km` from a point.
+
+        Returns:
+            List[Tuple[StationRef, float]]: Stations with their distance in km, closest first.
+        """
+        check_point(latitude, longitude)
+        if radius_km < 0:
+            raise ValueError("radius_km must not be negative")
+        if not self._nodes:
+            return []
+        query = unit_vectors([latitude], [longitude])[0]
+        bound = km_to_chord(radius_km) ** 2
+        positions, distances = [], []
+
+        def visit(node: int) -> None:
+            start, end, dim, split, left, right = self._nodes[node]
+            if dim < 0:
+                leaf = ((self._points[start:end] - query) ** 2).sum(axis=1)
+                inside = np.nonzero(leaf <= bound)[0]
+                positions.extend(start + inside)
+                distances.extend(leaf[inside])
+                return
+            offset = query[dim] - split
+            if offset < 0 or offset * offset <= bound:
+                visit(left)
+            if offset >= 0 or offset * offset <= bound:
+                visit(right)
+
+        visit(0)
+        order = np.argsort(distances, kind="stable")
+        kilometers = chord_to_km(np.asarray(distances)[order])
+        return [(self.stations[positions[i]], float(km)) for i, km in zip(order, kilometers)]
+
+    def within_bbox(self, south: float, west: float, north: float, east: float) -> List[StationRef]:
+        """
+        Stations inside a latitude/longitude box, ordered by NWS ID. A box with west > east
+        crosses the antimeridian.
+        """
+        check_point(south, west)
+        check_point(north, east)
+        if south > north:
+            raise ValueError("south must not be above north")
+        lo = np.searchsorted(self._sorted_latitudes, south, side="left")
+        hi = np.searchsorted(self._sorted_latitudes, north, side="right")
+        candidates = self._by_latitude[lo:hi]
+        longitudes = self._longitudes[candidates]
+        inside = (longitudes >= west) & (longitudes <= east) if west <= east \
+            else (longitudes >= west) | (longitudes <= east)
+        return sorted((self.stations[i] for i in candidates[inside]), key=lambda s: s.nws_id)
+
+
+def station_refs(rows: Sequence[tuple]) -> List[StationRef]:
+    """StationRefs from rows of STATION_INDEX_QUERY."""
+    return [StationRef(*row) for row in rows]
+
+
+class StationIndexCache:
+    """Holds the current StationIndex, served until it is older than `ttl` or invalidated."""
+
+    def __init__(self, ttl: float = STATION_INDEX_TTL, clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.clock = clock
+        self._index: Optional[StationIndex] = None
+        self._expires = 0.0
+
+    def get(self) -> Optional[StationIndex]:
+        return self._index if self._index is not None and self._expires > self.clock() else None
+
+    def put(self, index: StationIndex) -> StationIndex:
+        self._index, self._expires = index, self.clock() + self.ttl
+        return index
+
+    def invalidate(self) -> None:
+        self._index = None
+
+
+def load_station_index(db: Session) -> StationIndex:
+    """StationIndex of every station with coordinates, through the process-wide cache."""
+    return station_index_cache.get() or station_index_cache.put(StationIndex(station_refs(db.execute(STATION_INDEX_QUERY).all())))
+
+
+# Process-wide index shared by the API routes and the seeder
+station_index_cache = StationIndexCache()
@@ -0,0 +1,177 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert
+import threading
+import time
+import os
+
+from app.models.station import Station
+from app.pipeline.nws_api_functions import NWSRequestError, try_validate_station
+from app.utils.logging import get_logger
+
+logger = get_logger()
+
+# How long known stations are trusted before being re-read from the DB, and how long
+# unknown station IDs are remembered as invalid before asking the API again
+STATION_CACHE_TTL = float(os.getenv("STATION_CACHE_TTL_SECONDS", "3600"))
+STATION_NEGATIVE_TTL = float(os.getenv("STATION_NEGATIVE_TTL_SECONDS", "86400"))
+
+
+@dataclass(frozen=True)
+class StationRef:
+    """Detached snapshot of a stored station, safe to share across sessions and threads."""
+    id: int
+    nws_id: str
+    name: str
+    timezone: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+
+    @classmethod
+    def from_model(cls, station: Station) -> "StationRef":
+        return cls(station.id, station.nws_id, station.name, station.timezone, station.latitude, station.longitude)
+
+
+def station_row(station_id: str, metadata: dict) -> dict:
+    """Column values for a new station from its NWS metadata."""
+    return {
+        "nws_id": station_id,
+        "name": metadata.get("name"),
+        "timezone": metadata.get("timeZone"),
+        "latitude": metadata.get("latitude"),
+        "longitude": metadata.get("longitude"),
+    }
+
+
+class StationCache:
+    """
+    In-process cache of nws_id -> StationRef with TTL-based refresh. Invalid station IDs
+    are cached as None so they are not re-validated over the network every cycle.
+    """
+
+    def __init__(
+        self,
+        ttl: float = STATION_CACHE_TTL,
+        negative_ttl: float = STATION_NEGATIVE_TTL,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[Optional[StationRef], float]] = {}
+
+    def lookup(self, nws_id: str, count: bool = True) -> Tuple[bool, Optional[StationRef]]:
+        """
+        Returns:
+            Tuple[bool, Optional[StationRef]]: Whether a fresh entry exists, and the station
+            (None for a cached invalid ID).
+        """
+        with self._lock:
+            entry = self._entries.get(nws_id)
+            fresh = entry is not None and entry[1] > self.clock()
+            if count:
+                if fresh:
+                    self.hits += 1
+                else:
+                    self.misses += 1
+            return (True, entry[0]) if fresh else (False, None)
+
+    def put(self, station: StationRef) -> None:
+        with self._lock:
+            self._entries[station.nws_id] = (station, self.clock() + self.ttl)
+
+    def put_invalid(self, nws_id: str) -> None:
+        with self._lock:
+            self._entries[nws_id] = (None, self.clock() + self.negative_ttl)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def warm(self, db: Session, nws_ids: Optional[Iterable[str]] = None) -> int:
+        """
+        Load stations from the DB in one query, all of them or only `nws_ids`.
+
+        Returns:
+            int: Number of stations loaded.
+        """
+        query = db.query(Station)
+        if nws_ids is not None:
+            query = query.filter(Station.nws_id.in_(list(nws_ids)))
+        stations = [StationRef.from_model(s) for s in query.all()]
+        for station in stations:
+            self.put(station)
+        return len(stations)
+
+    def get_or_create(self, db: Session, nws_id: str) -> Optional[StationRef]:
+        """
+        Return a station from the cache, the DB or, as a last resort, the NWS API.
+
+        Returns:
+            Optional[StationRef]: The stored station, or None if the NWS API does not know it.
+        """
+        return self.resolve(db, [nws_id]).get(nws_id)
+
+    def resolve(self, db: Session, nws_ids: List[str], concurrency: int = 8) -> Dict[str, Optional[StationRef]]:
+        """
+        Resolve many station IDs at once: cache hits first, then one DB query for the misses,
+        then parallel API validation for IDs unknown to the DB, whose stations are inserted
+        with a single bulk upsert.
+
+        Returns:
+            Dict[str, Optional[StationRef]]: Station per requested ID, None for invalid IDs.
+        """
+        resolved: Dict[str, Optional[StationRef]] = {}
+        missing = []
+        for nws_id in dict.fromkeys(nws_ids):
+            fresh, station = self.lookup(nws_id)
+            if fresh:
+                resolved[nws_id] = station
+            else:
+                missing.append(nws_id)
+        if not missing:
+            return resolved
+
+        # One query for everything the DB already knows
+        self.warm(db, missing)
+        unknown = []
+        for nws_id in missing:
+            fresh, station = self.lookup(nws_id, count=False)
+            if fresh:
+                resolved[nws_id] = station
+            else:
+                unknown.append(nws_id)
+        if not unknown:
+            return resolved
+
+        # Validate new IDs over the network in parallel
+        with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(unknown)))) as executor:
+            metadata = dict(zip(unknown, executor.map(try_validate_station, unknown)))
+        # The API could not answer for these, they are neither stored nor remembered as invalid
+        unavailable = {nws_id for nws_id, meta in metadata.items() if isinstance(meta, NWSRequestError)}
+
+        rows = [station_row(nws_id, meta) for nws_id, meta in metadata.items() if meta and nws_id not in unavailable]
+        if rows:
+            db.execute(insert(Station).values(rows).on_conflict_do_nothing(index_elements=["nws_id"]))
+            db.commit()
+            self.warm(db, [row["nws_id"] for row in rows])
+            logger.info(f"Added {len(rows)} new stations")
+
+        for nws_id in unknown:
+            fresh, station = self.lookup(nws_id, count=False)
+            if not fresh and nws_id in unavailable:
+                logger.error(f"Station {nws_id} could not be validated: {metadata[nws_id]}")
+            elif not fresh:
+                logger.error(f"Station {nws_id} not valid, please check that the station ID is correct.")
+                self.put_invalid(nws_id)
+            resolved[nws_id] = station
+        return resolved
+
+
+# Process-wide cache shared by the pipeline, seeder and scheduler
+station_cache = StationCache()
@@ -0,0 +1,37 @@
+import argparse
+from sqlalchemy.orm import Session
+from app.db.session import SessionLocal
+from app.models.station import Station
+from app.models.weather_observation import WeatherObservation  # noqa: F401, registers the Station.observations target
+from app.pipeline.rollups import rebuild_rollups
+from app.utils.logging import get_logger
+
+logger = get_logger()
+
+
+def main():
+    # Parse rebuild arguments
+    parser = argparse.ArgumentParser(description="Maintain the hourly and daily observation rollups.")
+    parser.add_argument("--rebuild", action="store_true", help="Recompute rollups from all stored observations.")
+    parser.add_argument("--station", type=str, help="Only rebuild this station ID.")
+    args = parser.parse_args()
+
+    if not args.rebuild:
+        parser.print_help()
+        return
+
+    db: Session = SessionLocal()
+    station_id = None
+    if args.station:
+        station = db.query(Station).filter_by(nws_id=args.station).first()
+        if not station:
+            logger.error(f"Station {args.station} not found in the database.")
+            db.close()
+            return
+        station_id = station.id
+
+    rebuild_rollups(db, station_id=station_id)
+    db.close()
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,42 @@
-from typing import Tuple
-from datetime import datetime, timedelta
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import func, text, select
+from typing import Awaitable, Callable, List, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+from itertools import groupby
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import Executable, func, select
 
-from app.db.session import get_db
+from app.db.async_session import AsyncSessionLocal, get_async_db
 from app.models.weather_observation import WeatherObservation
 from app.models.station import Station
+from app.pipeline.analytics import analytics_query, get_stat
+from app.pipeline.export import FORMATS, check_columns, check_format, export_filename, export_query, stream_export
+from app.pipeline.metrics import FIELD_UNITS, check_field, grouped_average_query, grouped_max_delta_query
+from app.pipeline.rollups import average_from_totals, rollup_average_query, rollup_for_range
+from app.pipeline.series import DEFAULT_POINTS, MAX_POINTS, METHODS, bucket_series_query, bucket_step, downsample, raw_series_query
+from app.pipeline.spatial import STATION_INDEX_QUERY, StationIndex, station_index_cache, station_refs
+from app.pipeline.station_cache import StationRef
+from app.utils.cache import render_json, response_cache
+from app.utils.metrics import registry
 
 router = APIRouter()
 
+# Sliding window responses are cached this long, the window end is truncated to the minute
+SLIDING_WINDOW_TTL = 60
 
-def get_first_station(db: Session) -> Station:
+# Multi-station responses stream as NDJSON above this many stations (and for "all")
+NDJSON_MIN_STATIONS = 50
+
+# Most stations a nearest-station lookup returns
+MAX_NEAREST = 1000
+
+
+async def get_first_station(db: AsyncSession) -> Station:
     """
     Fetch the first-added weather station from the database.
     """
-    station = db.query(Station).order_by(Station.id.asc()).first()
+    station = (await db.execute(select(Station).order_by(Station.id.asc()).limit(1))).scalar()
     if not station:
         raise HTTPException(status_code=404, detail="No stations found in the database.")
     return station
@@ -33,70 +54,469 @@ def get_last_week_range() -> Tuple[datetime, datetime]:
     return start_dt, end_dt
 
 
+async def average_observed(db: AsyncSession, station_id: int, field: str, start_dt: datetime, end_dt: datetime):
+    """
+    Average of an observation field over [start_dt, end_dt). Reads the hourly/daily rollups
+    when the range lines up with their buckets, and scans raw observations otherwise.
+    """
+    if rollup_for_range(start_dt, end_dt) is not None:
+        total, count = (await db.execute(rollup_average_query(station_id, field, start_dt, end_dt))).one()
+        return average_from_totals(total, count)
+
+    column = getattr(WeatherObservation, field)
+    return (await db.execute(
+        select(func.avg(column)).where(
+            WeatherObservation.station_id == station_id,
+            WeatherObservation.timestamp >= start_dt,
+            WeatherObservation.timestamp < end_dt
+        )
+    )).scalar()
+
+
+async def cache_call(method: Callable, *args):
+    """
+    Call a response cache method without stalling the event loop: on a worker thread when
+    the backend does blocking network I/O (redis-py), inline for the in-process LRU.
+    """
+    if getattr(response_cache.backend, "blocking", True):
+        return await asyncio.to_thread(method, *args)
+    return method(*args)
+
+
+async def cached_json(
+    request: Request,
+    key: str,
+    compute: Callable[[], Awaitable[dict]],
+    ttl: Optional[float] = None
+) -> Response:
+    """
+    Serve a JSON payload through the response cache. Clients get an ETag and are told to
+    revalidate (no-cache), which is answered with a bodyless 304 while the data is unchanged.
+    """
+    cached = await cache_call(response_cache.lookup, key)
+    body, etag = cached if cached is not None else await cache_call(response_cache.store, key, await compute(), ttl)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
 @router.get("/metrics/avg_temperature_last_week")
-def avg_temp_last_week(db: Session = Depends(get_db)):
+async def avg_temp_last_week(request: Request, db: AsyncSession = Depends(get_async_db)):
     """
     Calculate the average observed temperature for the previous week (monday - sunday)
     for the first-added station only.
     """
 
     # Get params
-    station = get_first_station(db)
+    station = await get_first_station(db)
     start_dt, end_dt = get_last_week_range()
 
-    # Execute query
-    result = db.query(func.avg(WeatherObservation.temperature))\
-        .filter(
-            WeatherObservation.station_id == station.id,
-            WeatherObservation.timestamp >= start_dt,
-            WeatherObservation.timestamp < end_dt
-        ).scalar()
+    async def compute() -> dict:
+        # Execute query (served from the daily rollups, last week is day-aligned)
+        result = await average_observed(db, station.id, "temperature", start_dt, end_dt)
 
-    return {
-        "station_id": station.nws_id,
-        "last_week_monday": start_dt.isoformat(),
-        "last_week_sunday": end_dt.isoformat(),
-        "average_temperature": f"{round(result, 2)} °C" if result else None
-    }
+        return {
+            "station_id": station.nws_id,
+            "last_week_monday": start_dt.isoformat(),
+            "last_week_sunday": end_dt.isoformat(),
+            "average_temperature": f"{round(result, 2)} °C" if result else None
+        }
+
+    key = await cache_call(response_cache.key, "avg_temperature_last_week", station.nws_id, start_dt, end_dt)
+    return await cached_json(request, key, compute)
 
 
 @router.get("/metrics/max_wind_speed_delta")
-def max_wind_speed_delta(db: Session = Depends(get_db)):
+async def max_wind_speed_delta(request: Request, db: AsyncSession = Depends(get_async_db)):
     """
     Find the maximum wind speed change (delta) between consecutive observations
     for the first-added station in the last 7 days.
     """
     # Get params
-    station = get_first_station(db)
-    station_id = station.id
+    station = await get_first_station(db)
 
-    end_dt = datetime.utcnow()
+    end_dt = datetime.utcnow().replace(second=0, microsecond=0)
     start_dt = end_dt - timedelta(days=7)
 
-    # Create raw SQL query (using LAG for performance)
-    sql = text("""
-        SELECT MAX(ABS(wind_speed - prev_wind_speed)) AS max_delta
-        FROM (
-            SELECT
-                wind_speed,
-                LAG(wind_speed) OVER (ORDER BY timestamp) AS prev_wind_speed
-            FROM weather_observations
-            WHERE station_id = :station_id
-              AND timestamp BETWEEN :start AND :end
-        ) AS deltas
-        WHERE prev_wind_speed IS NOT NULL
-    """)
-
-    # Execute query
-    result = db.execute(sql, {
-        "station_id": station_id,
-        "start": start_dt,
-        "end": end_dt
-    }).scalar()
-
-    return {
-        "station_id": station.nws_id,
+    async def compute() -> dict:
+        # Execute query (LAG over consecutive observations, see app.pipeline.analytics)
+        stmt = analytics_query("wind_speed", "max_delta", start_dt, end_dt, [station.nws_id])
+        _, result, _ = (await db.execute(stmt)).one()
+
+        return {
+            "station_id": station.nws_id,
+            "start": start_dt.isoformat(),
+            "end": end_dt.isoformat(),
+            "max_wind_speed_delta_kmh": f"{round(result, 2)} km/h" if result else None
+        }
+
+    key = await cache_call(response_cache.key, "max_wind_speed_delta", station.nws_id, start_dt, end_dt)
+    return await cached_json(request, key, compute, ttl=SLIDING_WINDOW_TTL)
+
+
+def parse_stations(stations: str) -> Optional[List[str]]:
+    """
+    Comma separated NWS station IDs from a query parameter, None for "all".
+    """
+    if stations.strip().lower() == "all":
+        return None
+    nws_ids = list(dict.fromkeys(s.strip() for s in stations.split(",") if s.strip()))
+    if not nws_ids:
+        raise HTTPException(status_code=400, detail="Pass station IDs separated by commas, or 'all'.")
+    return nws_ids
+
+
+def parse_range(start: Optional[datetime], end: Optional[datetime]) -> Tuple[datetime, datetime]:
+    """
+    Naive UTC range from optional query parameters, the last 7 days by default.
+    """
+    def naive_utc(dt: datetime) -> datetime:
+        return dt.astimezone(timezone.utc).replace(tzinfo=None) if dt.tzinfo else dt
+
+    end_dt = naive_utc(end) if end else datetime.utcnow().replace(second=0, microsecond=0)
+    start_dt = naive_utc(start) if start else end_dt - timedelta(days=7)
+    if start_dt >= end_dt:
+        raise HTTPException(status_code=400, detail="start must be before end.")
+    return start_dt, end_dt
+
+
+async def station_metrics(
+    db: AsyncSession,
+    stmt: Executable,
+    nws_ids: Optional[List[str]],
+    metric: str,
+    field: str,
+    start_dt: datetime,
+    end_dt: datetime,
+    output: Optional[str],
+    unit: Optional[str] = None
+) -> Response:
+    """
+    Run a grouped per-station metric query and return one row per station, as a JSON
+    document for small station sets or streamed as NDJSON from a server-side cursor.
+    """
+    def row(nws_id: str, value, count) -> dict:
+        return {
+            "station_id": nws_id,
+            "field": field,
+            metric: round(value, 2) if value is not None else None,
+            "unit": unit or FIELD_UNITS[field],
+            "count": int(count or 0),
+        }
+
+    if output is None:
+        output = "ndjson" if nws_ids is None or len(nws_ids) > NDJSON_MIN_STATIONS else "json"
+    if output not in ("json", "ndjson"):
+        raise HTTPException(status_code=400, detail="format must be 'json' or 'ndjson'.")
+
+    if output == "ndjson":
+        async def lines():
+            # Own session, the request one is closed once the response starts streaming
+            async with AsyncSessionLocal() as stream_db:
+                result = await stream_db.stream(stmt)
+                async for nws_id, value, count in result:
+                    yield render_json(row(nws_id, value, count)) + b"\n"
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    rows = [row(*r) for r in (await db.execute(stmt)).all()]
+    if not rows:
+        raise HTTPException(status_code=404, detail="None of the requested stations were found.")
+    return Response(content=render_json({
+        "start": start_dt.isoformat(),
+        "end": end_dt.isoformat(),
+        "stations": rows,
+    }), media_type="application/json")
+
+
+@router.get("/metrics/average")
+async def average_metric(
+    stations: str = "all",
+    field: str = "temperature",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    format: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Average of a field per station over [start, end) (last 7 days by default), for
+    comma separated station IDs or "all", computed with a single grouped query.
+    """
+    nws_ids = parse_stations(stations)
+    start_dt, end_dt = parse_range(start, end)
+    try:
+        stmt = grouped_average_query(check_field(field), start_dt, end_dt, nws_ids)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return await station_metrics(db, stmt, nws_ids, "average", field, start_dt, end_dt, format)
+
+
+@router.get("/metrics/max_delta")
+async def max_delta_metric(
+    stations: str = "all",
+    field: str = "wind_speed",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    format: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Maximum change of a field between consecutive observations per station over
+    [start, end] (last 7 days by default), for comma separated station IDs or "all".
+    """
+    nws_ids = parse_stations(stations)
+    start_dt, end_dt = parse_range(start, end)
+    try:
+        stmt = grouped_max_delta_query(check_field(field), start_dt, end_dt, nws_ids)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return await station_metrics(db, stmt, nws_ids, "max_delta", field, start_dt, end_dt, format)
+
+
+@router.get("/metrics/{field}/{stat}")
+async def field_stat(
+    field: str,
+    stat: str,
+    stations: str = "all",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    window: int = 12,
+    interval: Optional[timedelta] = None,
+    q: float = 0.5,
+    format: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Any statistic of any measured field per station over [start, end] (last 7 days by
+    default), computed in Postgres in a single window pass. Scalar stats (mean, min, max,
+    percentile, max_delta, mean_delta, max_rate_per_hour) return one row per station,
+    series stats (delta, rate_per_hour, rolling_mean/min/max over `window` observations
+    or an `interval`) stream one NDJSON row per observation.
+    """
+    nws_ids = parse_stations(stations)
+    start_dt, end_dt = parse_range(start, end)
+    try:
+        stmt = analytics_query(field, stat, start_dt, end_dt, nws_ids, window=window, interval=interval, q=q)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if not get_stat(stat).series:
+        unit = get_stat(stat).unit.format(unit=FIELD_UNITS[field])
+        return await station_metrics(db, stmt, nws_ids, stat, field, start_dt, end_dt, format, unit)
+    if format not in (None, "ndjson"):
+        raise HTTPException(status_code=400, detail="Series stats are only available as NDJSON.")
+
+    async def lines():
+        # Own session, the request one is closed once the response starts streaming
+        async with AsyncSessionLocal() as stream_db:
+            result = await stream_db.stream(stmt)
+            async for nws_id, timestamp, value in result:
+                yield render_json({
+                    "station_id": nws_id,
+                    "timestamp": timestamp.isoformat(),
+                    stat: round(value, 2) if value is not None else None,
+                }) + b"\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@router.get("/observations/export")
+async def export_observations(
+    stations: str = "all",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    columns: Optional[str] = None,
+    format: str = "parquet"
+):
+    """
+    Raw observations of comma separated station IDs or "all" over [start, end) (last 7
+    days by default), ordered by station and time, streamed in chunks from a server-side
+    cursor as Parquet, Arrow IPC stream ("arrow") or CSV. `columns` projects a comma
+    separated subset of station_id, timestamp and the measured fields.
+    """
+    nws_ids = parse_stations(stations)
+    start_dt, end_dt = parse_range(start, end)
+    try:
+        output = check_format(format)
+        selected = check_columns([c.strip() for c in columns.split(",") if c.strip()] if columns else None)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    stmt = export_query(selected, start_dt, end_dt, nws_ids)
+
+    async def chunks():
+        # Own session, the request one is closed once the response starts streaming
+        async with AsyncSessionLocal() as stream_db:
+            async for chunk in stream_export(stream_db, stmt, selected, output):
+                yield chunk
+
+    filename = export_filename(nws_ids, start_dt, end_dt, output)
+    return StreamingResponse(chunks(), media_type=FORMATS[output][0],
+                             headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+
+@router.get("/observations/series")
+async def observation_series(
+    stations: str,
+    field: str = "temperature",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    points: int = DEFAULT_POINTS,
+    method: str = "avg",
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Time series of a field per station over [start, end) (last 7 days by default),
+    downsampled server-side to at most `points` points per station for charting:
+    - avg: averages (with min, max and count) over round time buckets, computed in
+      Postgres and read from the hourly/daily rollups when the buckets allow.
+    - lttb: Largest-Triangle-Three-Buckets selection of raw observations, which keeps
+      peaks and dips that averaging flattens.
+    """
+    nws_ids = parse_stations(stations)
+    start_dt, end_dt = parse_range(start, end)
+    if method not in METHODS:
+        raise HTTPException(status_code=400, detail=f"method must be one of: {', '.join(METHODS)}.")
+    if not 3 <= points <= MAX_POINTS:
+        raise HTTPException(status_code=400, detail=f"points must be between 3 and {MAX_POINTS}.")
+    try:
+        check_field(field)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if method == "avg":
+        step = bucket_step(start_dt, end_dt, points)
+        stmt, source = bucket_series_query(field, start_dt, end_dt, step, nws_ids)
+        rows = (await db.execute(stmt)).all()
+        series = {
+            nws_id: [{
+                "timestamp": bucket.isoformat(),
+                "average": round(average, 2) if average is not None else None,
+                "min": low,
+                "max": high,
+                "count": int(count or 0),
+            } for _, bucket, average, low, high, count in group]
+            for nws_id, group in groupby(rows, key=lambda r: r[0])
+        }
+    else:
+        step, source = None, "raw"
+        rows = (await db.execute(raw_series_query(field, start_dt, end_dt, nws_ids))).all()
+        series = {}
+        for nws_id, group in groupby(rows, key=lambda r: r[0]):
+            _, timestamps, values = zip(*group)
+            series[nws_id] = [
+                {"timestamp": timestamp.isoformat(), "value": value}
+                for timestamp, value in downsample(list(timestamps), list(values), points)
+            ]
+
+    if not series:
+        raise HTTPException(status_code=404, detail="No observations found for the requested stations and range.")
+    return Response(content=render_json({
         "start": start_dt.isoformat(),
         "end": end_dt.isoformat(),
-        "max_wind_speed_delta_kmh": f"{round(result, 2)} km/h" if result else None
+        "field": field,
+        "unit": FIELD_UNITS[field],
+        "method": method,
+        "step_seconds": int(step.total_seconds()) if step else None,
+        "source": source,
+        "stations": [{"station_id": nws_id, "points": values} for nws_id, values in series.items()],
+    }), media_type="application/json")
+
+
+async def get_station_index(db: AsyncSession) -> StationIndex:
+    """
+    The in-memory spatial index of stations, rebuilt from the stations table once it
+    expires. The build runs in a thread so it does not block the event loop.
+    """
+    index = station_index_cache.get()
+    if index is None:
+        rows = (await db.execute(STATION_INDEX_QUERY)).all()
+        index = station_index_cache.put(await asyncio.to_thread(StationIndex, station_refs(rows)))
+    return index
+
+
+def station_json(station: StationRef, distance_km: Optional[float] = None) -> dict:
+    row = {
+        "station_id": station.nws_id,
+        "name": station.name,
+        "latitude": station.latitude,
+        "longitude": station.longitude,
     }
+    if distance_km is not None:
+        row["distance_km"] = round(distance_km, 3)
+    return row
+
+
+@router.get("/stations/nearest")
+async def nearest_stations(
+    lat: float,
+    lon: float,
+    k: int = 10,
+    max_km: Optional[float] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    The `k` stations closest to a point (great-circle distance), optionally within `max_km`.
+    """
+    if not 1 <= k <= MAX_NEAREST:
+        raise HTTPException(status_code=400, detail=f"k must be between 1 and {MAX_NEAREST}.")
+    index = await get_station_index(db)
+    try:
+        found = index.nearest(lat, lon, k, max_km)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return Response(content=render_json({"stations": [station_json(s, km) for s, km in found]}), media_type="application/json")
+
+
+@router.get("/stations/within")
+async def stations_within(
+    lat: float,
+    lon: float,
+    radius_km: float,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Stations no further than `radius_km` from a point, closest first.
+    """
+    index = await get_station_index(db)
+    try:
+        found = index.within_radius(lat, lon, radius_km)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return Response(content=render_json({"stations": [station_json(s, km) for s, km in found]}), media_type="application/json")
+
+
+@router.get("/stations/bbox")
+async def stations_in_bbox(
+    south: float,
+    west: float,
+    north: float,
+    east: float,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Stations inside a latitude/longitude box, west > east for boxes crossing the antimeridian.
+    """
+    index = await get_station_index(db)
+    try:
+        found = index.within_bbox(south, west, north, east)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return Response(content=render_json({"stations": [station_json(s) for s in found]}), media_type="application/json")
+
+
+@router.get("/internal/cache")
+async def cache_stats():
+    """
+    Hit / miss / invalidation counters of the response cache in this process.
+    """
+    return response_cache.stats()
+
+
+@router.get("/internal/metrics")
+async def metrics():
+    """
+    Metrics of this process in the Prometheus text format: pipeline stage timings, rows,
+    NWS HTTP statuses and bytes (when ingestion runs in this process) and DB pool usage.
+    """
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
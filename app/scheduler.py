@@ -0,0 +1,53 @@
+import argparse
+import signal
+import threading
+from app.db.session import SessionLocal
+from app.pipeline.concurrent_ingest import prepare_stations
+from app.pipeline.scheduler import Scheduler
+from app.seeder import add_station_arguments, check_station_arguments, collect_station_ids, test_stations
+from app.utils.logging import get_logger
+from app.utils.metrics import METRICS_FILE, METRICS_PUSH_URL, export_metrics, registry
+
+logger = get_logger()
+
+
+def main():
+    # Parse station selection and worker pool arguments
+    parser = argparse.ArgumentParser(description="Continuously ingest weather stations on their reporting cadence.")
+    add_station_arguments(parser, verb="schedule")
+    parser.add_argument("--workers", type=int, default=8, help="Max stations ingested at once (default 8).")
+    parser.add_argument("--status-every", type=float, default=60.0, help="Seconds between status log lines.")
+    parser.add_argument("--metrics-file", default=METRICS_FILE, help="Rewrite metrics in the Prometheus text format to this file with every status line.")
+    parser.add_argument("--metrics-push", default=METRICS_PUSH_URL, metavar="URL", help="Push metrics to this Prometheus Pushgateway with every status line.")
+    args = parser.parse_args()
+    check_station_arguments(parser, args)
+
+    station_ids = collect_station_ids(args) or [test_stations[0]]
+
+    # Warm the station cache and register new stations once, up front
+    db = SessionLocal()
+    prepare_stations(db, station_ids, args.workers)
+    db.close()
+
+    scheduler = Scheduler(station_ids, workers=args.workers)
+    registry.gauge("scheduler_queue_depth", "Stations due and waiting for a worker.", fn=lambda: scheduler.snapshot()["queue_depth"])
+    registry.gauge("scheduler_in_flight", "Station runs in progress.", fn=lambda: scheduler.snapshot()["in_flight"])
+    registry.gauge("scheduler_max_lag_seconds", "Largest delay of a station behind its schedule.",
+                   fn=lambda: max((s["lag_seconds"] for s in scheduler.snapshot()["stations"].values()), default=0))
+
+    def export():
+        export_metrics("scheduler", args.metrics_file, args.metrics_push)
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+
+    logger.info(f"Scheduler started for {len(station_ids)} stations with {args.workers} workers")
+    scheduler.run_forever(stop, status_every=args.status_every, on_status=export)
+    logger.info("Stopping scheduler, waiting for running stations to finish")
+    scheduler.shutdown()
+    export()
+
+
+if __name__ == "__main__":
+    main()
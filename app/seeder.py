@@ -1,8 +1,23 @@
 import argparse
+import os
+from datetime import datetime, timedelta, timezone
+from typing import List, Tuple
 from sqlalchemy.orm import Session
 from app.db.session import SessionLocal
-from app.pipeline.ingest_observations import run_pipeline
+from app.models.station import Station
+from app.pipeline.ingest_observations import run_pipeline, DEFAULT_LOADER, DEFAULT_PARSER
+from app.pipeline.loaders import LOADERS
+from app.pipeline.concurrent_ingest import ingest_stations
+from app.pipeline.backfill import run_backfill
+from app.pipeline.replay import replay_stations
+from app.pipeline.archive import set_archive_dir
+from app.pipeline.process_ingest import DEFAULT_PROCESSES, ProcessLoader
+from app.pipeline import http_client
+from app.pipeline.json_decoding import set_json_decoder, log_decode_stats
+from app.pipeline.prefilter import set_prefilter, log_prefilter_stats
+from app.pipeline.spatial import StationIndex, load_station_index
 from app.utils.logging import get_logger
+from app.utils.metrics import METRICS_FILE, METRICS_PUSH_URL, export_metrics
 
 logger = get_logger()
 
@@ -14,21 +29,183 @@ test_stations = [
     "024CE",  # 39 Chocolate Springs
 ]
 
+
+def read_stations_file(path: str) -> List[str]:
+    """Read station IDs from a file, one per line. Blank lines and '#' comments are ignored."""
+    with open(path) as f:
+        lines = (line.split("#", 1)[0].strip() for line in f)
+        return [line for line in lines if line]
+
+
+def utc_datetime(value: str) -> datetime:
+    """
+    ISO date/time from the command line as naive UTC, the way timestamps are stored. Values
+    with an offset (eg. "2025-01-01T00:00:00Z") are converted, naive ones are taken as UTC.
+    """
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected an ISO date or date/time, got '{value}'")
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def coordinates(value: str) -> Tuple[float, ...]:
+    """Comma separated degrees from the command line, eg. "39.7,-104.9"."""
+    try:
+        return tuple(float(v) for v in value.split(","))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected comma separated numbers, got '{value}'")
+
+
+def add_station_arguments(parser: argparse.ArgumentParser, verb: str = "ingest") -> None:
+    """Station selection options shared by the seeder and the scheduler, read by `collect_station_ids`."""
+    parser.add_argument("--station", type=str, help=f"Station ID to {verb}.")
+    parser.add_argument("--stations", nargs="+", help=f"Several station IDs to {verb}.")
+    parser.add_argument("--stations-file", type=str, help="File with one station ID per line.")
+    parser.add_argument("--all-stations", action="store_true", help=f"{verb.capitalize()} every station already in the database.")
+    parser.add_argument("--near", type=coordinates, metavar="LAT,LON", help=f"{verb.capitalize()} the stored stations closest to this point.")
+    parser.add_argument("--nearest", type=int, default=10, help="How many stations --near selects (default 10).")
+    parser.add_argument("--radius-km", type=float, default=None, help="Select every stored station within this distance of --near instead.")
+    parser.add_argument("--bbox", type=coordinates, metavar="S,W,N,E", help=f"{verb.capitalize()} the stored stations inside this latitude/longitude box.")
+
+
+def check_station_arguments(parser: argparse.ArgumentParser, args: argparse.Namespace) -> None:
+    """Exit with a usage error for malformed --near / --bbox values."""
+    if args.near and len(args.near) != 2:
+        parser.error("--near takes LAT,LON")
+    if args.bbox and len(args.bbox) != 4:
+        parser.error("--bbox takes S,W,N,E")
+
+
+def stations_by_location(index: StationIndex, args: argparse.Namespace) -> List[str]:
+    """Station IDs selected with --near (nearest or within --radius-km) and --bbox."""
+    station_ids = []
+    if args.near:
+        latitude, longitude = args.near
+        if args.radius_km is not None:
+            found = index.within_radius(latitude, longitude, args.radius_km)
+        else:
+            found = index.nearest(latitude, longitude, args.nearest)
+        station_ids.extend(station.nws_id for station, _ in found)
+    if args.bbox:
+        station_ids.extend(station.nws_id for station in index.within_bbox(*args.bbox))
+    return station_ids
+
+
+def collect_station_ids(args: argparse.Namespace) -> List[str]:
+    """Gather station IDs from all sources given on the command line, keeping order and dropping duplicates."""
+    station_ids = []
+    if args.station:
+        station_ids.append(args.station)
+    if args.stations:
+        station_ids.extend(args.stations)
+    if args.stations_file:
+        station_ids.extend(read_stations_file(args.stations_file))
+    if args.all_stations:
+        db: Session = SessionLocal()
+        station_ids.extend(nws_id for (nws_id,) in db.query(Station.nws_id).order_by(Station.id).all())
+        db.close()
+    if args.near or args.bbox:
+        db: Session = SessionLocal()
+        station_ids.extend(stations_by_location(load_station_index(db), args))
+        db.close()
+    return list(dict.fromkeys(station_ids))
+
+
 def main():
-    # Parse optional --station argument
-    parser = argparse.ArgumentParser(description="Run data pipeline for a weather station.")
-    parser.add_argument("--station", type=str, help="Station ID to run the pipeline for.")
+    # Parse station selection and concurrency arguments
+    parser = argparse.ArgumentParser(description="Run data pipeline for one or more weather stations.")
+    add_station_arguments(parser)
+    parser.add_argument("--concurrency", type=int, default=8, help="Max stations processed at once (default 8).")
+    parser.add_argument("--rate", type=float, default=None, help="Max requests per second per API host.")
+    parser.add_argument("--overlap-minutes", type=int, default=None, help="Re-fetch this many minutes before the latest stored observation.")
+    parser.add_argument("--full-window", action="store_true", help="Ignore stored observations and fetch the full 7-day window.")
+    parser.add_argument("--backfill-start", type=utc_datetime, help="Backfill history from this UTC date/time (e.g. 2025-01-01).")
+    parser.add_argument("--backfill-end", type=utc_datetime, help="End of the backfill range (UTC), defaults to now.")
+    parser.add_argument("--archive-dir", default=None, help="Archive raw API responses here (default NWS_ARCHIVE_DIR), or the archive --replay reads.")
+    parser.add_argument("--replay", action="store_true", help="Re-parse and re-load observations from the archive instead of the API (every archived station by default).")
+    parser.add_argument("--replay-start", type=utc_datetime, help="Only replay archived observations from this UTC date/time.")
+    parser.add_argument("--replay-end", type=utc_datetime, help="Only replay archived observations up to this UTC date/time.")
+    parser.add_argument("--processes", type=int, default=DEFAULT_PROCESSES or None,
+                        help="Decode, parse and load in this many worker processes, fetching stays in threads (--replay defaults to one per CPU).")
+    parser.add_argument("--loader", choices=sorted(LOADERS), default=DEFAULT_LOADER, help="Load path for parsed rows.")
+    parser.add_argument("--parser", choices=["columnar", "row"], default=DEFAULT_PARSER, help="Parse features one by one or as NumPy columns.")
+    parser.add_argument("--no-prefilter", action="store_true", help="Send already stored rows to the database for ON CONFLICT to skip, instead of dropping them first.")
+    parser.add_argument("--metrics-file", default=METRICS_FILE, help="Write metrics in the Prometheus text format to this file when done.")
+    parser.add_argument("--metrics-push", default=METRICS_PUSH_URL, metavar="URL", help="Push metrics to this Prometheus Pushgateway when done.")
+    parser.add_argument("--json-decoder", choices=["auto", "orjson", "json"], default=None, help="JSON decoder for API responses (default auto).")
     args = parser.parse_args()
+    check_station_arguments(parser, args)
+
+    if args.json_decoder:
+        set_json_decoder(args.json_decoder)
+    if args.no_prefilter:
+        set_prefilter(False)
+    if args.archive_dir:
+        set_archive_dir(args.archive_dir)
+
+    if args.replay:
+        # No network: every station comes from the database or the archive
+        replay_stations(
+            collect_station_ids(args) or None,
+            processes=args.processes or os.cpu_count() or 1,
+            start=args.replay_start,
+            end=args.replay_end,
+            loader=args.loader,
+            parser=args.parser,
+        )
+        log_decode_stats()
+        export_metrics("seeder", args.metrics_file, args.metrics_push)
+        return
+
+    if args.backfill_start:
+        pipeline = run_backfill
+        pipeline_options = {
+            "start": args.backfill_start,
+            "end": args.backfill_end or datetime.utcnow().replace(microsecond=0),
+            "loader": args.loader,
+            "parser": args.parser,
+        }
+    else:
+        pipeline = run_pipeline
+        pipeline_options = {"incremental": not args.full_window, "loader": args.loader, "parser": args.parser}
+        if args.overlap_minutes is not None:
+            pipeline_options["overlap"] = timedelta(minutes=args.overlap_minutes)
+
+    # Parsing and loading in worker processes, so a big run uses more than one core
+    process_loader = ProcessLoader(args.processes) if args.processes else None
+    if process_loader:
+        pipeline_options["process_loader"] = process_loader
+
+    # Decide stations to use
+    station_ids = collect_station_ids(args) or [test_stations[0]]
 
-    # Decide station to use
-    station_id = args.station if args.station else test_stations[0]
+    if len(station_ids) == 1:
+        station_id = station_ids[0]
+        logger.info(f"Running pipeline for station: {station_id}")
 
-    logger.info(f"Running pipeline for station: {station_id}")
+        # Connect to DB and run pipeline
+        db: Session = SessionLocal()
+        pipeline(db, station_id=station_id, **pipeline_options)
+        db.close()
+    else:
+        logger.info(f"Running pipeline for {len(station_ids)} stations with concurrency {args.concurrency}")
+        ingest_stations(
+            station_ids,
+            concurrency=args.concurrency,
+            rate_per_host=args.rate,
+            pipeline_options=pipeline_options,
+            pipeline=pipeline,
+        )
 
-    # Connect to DB and run pipeline
-    db: Session = SessionLocal()
-    run_pipeline(db, station_id=station_id)
-    db.close()
+    if process_loader:
+        process_loader.close()
+    http_client.log_stats()
+    log_decode_stats()
+    log_prefilter_stats()
+    export_metrics("seeder", args.metrics_file, args.metrics_push)
 
 if __name__ == "__main__":
     main()
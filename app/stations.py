@@ -0,0 +1,76 @@
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+from app.db.session import SessionLocal
+from app.models.station import Station
+from app.models.weather_observation import WeatherObservation  # noqa: F401, registers the Station.observations target
+from app.pipeline.nws_api_functions import try_validate_station
+from app.pipeline.spatial import load_station_index
+from app.seeder import coordinates
+from app.utils.logging import get_logger
+
+logger = get_logger()
+
+
+def fix_coordinates(db: Session, concurrency: int = 8) -> int:
+    """
+    Re-read the coordinates of stations stored without a longitude, or with the latitude
+    written into it, from the NWS API.
+
+    Returns:
+        int: Number of stations updated.
+    """
+    stations = db.query(Station).filter(or_(
+        Station.latitude.is_(None),
+        Station.longitude.is_(None),
+        Station.longitude == Station.latitude,
+    )).all()
+    if not stations:
+        return 0
+
+    # Fetch metadata in parallel, like StationCache.resolve
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(stations)))) as executor:
+        metadata = list(executor.map(try_validate_station, [s.nws_id for s in stations]))
+
+    updated = 0
+    for station, meta in zip(stations, metadata):
+        if isinstance(meta, dict) and meta.get("latitude") is not None and meta.get("longitude") is not None:
+            station.latitude, station.longitude = meta["latitude"], meta["longitude"]
+            updated += 1
+        else:
+            logger.warning(f"No coordinates found for station {station.nws_id}" + (f": {meta}" if meta else ""))
+    db.commit()
+    return updated
+
+
+def main():
+    # Parse maintenance arguments
+    parser = argparse.ArgumentParser(description="Maintain stored stations.")
+    parser.add_argument("--fix-coordinates", action="store_true", help="Re-fetch missing or swapped station coordinates from the NWS API.")
+    parser.add_argument("--near", type=coordinates, metavar="LAT,LON", help="List the stored stations closest to this point.")
+    parser.add_argument("--nearest", type=int, default=10, help="How many stations --near lists (default 10).")
+    args = parser.parse_args()
+    if args.near and len(args.near) != 2:
+        parser.error("--near takes LAT,LON")
+
+    if not args.fix_coordinates and not args.near:
+        parser.print_help()
+        return
+
+    db: Session = SessionLocal()
+    if args.fix_coordinates:
+        logger.info(f"Fixed coordinates of {fix_coordinates(db)} stations")
+    if args.near:
+        latitude, longitude = args.near
+        try:
+            found = load_station_index(db).nearest(latitude, longitude, args.nearest)
+        except ValueError as e:
+            db.close()
+            parser.error(str(e))
+        for station, km in found:
+            print(f"{station.nws_id:<10} {km:>9.2f} km  {station.name}")
+    db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Dict, Optional, Tuple
+import hashlib
+import json
+import threading
+import time
+import os
+
+from app.utils.logging import get_logger
+
+try:
+    import redis
+except ImportError:  # optional shared backend, the in-process LRU is always available
+    redis = None
+
+logger = get_logger()
+
+# Shared backend URL (redis://...), empty for the in-process LRU
+RESPONSE_CACHE_URL = os.getenv("RESPONSE_CACHE_URL", "")
+# Default entry lifetime, 0 disables the cache
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "300"))
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "1024"))
+
+
+class MemoryBackend:
+    """
+    In-process LRU with per-entry TTL. Counters (station data versions) are kept apart and
+    never evicted. Only invalidations from the same process are seen, other processes
+    (eg. the seeder next to the API) rely on the TTL.
+    """
+    blocking = False  # calls never wait on I/O, safe on the event loop
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_SIZE, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        self._counters: Dict[str, int] = {}
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= self.clock():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (value, self.clock() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def counter(self, key: str) -> int:
+        with self._lock:
+            return self._counters.get(key, 0)
+
+
+class RedisBackend:
+    """
+    Shared backend on any Redis-compatible client (redis-py, fakeredis, ...), so the API
+    workers see invalidations made by the seeder or scheduler processes.
+    """
+    blocking = True  # network round trips, async callers run them on a thread
+
+    def __init__(self, client, prefix: str = "nws:"):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(self.prefix + key)
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        self.client.set(self.prefix + key, value, ex=max(int(ttl), 1))
+
+    def incr(self, key: str) -> int:
+        return self.client.incr(self.prefix + key)
+
+    def counter(self, key: str) -> int:
+        return int(self.client.get(self.prefix + key) or 0)
+
+
+def make_backend(url: str = RESPONSE_CACHE_URL):
+    """Backend for a cache URL, falls back to the in-process LRU."""
+    if not url:
+        return MemoryBackend()
+    if redis is None:
+        logger.warning("RESPONSE_CACHE_URL is set but the redis package is not installed, using the in-process cache")
+        return MemoryBackend()
+    return RedisBackend(redis.Redis.from_url(url))
+
+
+def render_json(payload: dict) -> bytes:
+    """Serialize a payload the way FastAPI's JSONResponse does."""
+    return json.dumps(payload, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+class ResponseCache:
+    """
+    Cache of rendered route responses keyed by (endpoint, station, range). Each key embeds
+    the station's data version, so bumping it with `invalidate_station` after an ingestion
+    makes every cached response of that station unreachable at once. Backend failures are
+    logged and treated as misses, the routes keep working without the cache.
+    """
+
+    def __init__(self, backend=None, ttl: float = RESPONSE_CACHE_TTL):
+        self.backend = backend if backend is not None else make_backend()
+        self.ttl = ttl
+        self.enabled = ttl > 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def key(self, endpoint: str, station: str, start: datetime, end: datetime) -> str:
+        try:
+            version = self.backend.counter(f"version:{station}")
+        except Exception as e:
+            self._count("errors")
+            logger.warning(f"Response cache unavailable: {e}")
+            version = 0
+        return f"response:{endpoint}:{station}:{start.isoformat()}:{end.isoformat()}:v{version}"
+
+    def lookup(self, key: str) -> Optional[Tuple[bytes, str]]:
+        """
+        Returns:
+            Optional[Tuple[bytes, str]]: Cached JSON body and its ETag, None on a miss.
+        """
+        if not self.enabled:
+            self._count("misses")
+            return None
+        try:
+            cached = self.backend.get(key)
+        except Exception as e:
+            self._count("errors")
+            logger.warning(f"Response cache unavailable: {e}")
+            cached = None
+        if cached is None:
+            self._count("misses")
+            return None
+        self._count("hits")
+        etag, body = cached.split(b"\n", 1)
+        return body, etag.decode()
+
+    def store(self, key: str, payload: dict, ttl: Optional[float] = None) -> Tuple[bytes, str]:
+        """
+        Render and cache a payload.
+
+        Returns:
+            Tuple[bytes, str]: JSON body and its ETag.
+        """
+        body = render_json(payload)
+        etag = f'"{hashlib.sha1(body).hexdigest()[:20]}"'
+        if not self.enabled:
+            return body, etag
+        try:
+            self.backend.set(key, etag.encode() + b"\n" + body, self.ttl if ttl is None else ttl)
+        except Exception as e:
+            self._count("errors")
+            logger.warning(f"Response cache unavailable: {e}")
+        return body, etag
+
+    def get_or_compute(self, key: str, compute: Callable[[], dict], ttl: Optional[float] = None) -> Tuple[bytes, str]:
+        """
+        Return the cached rendered response for `key`, or compute, render and store it.
+
+        Returns:
+            Tuple[bytes, str]: JSON body and its ETag.
+        """
+        cached = self.lookup(key)
+        if cached is not None:
+            return cached
+        return self.store(key, compute(), ttl)
+
+    def invalidate_station(self, station: str) -> None:
+        """Drop every cached response of a station, call after inserting its observations."""
+        try:
+            self.backend.incr(f"version:{station}")
+            self._count("invalidations")
+        except Exception as e:
+            self._count("errors")
+            logger.error(f"Failed to invalidate cached responses of {station}: {e}")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": type(self.backend).__name__,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+                "invalidations": self.invalidations,
+                "errors": self.errors,
+            }
+
+
+# Process-wide cache shared by the routes and the pipeline
+response_cache = ResponseCache()
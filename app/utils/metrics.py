@@ -0,0 +1,273 @@
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+import os
+import threading
+import time
+
+import requests
+
+from app.utils.logging import get_logger
+
+logger = get_logger()
+
+# Histogram upper bounds in seconds, from sub-millisecond parses to slow page fetches
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Where the seeder and scheduler dump / push metrics when not given on the command line
+METRICS_FILE = os.getenv("METRICS_FILE")
+METRICS_PUSH_URL = os.getenv("METRICS_PUSH_URL")
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Metric:
+    """Base of the metric types: a name, help text and label names, rendered in the Prometheus text format."""
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        return "\n".join(lines + self.samples())
+
+
+class Counter(Metric):
+    """Monotonically increasing total, per label set."""
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[LabelValues, float] = {} if labelnames else {(): 0}  # unlabelled counters start at 0
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_labels(self.labelnames, k)} {_number(v)}" for k, v in values]
+
+
+class Gauge(Metric):
+    """
+    Value that goes up and down. Either set explicitly, or read from `fn` at render time,
+    which returns {label values: value} (or a bare number without labels).
+    """
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), fn: Optional[Callable] = None):
+        super().__init__(name, help, labelnames)
+        self.fn = fn
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def samples(self) -> List[str]:
+        if self.fn is not None:
+            values = self.fn()
+            values = {(): values} if not isinstance(values, dict) else values
+        else:
+            with self._lock:
+                values = dict(self._values)
+        return [
+            f"{self.name}{_labels(self.labelnames, k)} {_number(v)}"
+            for k, v in sorted(values.items()) if v is not None
+        ]
+
+
+class Histogram(Metric):
+    """Distribution of observed values over fixed buckets, per label set."""
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values: Dict[LabelValues, List[float]] = {}  # bucket counts, then sum and count
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            counts[index] += 1  # non cumulative, the last slot catches values above every bucket
+            counts[-2] += value
+            counts[-1] += 1
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Observe the duration of the block, in seconds."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def total(self, **labels: str) -> Tuple[float, int]:
+        """Sum and count of the observed values."""
+        with self._lock:
+            counts = self._values.get(self._key(labels))
+            return (counts[-2], counts[-1]) if counts else (0.0, 0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted((k, list(v)) for k, v in self._values.items())
+        lines = []
+        for key, counts in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="' + _number(bound) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(counts[-2])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {counts[-1]}")
+        return lines
+
+
+class Registry:
+    """Named metrics of this process, rendered together for scraping, dumping or pushing."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        """Add `metric`, or return the one already registered under its name (modules may be reloaded)."""
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = (), fn: Optional[Callable] = None) -> Gauge:
+        gauge = self.register(Gauge(name, help, labelnames, fn))
+        if fn is not None:
+            gauge.fn = fn  # the latest callback wins, eg. a new scheduler
+        return gauge
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def render(self) -> str:
+        """Every metric in the Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        return "\n".join(m.render() for m in metrics) + "\n"
+
+
+# Process-wide registry
+registry = Registry()
+
+# Pipeline instrumentation, shared by the modules that record it
+STAGE_SECONDS = registry.histogram(
+    "pipeline_stage_seconds", "Time spent per pipeline stage (fetch, decode, parse, prefilter, insert, commit).", ["stage"])
+ROWS_RECEIVED = registry.counter("pipeline_rows_received_total", "Observation features received from the NWS API.")
+ROWS_INSERTED = registry.counter("pipeline_rows_inserted_total", "Observations inserted, the rest were duplicates or invalid.")
+ROWS_PREFILTERED = registry.counter("pipeline_rows_prefiltered_total", "Parsed rows dropped before loading because they were already stored.")
+ROWS_LOADED = registry.counter("pipeline_rows_loaded_total", "Parsed rows sent to a loader, after the pre-filter.")
+STATION_RUNS = registry.counter("pipeline_station_runs_total", "Per-station pipeline runs by outcome.", ["outcome"])
+STATION_RUN_SECONDS = registry.histogram("pipeline_station_run_seconds", "Duration of per-station pipeline runs.")
+HTTP_RESPONSES = registry.counter("nws_http_responses_total", "NWS API responses by HTTP status.", ["status"])
+HTTP_BYTES = registry.counter("nws_http_bytes_received_total", "NWS API response bytes on the wire.")
+NWS_RETRIES = registry.counter("nws_retries_total", "NWS API requests retried, by the status or error that caused it.", ["reason"])
+NWS_THROTTLED = registry.counter("nws_throttled_total", "NWS API 429 Too Many Requests responses.")
+NWS_CIRCUIT_OPENS = registry.counter("nws_circuit_opened_total", "Times an NWS endpoint circuit breaker opened.", ["endpoint"])
+
+
+def _conflict_ratio() -> Optional[float]:
+    received = ROWS_RECEIVED.value()
+    return round(1 - ROWS_INSERTED.value() / received, 4) if received else None
+
+
+def _rows_per_second() -> Optional[float]:
+    seconds, _ = STAGE_SECONDS.total(stage="insert")
+    return round(ROWS_INSERTED.value() / seconds, 1) if seconds else None
+
+
+registry.gauge("pipeline_conflict_ratio", "Share of received features not inserted (duplicates or invalid) since start.", fn=_conflict_ratio)
+registry.gauge("pipeline_insert_rows_per_second", "Inserted rows per second of time spent in the insert stage since start.", fn=_rows_per_second)
+
+
+# Connection stats per registered pool name
+_pools: Dict[str, Callable[[], Dict[LabelValues, float]]] = {}
+
+
+def register_pool(pool, name: str) -> None:
+    """Expose the size / checked out / idle / overflow connections of a SQLAlchemy QueuePool."""
+    _pools[name] = lambda: {
+        (name, "size"): pool.size(),
+        (name, "checked_out"): pool.checkedout(),
+        (name, "idle"): pool.checkedin(),
+        (name, "overflow"): max(pool.overflow(), 0),
+    }
+
+
+registry.gauge(
+    "db_pool_connections", "Database pool connections by pool and state.", ["pool", "state"],
+    fn=lambda: {key: value for stats in _pools.values() for key, value in stats().items()},
+)
+
+
+def dump_metrics(path: str) -> None:
+    """Write the registry to `path` atomically, eg. for node_exporter's textfile collector."""
+    temporary = f"{path}.tmp"
+    with open(temporary, "w") as f:
+        f.write(registry.render())
+    os.replace(temporary, path)
+
+
+def push_metrics(url: str, job: str) -> None:
+    """Replace this job's metrics on a Prometheus Pushgateway."""
+    response = requests.put(f"{url.rstrip('/')}/metrics/job/{job}", data=registry.render().encode(), timeout=10)
+    response.raise_for_status()
+
+
+def export_metrics(job: str, path: Optional[str] = METRICS_FILE, push_url: Optional[str] = METRICS_PUSH_URL) -> None:
+    """Dump and/or push the registry when configured, logging instead of failing the caller."""
+    try:
+        if path:
+            dump_metrics(path)
+        if push_url:
+            push_metrics(push_url, job)
+    except (OSError, requests.RequestException) as e:
+        logger.warning(f"Could not export metrics: {e}")
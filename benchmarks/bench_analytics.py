@@ -0,0 +1,112 @@
+"""
+Latency of the composed analytics queries versus the hand-written LAG query the max wind
+speed delta route used before, for one station and for many stations (one query per
+station versus a single query partitioned by station). Checks both return the same values.
+
+Needs a migrated database in DATABASE_URL:
+
+    python -m benchmarks.bench_analytics --stations 50 --days 30
+"""
+from datetime import datetime, timedelta
+import argparse
+import time
+
+from sqlalchemy import text
+
+from app.db.session import SessionLocal
+from app.models.station import Station
+from app.models.weather_observation import WeatherObservation
+from app.pipeline.analytics import analytics_query
+from app.pipeline.partitions import ensure_partitions
+
+# The former hand-written query of /metrics/max_wind_speed_delta, one station at a time
+HAND_WRITTEN_SQL = text("""
+    SELECT MAX(ABS(wind_speed - prev_wind_speed)) AS max_delta
+    FROM (
+        SELECT
+            wind_speed,
+            LAG(wind_speed) OVER (ORDER BY timestamp) AS prev_wind_speed
+        FROM weather_observations
+        WHERE station_id = :station_id
+          AND timestamp BETWEEN :start AND :end
+    ) AS deltas
+    WHERE prev_wind_speed IS NOT NULL
+""")
+
+GENERATE_SQL = text("""
+    INSERT INTO weather_observations (station_id, timestamp, temperature, wind_speed)
+    SELECT s.id, ts, 15 + 10 * sin(extract(epoch FROM ts) / 86400.0), random() * 40
+    FROM stations s,
+         generate_series(CAST(:start AS timestamp), CAST(:end AS timestamp), interval '5 minutes') AS ts
+    WHERE s.nws_id LIKE :prefix
+""")
+
+END = datetime(2026, 1, 1)
+
+
+def best_of(fn, repeat: int) -> tuple:
+    value = fn()  # warm the cache, report the best of the following runs
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return value, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark composed analytics vs hand-written window queries.")
+    parser.add_argument("--stations", type=int, default=50)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    prefix = f"BA{int(time.time()) % 100000}"
+    stations = [Station(nws_id=f"{prefix}{i:04d}", name="Benchmark station") for i in range(args.stations)]
+    db.add_all(stations)
+    db.commit()
+    try:
+        start = END - timedelta(days=args.days)
+        ensure_partitions(db, start, END)
+        db.execute(GENERATE_SQL, {"start": start, "end": END, "prefix": f"{prefix}%"})
+        db.commit()
+        db.execute(text("ANALYZE weather_observations"))
+
+        week = {"start": END - timedelta(days=7), "end": END}
+        first = stations[0]
+        nws_ids = [s.nws_id for s in stations]
+
+        hand, hand_seconds = best_of(
+            lambda: db.execute(HAND_WRITTEN_SQL, {"station_id": first.id, **week}).scalar(), args.repeat)
+        composed, composed_seconds = best_of(
+            lambda: db.execute(analytics_query("wind_speed", "max_delta", week["start"], week["end"], [first.nws_id])).one()[1],
+            args.repeat)
+        assert abs(hand - composed) < 1e-9, f"analytics max_delta {composed} differs from hand-written {hand}"
+        print(f"1 station      hand-written {hand_seconds * 1000:>8.2f} ms   analytics {composed_seconds * 1000:>8.2f} ms")
+
+        hand_all, hand_seconds = best_of(
+            lambda: [db.execute(HAND_WRITTEN_SQL, {"station_id": s.id, **week}).scalar() for s in stations], args.repeat)
+        composed_all, composed_seconds = best_of(
+            lambda: [row[1] for row in db.execute(analytics_query("wind_speed", "max_delta", week["start"], week["end"], nws_ids))],
+            args.repeat)
+        assert all(abs(a - b) < 1e-9 for a, b in zip(hand_all, composed_all)), "multi-station results differ"
+        print(f"{len(stations)} stations    hand-written {hand_seconds * 1000:>8.2f} ms   analytics {composed_seconds * 1000:>8.2f} ms   "
+              f"({len(stations)} queries vs 1)")
+
+        # Other stats in the same single pass, for reference
+        for stat in ("percentile", "max_rate_per_hour", "rolling_mean"):
+            stmt = analytics_query("temperature", stat, week["start"], week["end"], nws_ids)
+            _, seconds = best_of(lambda: db.execute(stmt).all(), args.repeat)
+            print(f"{len(stations)} stations    {stat:<17} {seconds * 1000:>8.2f} ms")
+    finally:
+        db.rollback()
+        ids = [s.id for s in stations]
+        db.query(WeatherObservation).filter(WeatherObservation.station_id.in_(ids)).delete(synchronize_session=False)
+        db.query(Station).filter(Station.id.in_(ids)).delete(synchronize_session=False)
+        db.commit()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
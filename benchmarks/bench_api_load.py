@@ -0,0 +1,119 @@
+"""
+Load test of the metrics routes: p50/p99 latency and requests/s under many concurrent
+clients, for the async routes of app.main versus the same queries served by sync `def`
+routes on the sync engine (the previous implementation). Each app runs in its own uvicorn
+process with the response cache disabled, so every request reaches the database.
+
+Needs a migrated database with at least one station in DATABASE_URL:
+
+    python -m benchmarks.bench_api_load --clients 200 --requests 5000
+"""
+from datetime import datetime, timedelta
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy.orm import Session
+
+from app.db.session import get_db
+from app.models.station import Station
+from app.pipeline.rollups import rollup_average
+from app.routes import get_last_week_range
+from benchmarks.bench_analytics import HAND_WRITTEN_SQL
+
+PATHS = ["/metrics/avg_temperature_last_week", "/metrics/max_wind_speed_delta"]
+
+# Sync baseline: same queries, blocking sessions on FastAPI's threadpool
+sync_app = FastAPI()
+
+
+def first_station(db: Session) -> Station:
+    return db.query(Station).order_by(Station.id.asc()).first()
+
+
+@sync_app.get("/metrics/avg_temperature_last_week")
+def sync_avg_temp_last_week(db: Session = Depends(get_db)):
+    station = first_station(db)
+    start_dt, end_dt = get_last_week_range()
+    return {"station_id": station.nws_id, "average_temperature": rollup_average(db, station.id, "temperature", start_dt, end_dt)}
+
+
+@sync_app.get("/metrics/max_wind_speed_delta")
+def sync_max_wind_speed_delta(db: Session = Depends(get_db)):
+    station = first_station(db)
+    end_dt = datetime.utcnow()
+    params = {"station_id": station.id, "start": end_dt - timedelta(days=7), "end": end_dt}
+    return {"station_id": station.nws_id, "max_wind_speed_delta": db.execute(HAND_WRITTEN_SQL, params).scalar()}
+
+
+def start_server(target: str, port: int) -> subprocess.Popen:
+    env = dict(os.environ, RESPONSE_CACHE_TTL_SECONDS="0")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", target, "--port", str(port), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL,
+    )
+    for _ in range(100):
+        try:
+            httpx.get(f"http://127.0.0.1:{port}{PATHS[0]}", timeout=1).raise_for_status()
+            return server
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    server.terminate()
+    raise RuntimeError(f"{target} did not start")
+
+
+async def load(port: int, clients: int, requests: int) -> tuple:
+    """Run `requests` requests from `clients` concurrent clients, returns (latencies, seconds, errors)."""
+    latencies, errors = [], 0
+    remaining = iter(range(requests))
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60) as client:
+        async def worker():
+            nonlocal errors
+            for i in remaining:
+                started = time.perf_counter()
+                try:
+                    response = await client.get(PATHS[i % len(PATHS)])
+                    response.raise_for_status()
+                except httpx.HTTPError:
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(clients)))
+        return latencies, time.perf_counter() - started, errors
+
+
+def percentile(values: list, p: float) -> float:
+    values = sorted(values)
+    return values[min(int(len(values) * p), len(values) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test sync vs async metrics routes.")
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    for label, target in (("sync", "benchmarks.bench_api_load:sync_app"), ("async", "app.main:app")):
+        server = start_server(target, args.port)
+        try:
+            asyncio.run(load(args.port, args.clients, min(args.requests, 500)))  # warm up pools
+            latencies, seconds, errors = asyncio.run(load(args.port, args.clients, args.requests))
+        finally:
+            server.terminate()
+            server.wait()
+        print(f"{label:<6} {len(latencies) / seconds:>8.0f} req/s   p50 {percentile(latencies, 0.5) * 1000:>7.1f} ms   "
+              f"p99 {percentile(latencies, 0.99) * 1000:>7.1f} ms   errors {errors}")
+
+
+if __name__ == "__main__":
+    main()
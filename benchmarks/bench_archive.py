@@ -0,0 +1,94 @@
+"""
+Write and read throughput of the raw response archive. Archives a year of synthetic
+5-minute observations per station, then streams it back (decompress + JSON decode, what
+a replay does before parsing) with 1 and N processes, reporting compressed MB/s read from
+disk and features/s. Also reports the compression ratio and bytes per feature.
+
+No database or stub needed:
+
+    python -m benchmarks.bench_archive --stations 8 --days 365 --processes 4 --compression gzip
+"""
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from app.pipeline.archive import ResponseArchive, canonical_json
+from benchmarks.nws_stub import make_observation
+
+PAGE = 500
+
+
+def archive_station(root: str, compression: str, station_id: str, days: int, padding: int) -> tuple:
+    """Archive `days` of observations for one station in API-sized pages, returns (features, raw bytes)."""
+    archive = ResponseArchive(root, compression)
+    end = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    ts = end - timedelta(days=days)
+    page, count, raw = [], 0, 0
+    while ts < end:
+        page.append(make_observation(station_id, ts, padding))
+        ts += timedelta(minutes=5)
+        if len(page) == PAGE:
+            raw += sum(len(canonical_json(f)) for f in page)
+            count += archive.store(station_id, page)
+            page = []
+    if page:
+        raw += sum(len(canonical_json(f)) for f in page)
+        count += archive.store(station_id, page)
+    return count, raw
+
+
+def read_station(root: str, station_id: str) -> int:
+    return sum(1 for _ in ResponseArchive(root).iter_features(station_id))
+
+
+def disk_bytes(root: str) -> int:
+    return sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(root) for f in files if not f.endswith(".idx"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark archive write and read throughput.")
+    parser.add_argument("--stations", type=int, default=8)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--padding", type=int, default=600, help="Extra bytes per feature, real ones carry ~1-2 KB.")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--compression", choices=["auto", "gzip", "zstd"], default="auto")
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="nws-archive-")
+    stations = [f"ARCH{i:04d}" for i in range(args.stations)]
+    compression = ResponseArchive(root, args.compression).compression
+    try:
+        started = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=args.processes) as executor:
+            written = list(executor.map(archive_station, [root] * len(stations), [compression] * len(stations),
+                                        stations, [args.days] * len(stations), [args.padding] * len(stations)))
+        seconds = time.perf_counter() - started
+        features = sum(w[0] for w in written)
+        raw = sum(w[1] for w in written)
+        size = disk_bytes(root)
+        print(f"{compression}: archived {features} features, {raw / 1e6:.1f} MB of JSON into {size / 1e6:.1f} MB "
+              f"(ratio {raw / size:.1f}x, {size / features:.0f} B/feature) in {seconds:.1f}s with {args.processes} processes")
+
+        # Second pass: every feature is already archived, only the digest check runs
+        started = time.perf_counter()
+        duplicates = archive_station(root, compression, stations[0], args.days, args.padding)[0]
+        print(f"re-archiving a station: {duplicates} new features in {time.perf_counter() - started:.2f}s")
+
+        for processes in sorted({1, args.processes}):
+            started = time.perf_counter()
+            with ProcessPoolExecutor(max_workers=processes) as executor:
+                read = sum(executor.map(read_station, [root] * len(stations), stations))
+            seconds = time.perf_counter() - started
+            assert read == features, f"read {read} features, archived {features}"
+            print(f"read with {processes} process{'es' if processes > 1 else ''}: {size / 1e6 / seconds:>7.1f} MB/s compressed, "
+                  f"{raw / 1e6 / seconds:>7.1f} MB/s JSON, {read / seconds:>10.0f} features/s")
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
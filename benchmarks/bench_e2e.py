@@ -0,0 +1,220 @@
+"""
+End-to-end ingestion benchmark: the concurrent seeder path (`ingest_stations` ->
+`run_pipeline`) against the NWS simulator (benchmarks/nws_stub.py, started as a
+separate process) and the database in DATABASE_URL.
+
+Runs a cold ingest of the full 7-day window for every simulated station, then an
+incremental run an hour later, and records per phase stations/s, rows/s, p50/p99
+per-station latency, failures, time per pipeline stage, HTTP statuses and the peak
+RSS of the pipeline process. Results are written as JSON, named after the current
+commit, so two commits can be compared:
+
+    python -m benchmarks.bench_e2e --stations 200 --latency 0.05 --padding 600
+    git checkout other-branch
+    python -m benchmarks.bench_e2e --stations 200 --latency 0.05 --padding 600 \\
+        --compare benchmarks/results/e2e-<first commit>.json
+
+Simulated stations are deleted when done.
+"""
+from datetime import datetime, timedelta, timezone
+import argparse
+import json
+import os
+import platform
+import resource
+import socket
+import subprocess
+import sys
+import time
+
+import requests
+
+from benchmarks.nws_stub import add_arguments, station_ids
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+# Forwarded to the simulator as --<option>
+STUB_OPTIONS = ("stations", "prefix", "cadence_minutes", "padding", "latency", "latency_jitter",
+                "error_rate", "throttle_rate", "retry_after", "seed")
+STAGES = ("fetch", "decode", "parse", "insert", "commit")
+# Compared by --compare, True when higher is better
+SUMMARY = {"stations_per_second": True, "rows_per_second": True, "p50_seconds": False, "p99_seconds": False,
+           "failed": False, "peak_rss_mb": False}
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_stub(args: argparse.Namespace, port: int) -> subprocess.Popen:
+    command = [sys.executable, "-m", "benchmarks.nws_stub", "--port", str(port)]
+    for option in STUB_OPTIONS:
+        value = getattr(args, option)
+        if value is not None:
+            command += [f"--{option.replace('_', '-')}", str(value)]
+    if args.no_pagination:
+        command.append("--no-pagination")
+    stub = subprocess.Popen(command, stdout=subprocess.DEVNULL)
+    for _ in range(100):
+        try:
+            requests.get(f"http://127.0.0.1:{port}/_stats", timeout=1).raise_for_status()
+            return stub
+        except requests.RequestException:
+            time.sleep(0.1)
+    stub.terminate()
+    raise RuntimeError("NWS stub did not start")
+
+
+def percentile(values: list, q: float) -> float:
+    """Nearest-rank percentile, q in [0, 100]."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(q / 100 * len(ordered) + 0.5) - 1))]
+
+
+def git_commit() -> dict:
+    def git(*command: str) -> str:
+        return subprocess.run(["git", *command], capture_output=True, text=True).stdout.strip()
+    return {"sha": git("rev-parse", "HEAD") or None, "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+
+def run_phase(label: str, ids: list, end: datetime, args: argparse.Namespace, stub_url: str) -> dict:
+    """Ingest every station once up to `end` and summarise the run."""
+    from app.pipeline.concurrent_ingest import ingest_stations
+    from app.utils.metrics import HTTP_RESPONSES, STAGE_SECONDS
+
+    def snapshot() -> dict:
+        return {
+            "stages": {stage: STAGE_SECONDS.total(stage=stage)[0] for stage in STAGES},
+            "http": {status: HTTP_RESPONSES.value(status=status) for status in ("200", "304", "404", "429", "500", "503")},
+            "stub": requests.get(f"{stub_url}/_stats", timeout=5).json(),
+        }
+
+    before = snapshot()
+    started = time.perf_counter()
+    results = ingest_stations(ids, concurrency=args.concurrency, rate_per_host=args.rate,
+                              pipeline_options={"end": end, "loader": args.loader, "parser": args.parser})
+    elapsed = time.perf_counter() - started
+    after = snapshot()
+
+    seconds = [r.seconds for r in results]
+    inserted = sum(r.inserted for r in results)
+    phase = {
+        "stations": len(results),
+        "failed": sum(1 for r in results if r.error),
+        "empty": sum(1 for r in results if not r.error and not r.inserted),
+        "rows_inserted": inserted,
+        "seconds": round(elapsed, 3),
+        "stations_per_second": round(len(results) / elapsed, 2),
+        "rows_per_second": round(inserted / elapsed, 1),
+        "p50_seconds": round(percentile(seconds, 50), 4),
+        "p99_seconds": round(percentile(seconds, 99), 4),
+        "max_seconds": round(max(seconds, default=0.0), 4),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "stage_seconds": {s: round(after["stages"][s] - before["stages"][s], 3) for s in STAGES},
+        "http_responses": {s: int(after["http"][s] - before["http"][s]) for s in after["http"] if after["http"][s] != before["http"][s]},
+        "features_served": after["stub"]["features_served"] - before["stub"]["features_served"],
+        "mb_served": round((after["stub"]["bytes_served"] - before["stub"]["bytes_served"]) / 1e6, 2),
+    }
+    print(f"{label:<12} {phase['stations']:>6} stations ({phase['failed']} failed) in {phase['seconds']:>8.2f}s   "
+          f"{phase['stations_per_second']:>8.2f} stations/s   {phase['rows_per_second']:>10.1f} rows/s   "
+          f"p50 {phase['p50_seconds'] * 1000:>7.1f} ms   p99 {phase['p99_seconds'] * 1000:>7.1f} ms   "
+          f"peak RSS {phase['peak_rss_mb']:>6.1f} MB")
+    return phase
+
+
+def delete_stations(prefix: str) -> None:
+    """Remove simulated stations with their observations and rollups."""
+    from app.db.session import SessionLocal
+    from app.models.station import Station
+    from app.models.weather_observation import WeatherObservation
+    from app.pipeline.rollups import delete_rollups
+
+    db = SessionLocal()
+    try:
+        ids = [i for (i,) in db.query(Station.id).filter(Station.nws_id.like(f"{prefix}%"))]
+        for station_id in ids:
+            delete_rollups(db, station_id)
+        db.query(WeatherObservation).filter(WeatherObservation.station_id.in_(ids)).delete(synchronize_session=False)
+        db.query(Station).filter(Station.id.in_(ids)).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def compare(current: dict, baseline_path: str) -> None:
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\nchange vs {baseline_path} ({(baseline.get('commit') or {}).get('sha', '?')[:10]})")
+    differing = sorted(k for k, v in current["config"].items() if baseline.get("config", {}).get(k) != v)
+    if differing:
+        print(f"  warning: the runs used different settings for {', '.join(differing)}")
+    for label, phase in current["phases"].items():
+        base = baseline.get("phases", {}).get(label)
+        if not base:
+            continue
+        for metric, higher_is_better in SUMMARY.items():
+            old, new = base.get(metric), phase.get(metric)
+            if old is None or new is None:
+                continue
+            change = (new - old) / old * 100 if old else 0.0
+            better = change > 0 if higher_is_better else change < 0
+            verdict = "" if abs(change) < 5 else ("better" if better else "WORSE")
+            print(f"  {label:<12} {metric:<20} {old:>12} -> {new:>12}   {change:>+7.1f}%  {verdict}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end ingestion benchmark against the NWS simulator.")
+    add_arguments(parser)
+    parser.set_defaults(stations=100, prefix="E2E", padding=600, latency=0.05, latency_jitter=0.02, seed=1)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=0, help="Requests per second per host, 0 disables limiting.")
+    parser.add_argument("--loader", choices=["copy", "insert"], default="insert")
+    parser.add_argument("--parser", choices=["columnar", "row"], default="row")
+    parser.add_argument("--incremental-hours", type=float, default=1.0, help="Time between the cold and incremental runs.")
+    parser.add_argument("--output", default=None, help="Results file, default benchmarks/results/e2e-<commit>.json.")
+    parser.add_argument("--compare", default=None, metavar="BASELINE.json", help="Print the change against an earlier results file.")
+    args = parser.parse_args()
+
+    port = free_port()
+    stub = start_stub(args, port)
+    stub_url = f"http://127.0.0.1:{port}"
+    # Read by app.pipeline at import time
+    os.environ["NWS_BASE_URL"] = stub_url
+    try:
+        delete_stations(args.prefix)
+        ids = station_ids(args.stations, args.prefix)
+        # The stub serves whole cadence steps, a minute-aligned end keeps runs comparable
+        end = datetime.utcnow().replace(second=0, microsecond=0)
+        phases = {
+            "cold": run_phase("cold", ids, end, args, stub_url),
+            "incremental": run_phase("incremental", ids, end + timedelta(hours=args.incremental_hours), args, stub_url),
+        }
+    finally:
+        stub.terminate()
+        stub.wait()
+        delete_stations(args.prefix)
+
+    commit = git_commit()
+    results = {
+        "benchmark": "e2e",
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "host": {"hostname": platform.node(), "python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        "phases": phases,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"e2e-{(commit['sha'] or 'unknown')[:10]}{'-dirty' if commit['dirty'] else ''}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"results written to {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
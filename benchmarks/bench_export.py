@@ -0,0 +1,94 @@
+"""
+Throughput (MB/s, rows/s) and peak server RSS of /observations/export for each output
+format over a large generated range (10M rows by default). The app runs in a uvicorn
+process restarted per format, its peak RSS (VmHWM) is read from /proc before stopping it,
+so a format that buffered the whole result would show up as RSS growing with the range.
+
+Needs a migrated database in DATABASE_URL, Linux for /proc:
+
+    python -m benchmarks.bench_export --rows 10000000 --stations 100
+"""
+from datetime import timedelta
+import argparse
+import time
+
+import httpx
+from sqlalchemy import text
+
+from app.db.session import SessionLocal
+from app.models.station import Station
+from app.models.weather_observation import WeatherObservation
+from app.pipeline.partitions import ensure_partitions
+from benchmarks.bench_analytics import END, GENERATE_SQL
+from benchmarks.bench_api_load import start_server
+
+
+def memory_kb(pid: int, field: str) -> int:
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    raise RuntimeError(f"{field} not found for pid {pid}")
+
+
+def download(port: int, params: dict) -> tuple:
+    """Stream one export, returns (bytes, seconds) without keeping the body."""
+    size = 0
+    started = time.perf_counter()
+    with httpx.stream("GET", f"http://127.0.0.1:{port}/observations/export", params=params, timeout=None) as response:
+        response.raise_for_status()
+        for chunk in response.iter_bytes():
+            size += len(chunk)
+    return size, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark /observations/export formats.")
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--stations", type=int, default=100)
+    parser.add_argument("--formats", default="parquet,arrow,csv")
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    prefix = f"BE{int(time.time()) % 100000}"
+    stations = [Station(nws_id=f"{prefix}{i:04d}", name="Benchmark station") for i in range(args.stations)]
+    db.add_all(stations)
+    db.commit()
+    try:
+        # 5-minute cadence: 288 rows per station and day
+        start = END - timedelta(minutes=5 * (args.rows // args.stations - 1))
+        ensure_partitions(db, start, END)
+        started = time.perf_counter()
+        db.execute(GENERATE_SQL, {"start": start, "end": END, "prefix": f"{prefix}%"})
+        db.commit()
+        db.execute(text("ANALYZE weather_observations"))
+        print(f"generated {args.rows} rows over {(END - start).days} days in {time.perf_counter() - started:.1f}s")
+
+        params = {
+            "stations": ",".join(s.nws_id for s in stations),
+            "start": start.isoformat(),
+            "end": (END + timedelta(seconds=1)).isoformat(),
+        }
+        for output in args.formats.split(","):
+            server = start_server("app.main:app", args.port)
+            try:
+                idle = memory_kb(server.pid, "VmRSS")
+                size, seconds = download(args.port, {**params, "format": output})
+                peak = memory_kb(server.pid, "VmHWM")
+            finally:
+                server.terminate()
+                server.wait()
+            print(f"{output:<8} {size / 1e6:>9.1f} MB in {seconds:>6.1f}s   {size / 1e6 / seconds:>7.1f} MB/s   "
+                  f"{args.rows / seconds:>9.0f} rows/s   peak RSS {peak / 1024:>6.1f} MB (idle {idle / 1024:.1f} MB)")
+    finally:
+        db.rollback()
+        ids = [s.id for s in stations]
+        db.query(WeatherObservation).filter(WeatherObservation.station_id.in_(ids)).delete(synchronize_session=False)
+        db.query(Station).filter(Station.id.in_(ids)).delete(synchronize_session=False)
+        db.commit()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
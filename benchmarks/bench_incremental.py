@@ -0,0 +1,64 @@
+"""
+Compare rows fetched and inserted per run for the fixed 7-day window versus
+watermark-based incremental ingestion, simulating an hourly cron.
+
+Needs a migrated database in DATABASE_URL; the NWS API is served by the local stub:
+
+    python -m benchmarks.bench_incremental --runs 24
+"""
+from datetime import datetime, timedelta
+import argparse
+import os
+import time
+
+from benchmarks.nws_stub import StubHandler, start_in_thread
+
+server = start_in_thread()
+os.environ["NWS_BASE_URL"] = f"http://127.0.0.1:{server.server_address[1]}"
+
+from app.db.session import SessionLocal  # noqa: E402
+from app.pipeline import http_client  # noqa: E402
+from app.pipeline.ingest_observations import run_pipeline  # noqa: E402
+
+
+def simulate(station_id: str, runs: int, incremental: bool, t0: datetime) -> list:
+    """Run the pipeline once per simulated hour and record fetched/inserted rows."""
+    rows = []
+    db = SessionLocal()
+    try:
+        for i in range(runs):
+            before = StubHandler.features_served
+            started = time.perf_counter()
+            inserted = run_pipeline(db, station_id, end=t0 + timedelta(hours=i), incremental=incremental)
+            rows.append({
+                "fetched": StubHandler.features_served - before,
+                "inserted": inserted,
+                "seconds": time.perf_counter() - started,
+            })
+    finally:
+        db.close()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark full-window vs incremental ingestion.")
+    parser.add_argument("--runs", type=int, default=24, help="Number of simulated hourly runs.")
+    args = parser.parse_args()
+
+    http_client.set_rate_limit(0)
+    t0 = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+    suffix = int(time.time()) % 100000
+
+    for label, incremental in (("full window", False), ("incremental", True)):
+        runs = simulate(f"B{suffix}{'I' if incremental else 'F'}", args.runs, incremental, t0)
+        steady = runs[1:] or runs
+        print(f"\n{label}")
+        print(f"  first run:        fetched {runs[0]['fetched']:>6}, inserted {runs[0]['inserted']:>6}")
+        print(f"  steady state avg: fetched {sum(r['fetched'] for r in steady) / len(steady):>8.1f}, "
+              f"inserted {sum(r['inserted'] for r in steady) / len(steady):>8.1f}, "
+              f"{sum(r['seconds'] for r in steady) / len(steady) * 1000:.1f} ms/run")
+        print(f"  total:            fetched {sum(r['fetched'] for r in runs):>6}, inserted {sum(r['inserted'] for r in runs):>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Rows/sec of the INSERT and COPY load paths on already-parsed rows, for new rows, for a
+second pass where every row is a duplicate left to ON CONFLICT, and for the same pass with
+the pre-filter dropping stored rows before they are loaded.
+
+Needs a migrated database in DATABASE_URL:
+
+    python -m benchmarks.bench_loaders --rows 100000 --batch-size 5000
+"""
+from datetime import datetime, timedelta, timezone
+import argparse
+import time
+
+from app.db.session import SessionLocal
+from app.models.station import Station
+from app.models.weather_observation import WeatherObservation
+from app.pipeline.ingest_observations import BatchWriter
+from app.pipeline.loaders import LOADERS
+from app.pipeline.nws_api_functions import parse_observation
+from app.pipeline.prefilter import StoredRowFilter
+from app.pipeline.rollups import delete_rollups
+from benchmarks.nws_stub import make_observation
+
+
+def parsed_rows(station: Station, rows: int) -> list:
+    end = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    result = []
+    for i in range(rows):
+        parsed = parse_observation(make_observation(station.nws_id, end - timedelta(minutes=5 * i)))
+        parsed["station_id"] = station.id
+        result.append(parsed)
+    return result
+
+
+def load(db, rows: list, loader: str, batch_size: int, prefilter: bool = False) -> tuple:
+    row_filter = StoredRowFilter(db, rows[0]["station_id"]) if prefilter else None
+    writer = BatchWriter(db, batch_size=batch_size, flush_interval=float("inf"), loader=loader, row_filter=row_filter)
+    started = time.perf_counter()
+    for row in rows:
+        writer.add(row)
+    writer.flush()
+    db.commit()
+    return writer.inserted, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark INSERT vs COPY loaders.")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    suffix = int(time.time()) % 100000
+    stations = []
+    try:
+        for loader in LOADERS:
+            station = Station(nws_id=f"BL{suffix}{loader[0].upper()}", name="Benchmark station")
+            db.add(station)
+            db.commit()
+            stations.append(station)
+
+            rows = parsed_rows(station, args.rows)
+            for label, prefilter in (("new rows", False), ("duplicates", False), ("pre-filtered", True)):
+                inserted, elapsed = load(db, rows, loader, args.batch_size, prefilter)
+                print(f"{loader:<7} {label:<12} {len(rows):>8} rows  inserted {inserted:>8}  "
+                      f"{elapsed:>7.2f}s  {len(rows) / elapsed:>10.0f} rows/s")
+    finally:
+        db.rollback()
+        for station in stations:
+            delete_rollups(db, station.id)
+            db.query(WeatherObservation).filter_by(station_id=station.id).delete()
+            db.delete(station)
+        db.commit()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
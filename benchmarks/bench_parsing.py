@@ -0,0 +1,67 @@
+"""
+Per-row cost of parse_observation versus the columnar batch parser, after checking
+that both produce identical values. Runs without a database:
+
+    python -m benchmarks.bench_parsing --rows 100000
+"""
+from datetime import datetime, timedelta, timezone
+import argparse
+import random
+import time
+
+from app.pipeline.columnar import parse_observations_columnar, iter_column_rows
+from app.pipeline.nws_api_functions import parse_observation
+from benchmarks.nws_stub import make_observation
+
+# Values on or near a .5 rounding boundary, where naive vectorized rounding drifts
+TIE_VALUES = [2.675, 1.005, 0.125, -0.375, 1.115, 100.545, 0.285, 1e-3, 5, True]
+
+
+def features(rows: int) -> list:
+    end = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    result = [make_observation("BENCH", end - timedelta(minutes=5 * i)) for i in range(rows)]
+    rng = random.Random(0)
+    for feature in result[::7]:
+        feature["properties"]["temperature"]["value"] = rng.choice(TIE_VALUES)
+    result[0]["properties"]["dewpoint"]["value"] = "12.5"  # strings are not numeric in parse_observation
+    result[1]["properties"]["timestamp"] = None
+    return result
+
+
+def check_identical(batch: list) -> None:
+    expected = []
+    for obs in batch:
+        parsed = parse_observation(obs)
+        if parsed.get("timestamp"):
+            parsed["station_id"] = 1
+            expected.append(parsed)
+    actual = list(iter_column_rows(parse_observations_columnar(batch), 1))
+    assert actual == expected, "columnar parser output differs from parse_observation"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark row vs columnar parsing.")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    batch = features(args.rows)
+    check_identical(batch)
+    print(f"columnar output identical to parse_observation for {len(batch)} features")
+
+    started = time.perf_counter()
+    for obs in batch:
+        parse_observation(obs)
+    row_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for i in range(0, len(batch), args.batch_size):
+        parse_observations_columnar(batch[i:i + args.batch_size])
+    columnar_seconds = time.perf_counter() - started
+
+    print(f"row       {row_seconds / len(batch) * 1e6:>7.2f} us/row  ({row_seconds:.2f}s)")
+    print(f"columnar  {columnar_seconds / len(batch) * 1e6:>7.2f} us/row  ({columnar_seconds:.2f}s, batches of {args.batch_size})")
+
+
+if __name__ == "__main__":
+    main()
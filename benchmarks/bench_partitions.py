@@ -0,0 +1,159 @@
+"""
+Query plans and latency of the route range scans on the old single-table layout versus
+the monthly partitioned layout with covering indexes, plus retention by DELETE versus by
+dropping a partition. Both layouts are built as scratch tables from the same synthetic
+data, the real weather_observations table is not touched.
+
+Needs a migrated database in DATABASE_URL:
+
+    python -m benchmarks.bench_partitions --stations 20 --years 2
+"""
+from datetime import datetime, timedelta
+import argparse
+import json
+import time
+
+from sqlalchemy import text
+
+from app.db.session import SessionLocal, engine
+from app.pipeline.partitions import add_months, drop_partitions_before, ensure_partitions, month_start
+
+PLAIN = "bench_observations_plain"
+PARTITIONED = "bench_observations_partitioned"
+END = datetime(2026, 1, 1)
+
+COLUMNS_SQL = """
+    id serial,
+    station_id integer NOT NULL,
+    timestamp timestamp NOT NULL,
+    temperature double precision,
+    wind_speed double precision,
+    humidity double precision
+"""
+
+GENERATE_SQL = """
+    INSERT INTO {table} (station_id, timestamp, temperature, wind_speed, humidity)
+    SELECT s, ts, 15 + 10 * sin(extract(epoch FROM ts) / 86400.0), random() * 40, 50 + random() * 40
+    FROM generate_series(1, :stations) AS s,
+         generate_series(CAST(:start AS timestamp), CAST(:end AS timestamp) - interval '1 second', make_interval(mins => :minutes)) AS ts
+"""
+
+QUERIES = {
+    "avg temperature": """
+        SELECT avg(temperature) FROM {table}
+        WHERE station_id = :station_id AND timestamp >= :start AND timestamp < :end
+    """,
+    "max wind delta": """
+        SELECT MAX(ABS(wind_speed - prev_wind_speed)) FROM (
+            SELECT wind_speed, LAG(wind_speed) OVER (ORDER BY timestamp) AS prev_wind_speed
+            FROM {table}
+            WHERE station_id = :station_id AND timestamp BETWEEN :start AND :end
+        ) AS deltas
+    """,
+}
+
+RANGES = {"1 week": timedelta(days=7), "1 month": timedelta(days=30), "1 year": timedelta(days=365)}
+
+
+def create_tables(db) -> None:
+    db.execute(text(f"""
+        CREATE TABLE {PLAIN} ({COLUMNS_SQL},
+            PRIMARY KEY (id),
+            UNIQUE (station_id, timestamp))
+    """))
+    db.execute(text(f"""
+        CREATE TABLE {PARTITIONED} ({COLUMNS_SQL},
+            PRIMARY KEY (id, timestamp),
+            UNIQUE (station_id, timestamp) INCLUDE (temperature, wind_speed)
+        ) PARTITION BY RANGE (timestamp)
+    """))
+    db.execute(text(f"CREATE TABLE {PARTITIONED}_default PARTITION OF {PARTITIONED} DEFAULT"))
+    db.commit()
+
+
+def plan_summary(plan: dict) -> str:
+    """Scan node types, relations scanned, heap fetches and buffers touched of an EXPLAIN plan."""
+    scans, heap_fetches = {}, 0
+    nodes = [plan["Plan"]]
+    while nodes:
+        node = nodes.pop()
+        if "Relation Name" in node:
+            scans[node["Node Type"]] = scans.get(node["Node Type"], 0) + 1
+            heap_fetches += node.get("Heap Fetches", 0)
+        nodes.extend(node.get("Plans", []))
+    described = ", ".join(f"{count}x {kind}" for kind, count in scans.items())
+    buffers = plan["Plan"]["Shared Hit Blocks"] + plan["Plan"]["Shared Read Blocks"]
+    return f"{described}, {heap_fetches} heap fetches, {buffers} buffers"
+
+
+def explain(db, sql: str, params: dict) -> tuple:
+    plan = db.execute(text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}"), params).scalar()
+    plan = (plan if isinstance(plan, list) else json.loads(plan))[0]
+    return plan["Execution Time"], plan_summary(plan)
+
+
+def timed(db, sql: str, params: dict, repeat: int) -> float:
+    db.execute(text(sql), params)  # warm the cache, report the best of the following runs
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        db.execute(text(sql), params).scalar()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the plain vs partitioned observations layout.")
+    parser.add_argument("--stations", type=int, default=20)
+    parser.add_argument("--years", type=int, default=2)
+    parser.add_argument("--minutes", type=int, default=10, help="Minutes between synthetic observations.")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    start = END - timedelta(days=365 * args.years)
+    db = SessionLocal()
+    try:
+        create_tables(db)
+        ensure_partitions(db, start, END - timedelta(seconds=1), table=PARTITIONED)
+        params = {"stations": args.stations, "start": start, "end": END, "minutes": args.minutes}
+        for table in (PLAIN, PARTITIONED):
+            started = time.perf_counter()
+            db.execute(text(GENERATE_SQL.format(table=table)), params)
+            db.commit()
+            print(f"loaded {table} in {time.perf_counter() - started:.1f}s")
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            for table in (PLAIN, PARTITIONED):
+                conn.execute(text(f"VACUUM ANALYZE {table}"))
+
+        for name, sql in QUERIES.items():
+            print(f"\n{name}")
+            for label, span in RANGES.items():
+                query_params = {"station_id": 1, "start": END - span, "end": END}
+                for table in (PLAIN, PARTITIONED):
+                    query = sql.format(table=table)
+                    _, summary = explain(db, query, query_params)
+                    seconds = timed(db, query, query_params, args.repeat)
+                    print(f"  {label:<8} {table:<30} {seconds * 1000:>8.2f} ms   {summary}")
+
+        # Retention of the oldest month
+        oldest = month_start(start)
+        cutoff = add_months(oldest, 1)
+        started = time.perf_counter()
+        deleted = db.execute(text(f"DELETE FROM {PLAIN} WHERE timestamp < :cutoff"), {"cutoff": cutoff}).rowcount
+        db.commit()
+        delete_seconds = time.perf_counter() - started
+        started = time.perf_counter()
+        drop_partitions_before(db, datetime(cutoff.year, cutoff.month, 1), table=PARTITIONED)
+        drop_seconds = time.perf_counter() - started
+        print(f"\nretention of {deleted} rows: DELETE {delete_seconds * 1000:.1f} ms (leaves dead rows to vacuum), "
+              f"DROP PARTITION {drop_seconds * 1000:.1f} ms")
+    finally:
+        db.rollback()
+        db.execute(text(f"DROP TABLE IF EXISTS {PLAIN}"))
+        db.execute(text(f"DROP TABLE IF EXISTS {PARTITIONED}"))
+        db.commit()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
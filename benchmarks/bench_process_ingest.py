@@ -0,0 +1,129 @@
+"""
+Scaling of the parse/load stage with worker processes (ProcessLoader) against the
+in-process path, where parsing and building insert payloads share one GIL. Pages are
+generated up front as the JSON bytes the API would send, so only decode + parse + load is
+measured. Each run loads the same stations from scratch with 1, 2, 4 and 8 workers.
+
+Also prints the size and parent-side cost of sending one page to a worker as raw bytes
+versus as a pickled list of decoded features.
+
+Needs a migrated database in DATABASE_URL, no stub needed:
+
+    python -m benchmarks.bench_process_ingest --stations 32 --days 7 --workers 1 2 4 8
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+import argparse
+import json
+import os
+import pickle
+import time
+
+from sqlalchemy.dialects.postgresql import insert
+
+from app.db.session import SessionLocal
+from app.models.station import Station
+from app.models.weather_observation import WeatherObservation
+from app.pipeline.ingest_observations import store_observations
+from app.pipeline.partitions import ensure_partitions
+from app.pipeline.process_ingest import ProcessLoader
+from app.pipeline.rollups import delete_rollups
+from app.pipeline.station_cache import StationRef
+from benchmarks.nws_stub import make_observations
+
+PAGE = 500
+
+
+def make_pages(station_id: str, start: datetime, end: datetime, padding: int) -> list:
+    features = make_observations(station_id, start, end, limit=10**9, padding=padding)
+    return [json.dumps({"type": "FeatureCollection", "features": features[i:i + PAGE]}).encode()
+            for i in range(0, len(features), PAGE)]
+
+
+def clear(station_ids: list) -> None:
+    db = SessionLocal()
+    for station_id in station_ids:
+        delete_rollups(db, station_id)
+    db.query(WeatherObservation).filter(WeatherObservation.station_id.in_(station_ids)).delete(synchronize_session=False)
+    db.commit()
+    db.close()
+
+
+def load_in_threads(station: StationRef, pages: list, loader: str, parser: str) -> int:
+    """The in-process path: decode, parse and load on a thread of this process."""
+    db = SessionLocal()
+    try:
+        features = [f for body in pages for f in json.loads(body)["features"]]
+        inserted = store_observations(db, station, features, loader=loader, parser=parser)
+        db.commit()
+        return inserted
+    finally:
+        db.close()
+
+
+def run(label: str, load, workers: int, work: list) -> float:
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers * 2) as executor:
+        inserted = sum(executor.map(lambda item: load(*item), work))
+    seconds = time.perf_counter() - started
+    print(f"{label:<14} {inserted:>9} rows in {seconds:>7.2f}s   {inserted / seconds:>9.0f} rows/s")
+    return inserted / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark parse/load scaling with worker processes.")
+    parser.add_argument("--stations", type=int, default=32)
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--padding", type=int, default=600)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--loader", choices=["copy", "insert"], default="copy")
+    parser.add_argument("--parser", choices=["columnar", "row"], default="columnar")
+    args = parser.parse_args()
+
+    end = datetime(2025, 3, 1, tzinfo=timezone.utc)
+    start = end - timedelta(days=args.days)
+    prefix = f"BP{int(time.time()) % 100000}"
+    nws_ids = [f"{prefix}{i:04d}" for i in range(args.stations)]
+
+    db = SessionLocal()
+    db.execute(insert(Station).values([{"nws_id": n, "name": "Benchmark station"} for n in nws_ids]))
+    db.commit()
+    stations = [StationRef.from_model(s) for s in db.query(Station).filter(Station.nws_id.in_(nws_ids)).order_by(Station.id)]
+    ensure_partitions(db, start.replace(tzinfo=None), end.replace(tzinfo=None))
+    db.close()
+    ids = [s.id for s in stations]
+
+    try:
+        pages = {s.nws_id: make_pages(s.nws_id, start, end, args.padding) for s in stations}
+        sample = pages[stations[0].nws_id][0]
+        started = time.perf_counter()
+        as_bytes = pickle.dumps(sample)
+        bytes_ms = (time.perf_counter() - started) * 1000
+        started = time.perf_counter()
+        as_dicts = pickle.dumps(json.loads(sample)["features"])
+        dicts_ms = (time.perf_counter() - started) * 1000
+        print(f"one page of {PAGE} features sent to a worker: raw bytes {len(as_bytes) / 1024:.0f} KB, "
+              f"{bytes_ms:.2f} ms of parent CPU; decoded + pickled dicts {len(as_dicts) / 1024:.0f} KB, {dicts_ms:.2f} ms")
+        print(f"{len(stations)} stations x {args.days} days, loader {args.loader}, parser {args.parser}, {os.cpu_count()} CPUs\n")
+
+        baseline = None
+        for workers in args.workers:
+            clear(ids)
+            run(f"{workers} threads", load_in_threads, workers,
+                [(s, pages[s.nws_id], args.loader, args.parser) for s in stations])
+            clear(ids)
+            with ProcessLoader(workers) as pool:
+                rate = run(f"{workers} processes", lambda *item: pool.load(*item)[1], workers,
+                           [(s, pages[s.nws_id], args.loader, args.parser) for s in stations])
+            baseline = baseline or rate
+            print(f"{'':<14} speedup over {args.workers[0]} process{'es' if args.workers[0] > 1 else ''}: {rate / baseline:.2f}x\n")
+    finally:
+        clear(ids)
+        db = SessionLocal()
+        db.query(Station).filter(Station.id.in_(ids)).delete(synchronize_session=False)
+        db.commit()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
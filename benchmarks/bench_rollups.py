@@ -0,0 +1,91 @@
+"""
+Latency of a station average computed from raw observations versus the hourly/daily
+rollups, over 1 week, 1 month and 1 year. Generates a synthetic station with one
+observation every `--minutes` minutes (about 1M rows per year at 30s) with SQL, so no
+API is involved.
+
+Needs a migrated database in DATABASE_URL:
+
+    python -m benchmarks.bench_rollups --years 2 --minutes 1
+"""
+from datetime import datetime, timedelta
+import argparse
+import time
+
+from sqlalchemy import func, text
+
+from app.db.session import SessionLocal
+from app.models.station import Station
+from app.models.weather_observation import WeatherObservation
+from app.pipeline.rollups import delete_rollups, rebuild_rollups, rollup_average
+
+RANGES = {"1 week": timedelta(days=7), "1 month": timedelta(days=30), "1 year": timedelta(days=365)}
+
+GENERATE_SQL = text("""
+    INSERT INTO weather_observations (station_id, timestamp, temperature, humidity, pressure)
+    SELECT :station_id, ts, 15 + 10 * sin(extract(epoch FROM ts) / 86400.0), 50 + random() * 40, 101000 + random() * 2000
+    FROM generate_series(CAST(:start AS timestamp), CAST(:end AS timestamp) - interval '1 second', make_interval(mins => :minutes)) AS ts
+""")
+
+
+def timed(fn, repeat: int) -> tuple:
+    value = fn()  # warm the cache, report the best of the following runs
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return value, best
+
+
+def raw_average(db, station_id: int, start: datetime, end: datetime):
+    return db.query(func.avg(WeatherObservation.temperature)).filter(
+        WeatherObservation.station_id == station_id,
+        WeatherObservation.timestamp >= start,
+        WeatherObservation.timestamp < end,
+    ).scalar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark raw vs rollup averages.")
+    parser.add_argument("--years", type=int, default=2)
+    parser.add_argument("--minutes", type=int, default=1, help="Minutes between synthetic observations.")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    station = Station(nws_id=f"BR{int(time.time()) % 100000}", name="Benchmark station")
+    db.add(station)
+    db.commit()
+    try:
+        end = datetime(2026, 1, 1)
+        start = end - timedelta(days=365 * args.years)
+        started = time.perf_counter()
+        db.execute(GENERATE_SQL, {"station_id": station.id, "start": start, "end": end, "minutes": args.minutes})
+        db.commit()
+        rows = db.query(func.count(WeatherObservation.id)).filter_by(station_id=station.id).scalar()
+        print(f"generated {rows} observations in {time.perf_counter() - started:.1f}s")
+
+        started = time.perf_counter()
+        rebuild_rollups(db, station.id)
+        print(f"rebuilt rollups in {time.perf_counter() - started:.1f}s")
+        db.execute(text("ANALYZE weather_observations"))
+
+        for label, span in RANGES.items():
+            range_start = end - span
+            raw, raw_seconds = timed(lambda: raw_average(db, station.id, range_start, end), args.repeat)
+            rolled, rollup_seconds = timed(lambda: rollup_average(db, station.id, "temperature", range_start, end), args.repeat)
+            assert abs(raw - rolled) < 1e-6, f"rollup average {rolled} differs from raw average {raw}"
+            print(f"{label:<8} raw {raw_seconds * 1000:>8.2f} ms   rollup {rollup_seconds * 1000:>6.2f} ms   "
+                  f"x{raw_seconds / rollup_seconds:>6.1f}")
+    finally:
+        db.rollback()
+        delete_rollups(db, station.id)
+        db.query(WeatherObservation).filter_by(station_id=station.id).delete()
+        db.delete(station)
+        db.commit()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
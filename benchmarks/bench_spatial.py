@@ -0,0 +1,101 @@
+"""
+Lookup latency of the in-memory station index (nearest-K, radius, bounding box) versus
+a full table scan with Python distance math, over 50k stations inserted into the
+stations table. Also reports the time to rebuild the index from the table, and checks
+the index returns the same stations as the scan.
+
+Needs a migrated database in DATABASE_URL:
+
+    python -m benchmarks.bench_spatial --stations 50000 --queries 200
+"""
+import argparse
+import math
+import random
+import time
+
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+
+from app.db.session import SessionLocal
+from app.models.station import Station
+from app.models.weather_observation import WeatherObservation  # noqa: F401, registers the Station.observations target
+from app.pipeline.spatial import EARTH_RADIUS_KM, STATION_INDEX_QUERY, StationIndex, station_refs
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def scan_nearest(db, latitude: float, longitude: float, k: int) -> list:
+    """The baseline: read every station, compute every distance in Python."""
+    rows = db.execute(text("SELECT nws_id, latitude, longitude FROM stations WHERE latitude IS NOT NULL AND longitude IS NOT NULL")).all()
+    return sorted(rows, key=lambda r: haversine_km(latitude, longitude, r[1], r[2]))[:k]
+
+
+def scan_bbox(db, south: float, west: float, north: float, east: float) -> list:
+    return db.execute(text(
+        "SELECT nws_id FROM stations WHERE latitude BETWEEN :south AND :north AND longitude BETWEEN :west AND :east"
+    ), {"south": south, "west": west, "north": north, "east": east}).all()
+
+
+def timed(fn, queries: list) -> tuple:
+    """Results and mean milliseconds of fn over every query."""
+    started = time.perf_counter()
+    results = [fn(*q) for q in queries]
+    return results, (time.perf_counter() - started) * 1000 / len(queries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark station index lookups against full scans.")
+    parser.add_argument("--stations", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--radius-km", type=float, default=100)
+    args = parser.parse_args()
+
+    random.seed(1)
+    db = SessionLocal()
+    prefix = f"BS{int(time.time()) % 100000}"
+    # Spread over the continental US, like NWS stations
+    rows = [{
+        "nws_id": f"{prefix}{i:06d}",
+        "name": "Benchmark station",
+        "latitude": random.uniform(25, 49),
+        "longitude": random.uniform(-125, -67),
+    } for i in range(args.stations)]
+    for i in range(0, len(rows), 5000):
+        db.execute(insert(Station).values(rows[i:i + 5000]))
+    db.commit()
+    try:
+        started = time.perf_counter()
+        index = StationIndex(station_refs(db.execute(STATION_INDEX_QUERY).all()))
+        print(f"index of {len(index)} stations rebuilt from the table in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+        points = [(random.uniform(26, 48), random.uniform(-124, -68)) for _ in range(args.queries)]
+        scans = points[:max(1, args.queries // 10)]  # the scan baseline is slow, fewer queries
+
+        expected, scan_ms = timed(lambda lat, lon: [r[0] for r in scan_nearest(db, lat, lon, args.k)], scans)
+        found, index_ms = timed(lambda lat, lon: [s.nws_id for s, _ in index.nearest(lat, lon, args.k)], points)
+        assert found[:len(scans)] == expected, "nearest stations differ from the full scan"
+        print(f"nearest {args.k:<6} scan + Python {scan_ms:>9.3f} ms   index {index_ms:>7.3f} ms")
+
+        found, index_ms = timed(lambda lat, lon: index.within_radius(lat, lon, args.radius_km), points)
+        print(f"radius {args.radius_km:<5.0f}km index {index_ms:>7.3f} ms   ({sum(map(len, found)) / len(found):.0f} stations per query)")
+
+        boxes = [(lat - 1, lon - 1, lat + 1, lon + 1) for lat, lon in points]
+        expected, scan_ms = timed(lambda *box: sorted(r[0] for r in scan_bbox(db, *box)), boxes)
+        found, index_ms = timed(lambda *box: [s.nws_id for s in index.within_bbox(*box)], boxes)
+        assert found == expected, "bounding box stations differ from the SQL scan"
+        print(f"bbox 2x2 deg    SQL scan      {scan_ms:>9.3f} ms   index {index_ms:>7.3f} ms   "
+              f"({sum(map(len, found)) / len(found):.0f} stations per query)")
+    finally:
+        db.rollback()
+        db.query(Station).filter(Station.nws_id.like(f"{prefix}%")).delete(synchronize_session=False)
+        db.commit()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Peak memory and throughput of the old materialize-everything insert versus the
+streaming, batched store_observations, over synthetic observation payloads.
+
+Needs a migrated database in DATABASE_URL:
+
+    python -m benchmarks.bench_streaming --rows 100000 --batch-size 1000
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Iterator
+import argparse
+import time
+import tracemalloc
+
+from sqlalchemy.dialects.postgresql import insert
+
+from app.db.session import SessionLocal
+from app.models.station import Station
+from app.models.weather_observation import WeatherObservation
+from app.pipeline.ingest_observations import store_observations
+from app.pipeline.nws_api_functions import parse_observation
+from app.pipeline.rollups import delete_rollups
+from benchmarks.nws_stub import make_observation
+
+
+def synthetic_features(station_id: str, rows: int) -> Iterator[dict]:
+    """Yield `rows` observation features at a 5 minute cadence, newest first."""
+    end = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    for i in range(rows):
+        yield make_observation(station_id, end - timedelta(minutes=5 * i))
+
+
+def materialized_store(db, station: Station, raw_obs: list) -> int:
+    """The previous implementation: parse everything, then one INSERT for all rows."""
+    to_insert = []
+    for obs in raw_obs:
+        parsed = parse_observation(obs)
+        if not parsed.get("timestamp"):
+            continue
+        parsed["station_id"] = station.id
+        to_insert.append(parsed)
+    stmt = (
+        insert(WeatherObservation)
+        .values(to_insert)
+        .on_conflict_do_nothing(index_elements=["station_id", "timestamp"])
+        .returning(WeatherObservation.id)
+    )
+    return len(db.execute(stmt).scalars().all())
+
+
+def measure(label: str, fn) -> None:
+    tracemalloc.start()
+    started = time.perf_counter()
+    inserted = fn()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<12} {inserted:>8} rows  {elapsed:>7.2f}s  {inserted / elapsed:>9.0f} rows/s  peak {peak / 2**20:>8.1f} MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark materialized vs streaming inserts.")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    suffix = int(time.time()) % 100000
+    stations = []
+    try:
+        for mode in ("M", "S"):
+            station = Station(nws_id=f"BS{suffix}{mode}", name="Benchmark station")
+            db.add(station)
+            stations.append(station)
+        db.commit()
+        materialized, streaming = stations
+
+        measure("materialized", lambda: materialized_store(
+            db, materialized, list(synthetic_features(materialized.nws_id, args.rows))))
+        db.commit()
+        measure("streaming", lambda: store_observations(
+            db, streaming, synthetic_features(streaming.nws_id, args.rows), batch_size=args.batch_size))
+        db.commit()
+    finally:
+        db.rollback()
+        for station in stations:
+            delete_rollups(db, station.id)
+            db.query(WeatherObservation).filter_by(station_id=station.id).delete()
+            db.delete(station)
+        db.commit()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
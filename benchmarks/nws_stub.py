@@ -0,0 +1,265 @@
+"""
+Local stand-in for the NWS API, serving synthetic stations and observations.
+
+Run it and point the pipeline at it:
+
+    python benchmarks/nws_stub.py --port 8080
+    NWS_BASE_URL=http://localhost:8080 python -m app.seeder --stations 000PG 000SE 011HI
+
+By default any station ID exists and every response succeeds immediately. To simulate
+a realistic or hostile API, restrict the stations, change the cadence and payload size,
+add latency and inject failures:
+
+    python benchmarks/nws_stub.py --port 8080 --stations 1000 --prefix SIM --cadence-minutes 5 \\
+        --padding 600 --latency 0.08 --latency-jitter 0.04 --error-rate 0.01 --throttle-rate 0.02
+
+GET /_stats returns the requests served by status and the features and bytes sent.
+"""
+from dataclasses import dataclass, asdict
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import urlencode, urlparse, parse_qs
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+
+CADENCE = timedelta(minutes=5)
+
+
+@dataclass
+class StubConfig:
+    """Behaviour of the simulated API."""
+    stations: int = 0  # 0 accepts any station ID, otherwise only <prefix>00000 .. <prefix>{stations - 1}
+    prefix: str = "SIM"
+    cadence: timedelta = CADENCE
+    padding: int = 0  # extra bytes per observation feature, real ones carry ~1-2 KB of fields we ignore
+    latency: float = 0.0  # seconds per request
+    latency_jitter: float = 0.0  # uniform extra seconds per request
+    error_rate: float = 0.0  # share of requests answered with a 500
+    throttle_rate: float = 0.0  # share of requests answered with a 429
+    retry_after: int = 1  # Retry-After seconds sent with a 429
+    paginate: bool = True  # link the next page like the real API when a page is full
+    seed: Optional[int] = None  # seeds the failure / jitter draws for reproducible runs
+
+
+def station_ids(count: int, prefix: str = "SIM") -> list:
+    """The station IDs a stub started with `--stations count --prefix prefix` knows."""
+    return [f"{prefix}{i:05d}" for i in range(count)]
+
+
+def parse_api_datetime(value: str) -> datetime:
+    """Parse an ISO 8601 UTC string as sent by the pipeline."""
+    return datetime.strptime(value, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
+
+
+def format_api_datetime(value: datetime) -> str:
+    return value.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def make_station(station_id: str) -> dict:
+    """Build a deterministic station GeoJSON Feature for `station_id`."""
+    rng = random.Random(station_id)
+    return {
+        "type": "Feature",
+        "geometry": {"type": "Point", "coordinates": [round(rng.uniform(-160, -65), 4), round(rng.uniform(20, 65), 4)]},
+        "properties": {"stationIdentifier": station_id, "name": f"Synthetic {station_id}", "timeZone": "America/Chicago"},
+    }
+
+
+def make_observation(station_id: str, ts: datetime, padding: int = 0) -> dict:
+    """Build a deterministic observation Feature for `station_id` at `ts`, `padding` bytes larger."""
+    rng = random.Random(f"{station_id}{ts.isoformat()}")
+
+    def value(low: float, high: float) -> dict:
+        return {"value": rng.uniform(low, high) if rng.random() > 0.05 else None}
+
+    feature = {
+        "type": "Feature",
+        "properties": {
+            "timestamp": ts.isoformat(),
+            "temperature": value(-20, 40),
+            "relativeHumidity": value(0, 100),
+            "windSpeed": value(0, 60),
+            "windDirection": value(0, 360),
+            "barometricPressure": value(95000, 105000),
+            "dewpoint": value(-25, 25),
+            "visibility": value(0, 16000),
+        },
+    }
+    if padding:
+        # Stands in for rawMessage, textDescription, cloudLayers, ... which the pipeline skips
+        feature["properties"]["rawMessage"] = "M" * padding
+    return feature
+
+
+def make_observations(station_id: str, start: datetime, end: datetime, limit: int, cadence: timedelta = CADENCE, padding: int = 0) -> list:
+    """Observations on a fixed cadence in [start, end], newest first like the real API."""
+    features = []
+    ts = end - timedelta(seconds=end.timestamp() % cadence.total_seconds())
+    while ts >= start and len(features) < limit:
+        features.append(make_observation(station_id, ts, padding))
+        ts -= cadence
+    return features
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so connection reuse can be measured
+    config = StubConfig()
+    features_served = 0
+    bytes_served = 0
+    status_counts: Dict[int, int] = {}
+    _lock = threading.Lock()
+    _rng = random.Random()
+
+    @property
+    def latency(self) -> float:
+        return self.config.latency
+
+    def _send(self, status: int, payload: dict, headers: Optional[Dict[str, str]] = None) -> None:
+        body = json.dumps(payload).encode()
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        if status == 200 and self.headers.get("If-None-Match") == etag:
+            self._count(304, 0)
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self._count(status, len(body))
+        self.send_response(status)
+        self.send_header("Content-Type", "application/geo+json" if status == 200 else "application/problem+json")
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _count(self, status: int, size: int) -> None:
+        with StubHandler._lock:
+            StubHandler.status_counts[status] = StubHandler.status_counts.get(status, 0) + 1
+            StubHandler.bytes_served += size
+
+    def _problem(self, status: int, title: str, detail: str, headers: Optional[Dict[str, str]] = None) -> None:
+        self._send(status, {"title": title, "detail": detail, "type": f"urn:stub:{status}", "status": status}, headers)
+
+    def _known(self, station_id: str) -> bool:
+        config = self.config
+        if not config.stations:
+            return True
+        suffix = station_id[len(config.prefix):]
+        return station_id.startswith(config.prefix) and suffix.isdigit() and int(suffix) < config.stations
+
+    def do_GET(self):
+        config = self.config
+        url = urlparse(self.path)
+        parts = [p for p in url.path.split("/") if p]
+        query = parse_qs(url.query)
+
+        if parts == ["_stats"]:
+            with StubHandler._lock:
+                stats = {
+                    "responses": {str(k): v for k, v in sorted(StubHandler.status_counts.items())},
+                    "features_served": StubHandler.features_served,
+                    "bytes_served": StubHandler.bytes_served,
+                }
+            return self._send(200, stats)
+
+        with StubHandler._lock:
+            draw, jitter = StubHandler._rng.random(), StubHandler._rng.random()
+        delay = config.latency + config.latency_jitter * jitter
+        if delay:
+            time.sleep(delay)
+        if draw < config.throttle_rate:
+            return self._problem(429, "Too Many Requests", "Rate limit exceeded", {"Retry-After": str(config.retry_after)})
+        if draw < config.throttle_rate + config.error_rate:
+            return self._problem(500, "Unexpected Problem", "An unexpected problem has occurred.")
+
+        if len(parts) == 2 and parts[0] == "stations":
+            if not self._known(parts[1]):
+                return self._problem(404, "Not Found", f"Station {parts[1]} not found")
+            return self._send(200, make_station(parts[1]))
+        if len(parts) == 3 and parts[0] == "stations" and parts[2] == "observations":
+            if not self._known(parts[1]):
+                return self._problem(404, "Not Found", f"Station {parts[1]} not found")
+            now = datetime.now(timezone.utc)
+            end = parse_api_datetime(query["end"][0]) if "end" in query else now
+            start = parse_api_datetime(query["start"][0]) if "start" in query else end - timedelta(days=7)
+            limit = int(query.get("limit", ["500"])[0])
+            features = make_observations(parts[1], start, end, limit, config.cadence, config.padding)
+            with StubHandler._lock:
+                StubHandler.features_served += len(features)
+            payload = {"type": "FeatureCollection", "features": features}
+            if config.paginate and len(features) == limit:
+                # Next page ends just before the oldest feature of this one
+                oldest = datetime.fromisoformat(features[-1]["properties"]["timestamp"])
+                params = {"start": format_api_datetime(start), "end": format_api_datetime(oldest - timedelta(seconds=1)), "limit": limit}
+                payload["pagination"] = {"next": f"http://{self.headers.get('Host')}{url.path}?{urlencode(params)}"}
+            return self._send(200, payload)
+        self._problem(404, "Not Found", f"No route for {url.path}")
+
+    def log_message(self, format, *args):
+        pass
+
+
+def configure(config: StubConfig) -> None:
+    StubHandler.config = config
+    StubHandler._rng = random.Random(config.seed)
+
+
+def start_in_thread(port: int = 0, latency: float = 0.0, config: Optional[StubConfig] = None) -> ThreadingHTTPServer:
+    """Start the stub on a background thread (port 0 picks a free port) and return the server."""
+    configure(config or StubConfig(latency=latency))
+    server = ThreadingHTTPServer(("127.0.0.1", port), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def config_from_args(args: argparse.Namespace) -> StubConfig:
+    return StubConfig(
+        stations=args.stations,
+        prefix=args.prefix,
+        cadence=timedelta(minutes=args.cadence_minutes),
+        padding=args.padding,
+        latency=args.latency,
+        latency_jitter=args.latency_jitter,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        retry_after=args.retry_after,
+        paginate=not args.no_pagination,
+        seed=args.seed,
+    )
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Simulator options, shared with the end-to-end benchmark that starts the stub."""
+    parser.add_argument("--stations", type=int, default=0, help="Number of known stations, 0 accepts any ID.")
+    parser.add_argument("--prefix", default="SIM", help="Prefix of the known station IDs.")
+    parser.add_argument("--cadence-minutes", type=float, default=5.0, help="Minutes between observations.")
+    parser.add_argument("--padding", type=int, default=0, help="Extra bytes per observation feature.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Artificial delay per request, in seconds.")
+    parser.add_argument("--latency-jitter", type=float, default=0.0, help="Uniform random extra delay per request, in seconds.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with a 500.")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Share of requests answered with a 429.")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds of the 429 responses.")
+    parser.add_argument("--no-pagination", action="store_true", help="Never link a next page, like the stub used to.")
+    parser.add_argument("--seed", type=int, default=None, help="Seed of the failure and jitter draws.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a local stub of the NWS API.")
+    parser.add_argument("--port", type=int, default=8080)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    configure(config_from_args(args))
+    server = ThreadingHTTPServer(("0.0.0.0", args.port), StubHandler)
+    print(f"NWS stub listening on http://localhost:{args.port} with {json.dumps(asdict(StubHandler.config), default=str)}", flush=True)
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
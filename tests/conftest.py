@@ -0,0 +1,4 @@
+import os
+
+# app.db.session builds its engine at import, it only connects when a test uses it
+os.environ.setdefault("DATABASE_URL", "postgresql+psycopg2://postgres@localhost/nws_test")
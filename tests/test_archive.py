@@ -0,0 +1,35 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.pipeline.archive import ResponseArchive
+from benchmarks.nws_stub import make_observation
+
+
+def features(count: int) -> list:
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    return [make_observation("KTST", start + timedelta(minutes=5 * i)) for i in range(count)]
+
+
+def test_store_skips_archived_features(tmp_path):
+    archive = ResponseArchive(str(tmp_path), "gzip")
+    assert archive.store("KTST", features(10)) == 10
+    assert archive.store("KTST", features(12)) == 2
+    assert archive.store("KTST", features(12) + features(12)) == 0
+    assert len(list(ResponseArchive(str(tmp_path), "gzip").iter_features("KTST"))) == 12
+
+
+def test_failed_store_is_retried(tmp_path, monkeypatch):
+    archive = ResponseArchive(str(tmp_path), "gzip")
+    compress = archive._compress
+
+    def full_disk(data):
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(archive, "_compress", full_disk)
+    with pytest.raises(OSError):
+        archive.store("KTST", features(5))
+
+    monkeypatch.setattr(archive, "_compress", compress)
+    assert archive.store("KTST", features(5)) == 5
+    assert len(list(archive.iter_features("KTST"))) == 5
@@ -0,0 +1,160 @@
+import pytest
+import requests
+
+from app.pipeline import governor
+from app.pipeline.governor import AdaptiveConcurrency, CircuitBreaker, CircuitOpenError, RequestGovernor, TokenBucket
+
+
+class FakeClock:
+    """Stands in for the `time` module of the governor, sleeping advances the clock."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = 0.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.slept += seconds
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(governor, "time", fake)
+    return fake
+
+
+def test_breaker_opens_after_threshold(clock):
+    breaker = CircuitBreaker("host/stations/{id}", threshold=3, cooldown=10)
+    for _ in range(2):
+        breaker.allow()
+        breaker.record(failed=True)
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.allow()
+    breaker.record(failed=True)
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+
+
+def test_breaker_success_resets_failures(clock):
+    breaker = CircuitBreaker("e", threshold=2, cooldown=10)
+    breaker.record(failed=True)
+    breaker.record(failed=False)
+    breaker.record(failed=True)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_breaker_half_open_allows_one_probe(clock):
+    breaker = CircuitBreaker("e", threshold=1, cooldown=10)
+    breaker.record(failed=True)
+    clock.now += 10
+    breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+    breaker.record(failed=False)
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.allow()
+
+
+def test_breaker_failed_probe_reopens(clock):
+    breaker = CircuitBreaker("e", threshold=1, cooldown=10)
+    breaker.record(failed=True)
+    clock.now += 10
+    breaker.allow()
+    breaker.record(failed=True)
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+    clock.now += 10
+    breaker.allow()
+
+
+def test_unexpected_error_on_probe_does_not_wedge_circuit(clock):
+    rg = RequestGovernor(rate=0, max_retries=0)
+    url = "https://api.example/stations/KX/observations"
+    breaker = rg.breaker(governor.endpoint_of(url))
+    breaker.threshold = 1
+    breaker.record(failed=True)
+    clock.now += breaker.cooldown
+
+    def broken():
+        raise requests.exceptions.ChunkedEncodingError("truncated body")
+
+    with pytest.raises(requests.exceptions.ChunkedEncodingError):
+        rg.send(url, broken)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    clock.now += breaker.cooldown
+    response = requests.Response()
+    response.status_code = 200
+    assert rg.send(url, lambda: response) is response
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_bucket_burst_then_rate(clock):
+    bucket = TokenBucket(rate=2, burst=3)
+    for _ in range(3):
+        bucket.acquire()
+    assert clock.slept == 0
+    bucket.acquire()
+    assert clock.slept == pytest.approx(0.5)
+
+
+def test_bucket_refills_over_time(clock):
+    bucket = TokenBucket(rate=1, burst=2)
+    bucket.acquire()
+    bucket.acquire()
+    clock.now += 2
+    bucket.acquire()
+    bucket.acquire()
+    assert clock.slept == 0
+
+
+def test_bucket_zero_rate_never_blocks(clock):
+    bucket = TokenBucket(rate=0, burst=1)
+    for _ in range(100):
+        bucket.acquire()
+    assert clock.slept == 0
+
+
+def test_bucket_pause(clock):
+    bucket = TokenBucket(rate=0, burst=1)
+    bucket.pause(5)
+    bucket.acquire()
+    assert clock.slept == pytest.approx(5)
+
+
+def test_concurrency_halves_on_throttle_once_per_interval(clock):
+    limit = AdaptiveConcurrency(maximum=16, decrease_interval=1.0)
+    limit.acquire()
+    limit.release(throttled=True)
+    assert limit.limit == 8
+    limit.acquire()
+    limit.release(throttled=True)
+    assert limit.limit == 8
+    clock.now += 1
+    limit.acquire()
+    limit.release(throttled=True)
+    assert limit.limit == 4
+
+
+def test_concurrency_additive_increase_and_bounds(clock):
+    limit = AdaptiveConcurrency(maximum=4, minimum=2)
+    for _ in range(3):
+        clock.now += 1
+        limit.acquire()
+        limit.release(throttled=True)
+    assert limit.limit == 2
+    limit.acquire()
+    limit.release(throttled=False)
+    assert limit.limit == pytest.approx(2.5)
+    for _ in range(100):
+        limit.acquire()
+        limit.release(throttled=False)
+    assert limit.limit == 4
+    assert limit.in_flight == 0
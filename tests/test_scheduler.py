@@ -0,0 +1,93 @@
+from concurrent.futures import wait
+import threading
+
+from app.pipeline.concurrent_ingest import StationResult
+from app.pipeline.scheduler import Scheduler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+def make_scheduler(clock, stations=("KA", "KB"), cadence=lambda station_id: 600.0, runner=None):
+    runner = runner or (lambda station_id: StationResult(station_id, 1, 0.1))
+    return Scheduler(list(stations), workers=2, clock=clock, sleep=clock.sleep, runner=runner,
+                     cadence=cadence, min_interval=300, max_interval=3600)
+
+
+def settle(scheduler):
+    """Wait for the runs in flight, then reap them."""
+    wait(list(scheduler._in_flight))
+    scheduler.tick()
+
+
+def test_stations_rescheduled_on_their_cadence():
+    clock = FakeClock()
+    scheduler = make_scheduler(clock)
+    assert scheduler.tick() == 2
+    settle(scheduler)
+    for station_id in ("KA", "KB"):
+        assert scheduler.stations[station_id].interval == 600
+        assert scheduler.stations[station_id].next_run == 1600
+    clock.now += 599
+    assert scheduler.tick() == 0
+    clock.now += 1
+    assert scheduler.tick() == 2
+    scheduler.shutdown()
+
+
+def test_failed_cadence_lookup_keeps_interval():
+    clock = FakeClock()
+
+    def broken(station_id):
+        raise RuntimeError("database unavailable")
+
+    scheduler = make_scheduler(clock, cadence=broken)
+    scheduler.tick()
+    settle(scheduler)
+    for station_id in ("KA", "KB"):
+        schedule = scheduler.stations[station_id]
+        assert schedule.failures == 0
+        assert schedule.next_run == 1000 + schedule.interval
+    assert scheduler.snapshot()["in_flight"] == 0
+    clock.now += scheduler.stations["KA"].interval
+    assert scheduler.tick() == 2
+    scheduler.shutdown()
+
+
+def test_failed_run_backs_off():
+    clock = FakeClock()
+    scheduler = make_scheduler(clock, stations=["KA"], runner=lambda s: StationResult(s, 0, 0.1, error="boom"))
+    scheduler.tick()
+    settle(scheduler)
+    schedule = scheduler.stations["KA"]
+    assert schedule.failures == 1
+    assert schedule.next_run == 1000 + min(schedule.interval * 2, 3600)
+    scheduler.shutdown()
+
+
+def test_run_forever_survives_a_failed_iteration(monkeypatch):
+    clock = FakeClock()
+    scheduler = make_scheduler(clock)
+    stop = threading.Event()
+    ticks = []
+
+    def flaky_tick():
+        ticks.append(clock.now)
+        if len(ticks) == 1:
+            raise RuntimeError("transient")
+        if len(ticks) == 3:
+            stop.set()
+        return 0
+
+    monkeypatch.setattr(scheduler, "tick", flaky_tick)
+    scheduler.run_forever(stop, poll=1.0)
+    assert len(ticks) == 3
+    scheduler.shutdown()
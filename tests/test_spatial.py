@@ -0,0 +1,20 @@
+import pytest
+
+from app.pipeline.spatial import StationIndex
+from app.pipeline.station_cache import StationRef
+
+STATIONS = [
+    StationRef(1, "KDEN", "Denver", latitude=39.85, longitude=-104.66),
+    StationRef(2, "KBJC", "Broomfield", latitude=39.91, longitude=-105.12),
+    StationRef(3, "KCOS", "Colorado Springs", latitude=38.81, longitude=-104.71),
+]
+
+
+def test_nearest_within_max_km():
+    found = StationIndex(STATIONS).nearest(39.74, -104.99, 3, max_km=50)
+    assert [s.nws_id for s, _ in found] == ["KBJC", "KDEN"]
+
+
+def test_nearest_rejects_negative_max_km():
+    with pytest.raises(ValueError):
+        StationIndex(STATIONS).nearest(39.74, -104.99, 3, max_km=-100)